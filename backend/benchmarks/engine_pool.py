@@ -0,0 +1,87 @@
+"""
+Throughput benchmark for the Stockfish engine pool.
+
+Analyzes the same set of positions with pools of increasing size, one client
+thread per engine, and reports positions per second and the speedup over a
+single engine. With one search thread per engine, throughput should grow
+roughly linearly up to the number of physical cores.
+
+Usage (from backend/):
+    python benchmarks/engine_pool.py
+    python benchmarks/engine_pool.py --sizes 1 2 4 8 --positions 64 --depth 14
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Backend modules are imported as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import chess  # noqa: E402
+from stockfish_engine import EnginePool  # noqa: E402
+
+
+def random_positions(count: int, seed: int = 0) -> list:
+    """FENs reached by short random games, so the searches are comparable."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(8, 30)):
+            legal = list(board.legal_moves)
+            if not legal:
+                break
+            board.push(rng.choice(legal))
+        if not board.is_game_over():
+            positions.append(board.fen())
+    return positions
+
+
+def run(size: int, positions: list, depth: int) -> dict:
+    """Analyze all positions with a pool of `size` engines."""
+    pool = EnginePool(size=size)
+    try:
+        # Start the engines before timing
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            list(executor.map(lambda fen: pool.analyze_position(fen, depth=1), positions[:size]))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            list(executor.map(lambda fen: pool.analyze_position(fen, depth=depth), positions))
+        elapsed = time.perf_counter() - start
+        return {"seconds": elapsed, "stats": pool.stats()}
+    finally:
+        pool.stop()
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_sizes = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="Pool sizes to benchmark")
+    parser.add_argument("--positions", type=int, default=32, help="Number of positions to analyze")
+    parser.add_argument("--depth", type=int, default=14, help="Search depth")
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions)
+    print(f"{args.positions} positions at depth {args.depth}, {cores} CPU cores")
+    print(f"{'engines':>8} {'time (s)':>9} {'pos/s':>7} {'speedup':>8} {'avg wait (ms)':>14}")
+    baseline = None
+    for size in args.sizes:
+        result = run(size, positions, args.depth)
+        rate = len(positions) / result["seconds"]
+        baseline = baseline or rate
+        print(
+            f"{size:>8} {result['seconds']:>9.2f} {rate:>7.1f} {rate / baseline:>8.2f} "
+            f"{result['stats']['avg_wait_ms']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Precision benchmark for the static puzzle pre-filter and the shallow-search gate.
+
+Runs the full puzzle evaluation (three deep searches) on every position of a
+set of games to know which ones are puzzles, then replays how each selection
+strategy would have spent its engine time on them, POSITIONS_PER_GAME
+positions per game:
+
+- random: the former behavior, positions sampled at random (expected values)
+- prefilter: positions ranked by puzzles.screen_position, quiet ones skipped
+- prefilter+gate: the same, with the shallow searches deciding whether the deep ones run
+
+For each strategy it reports the positions searched, the puzzles found, the
+precision (puzzles / positions searched), the recall (puzzles found / all
+puzzles in the games) and the puzzles per engine-second.
+
+Games come from a PGN file (every position of both players is a candidate),
+or are played by the engine itself at low depth with random blunders.
+
+Usage (from backend/):
+    python benchmarks/puzzle_prefilter.py
+    python benchmarks/puzzle_prefilter.py --pgn my_games.pgn --games 50 --max-ply 40
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Backend modules are imported as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import chess  # noqa: E402
+import chess.pgn  # noqa: E402
+from puzzles import (  # noqa: E402
+    PUZZLE_GATE_CP, PUZZLE_GATE_DEPTH, PUZZLE_MIN_SWING_CP, PUZZLE_PREFILTER_MIN_SCORE, SWING_PLIES,
+    classify_puzzle, screen_position
+)
+from stockfish_engine import EnginePool  # noqa: E402
+
+POSITIONS_PER_GAME = 5
+
+
+def read_games(path: str, count: int) -> list:
+    """Move lists of the first `count` games of a PGN file."""
+    games = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        while len(games) < count:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            games.append(list(game.mainline_moves()))
+    return games
+
+
+def play_games(pool: EnginePool, count: int, plies: int, depth: int, blunder_rate: float, seed: int = 0) -> list:
+    """Move lists of games the engine plays against itself, with random moves mixed in."""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = chess.Board()
+        while len(board.move_stack) < plies and not board.is_game_over():
+            if rng.random() < blunder_rate:
+                move = rng.choice(list(board.legal_moves))
+            else:
+                move = chess.Move.from_uci(pool.analyze_position(board.fen(), depth=depth)["best_move"])
+            board.push(move)
+        games.append(board.move_stack)
+    return games
+
+
+def timed_search(pool: EnginePool, board: chess.Board, depth: int) -> tuple:
+    start = time.perf_counter()
+    result = pool.analyze_position(board.fen(), depth=depth)
+    return result, time.perf_counter() - start
+
+
+def measure(pool: EnginePool, moves: list, ply: int, depth: int) -> dict:
+    """Static features, gate outcome and deep evaluation of one position, with the time each took."""
+    board = chess.Board()
+    for move in moves[:ply]:
+        board.push(move)
+    move = moves[ply]
+    played_board = board.copy()
+    played_board.push(move)
+
+    start = time.perf_counter()
+    screening = screen_position(board, move, moves[ply + 1:ply + 1 + SWING_PLIES])
+    screen_seconds = time.perf_counter() - start
+
+    gate_seconds = 0.0
+    passes_gate = True
+    if PUZZLE_GATE_DEPTH and screening["hanging"] < PUZZLE_MIN_SWING_CP:
+        shallow, seconds = timed_search(pool, board, PUZZLE_GATE_DEPTH)
+        gate_seconds += seconds
+        passes_gate = shallow["best_move"] not in ("none", move.uci())
+        if passes_gate:
+            shallow_played, seconds = timed_search(pool, played_board, PUZZLE_GATE_DEPTH)
+            gate_seconds += seconds
+            passes_gate = shallow["score_cp"] + shallow_played["score_cp"] >= PUZZLE_GATE_CP
+
+    position, deep_seconds = timed_search(pool, board, depth)
+    is_puzzle = False
+    if position["best_move"] != "none":
+        best_board = board.copy()
+        best_board.push(chess.Move.from_uci(position["best_move"]))
+        best, best_seconds = timed_search(pool, best_board, depth - 3)
+        played, played_seconds = timed_search(pool, played_board, depth - 3)
+        deep_seconds += best_seconds + played_seconds
+        is_puzzle = classify_puzzle(
+            position["best_move"], move.uci(), position["score_cp"], -best["score_cp"], -played["score_cp"]
+        ) is not None
+
+    return {
+        "score": screening["score"],
+        "screen_seconds": screen_seconds,
+        "passes_gate": passes_gate,
+        "gate_seconds": gate_seconds,
+        "deep_seconds": deep_seconds,
+        "puzzle": is_puzzle,
+    }
+
+
+def report(name: str, searched: float, found: float, total_puzzles: int, seconds: float):
+    precision = found / searched if searched else 0.0
+    recall = found / total_puzzles if total_puzzles else 0.0
+    rate = found / seconds if seconds else 0.0
+    print(f"{name:>15} {searched:>9.1f} {found:>8.1f} {precision:>10.1%} {recall:>7.1%} {seconds:>10.1f} {rate:>12.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pgn", help="PGN file to take games from (default: engine self-play)")
+    parser.add_argument("--games", type=int, default=20, help="Number of games")
+    parser.add_argument("--min-ply", type=int, default=0, help="First ply of the positions considered")
+    parser.add_argument("--max-ply", type=int, default=30, help="Positions considered are before this ply")
+    parser.add_argument("--depth", type=int, default=18, help="Depth of the position search (the others are 3 less)")
+    parser.add_argument("--blunder-rate", type=float, default=0.15, help="Random move rate in self-play games")
+    args = parser.parse_args()
+
+    # One engine and no cache, so search times add up to engine time
+    pool = EnginePool(size=1)
+    try:
+        if args.pgn:
+            games = read_games(args.pgn, args.games)
+        else:
+            games = play_games(pool, args.games, args.max_ply + SWING_PLIES, 4, args.blunder_rate)
+
+        measured = []
+        for moves in games:
+            plies = range(args.min_ply, min(args.max_ply, len(moves)))
+            measured.append([measure(pool, moves, ply, args.depth) for ply in plies])
+            print(f"\r{len(measured)}/{len(games)} games analyzed", end="", file=sys.stderr)
+        print(file=sys.stderr)
+    finally:
+        pool.stop()
+
+    positions = [position for game in measured for position in game]
+    total_puzzles = sum(position["puzzle"] for position in positions)
+    flagged = [position for position in positions if position["score"] >= PUZZLE_PREFILTER_MIN_SCORE]
+    flagged_puzzles = sum(position["puzzle"] for position in flagged)
+    screen_ms = sum(position["screen_seconds"] for position in positions) / max(len(positions), 1) * 1000
+
+    print(f"{len(games)} games, {len(positions)} positions, {total_puzzles} puzzles "
+          f"({total_puzzles / max(len(positions), 1):.1%}), depth {args.depth}")
+    print(f"Pre-filter: {screen_ms:.2f} ms per position, {len(flagged)} positions scoring >= "
+          f"{PUZZLE_PREFILTER_MIN_SCORE}, precision {flagged_puzzles / max(len(flagged), 1):.1%}, "
+          f"recall {flagged_puzzles / max(total_puzzles, 1):.1%}")
+    print()
+    print(f"{'strategy':>15} {'searched':>9} {'puzzles':>8} {'precision':>10} {'recall':>7} "
+          f"{'engine (s)':>10} {'puzzles/s':>12}")
+
+    # Random sampling: each position is searched with probability k / n
+    searched = found = seconds = 0.0
+    for game in measured:
+        if not game:
+            continue
+        share = min(POSITIONS_PER_GAME, len(game)) / len(game)
+        searched += share * len(game)
+        found += share * sum(position["puzzle"] for position in game)
+        seconds += share * sum(position["deep_seconds"] for position in game)
+    report("random", searched, found, total_puzzles, seconds)
+
+    searched = found = seconds = 0
+    gated_searched = gated_found = gated_seconds = 0
+    for game in measured:
+        ranked = sorted(game, key=lambda position: position["score"], reverse=True)
+        selected = [position for position in ranked if position["score"] >= PUZZLE_PREFILTER_MIN_SCORE]
+        for position in selected[:POSITIONS_PER_GAME]:
+            searched += 1
+            found += position["puzzle"]
+            seconds += position["deep_seconds"]
+            gated_seconds += position["gate_seconds"]
+            if position["passes_gate"]:
+                gated_searched += 1
+                gated_found += position["puzzle"]
+                gated_seconds += position["deep_seconds"]
+    report("prefilter", searched, found, total_puzzles, seconds)
+    report("prefilter+gate", gated_searched, gated_found, total_puzzles, gated_seconds)
+
+
+if __name__ == "__main__":
+    main()
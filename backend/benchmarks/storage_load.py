@@ -0,0 +1,188 @@
+"""
+Cold-load benchmark for GameStorage.
+
+Generates synthetic databases of increasing size, then loads each one in a
+fresh process and reports load time and peak RSS. The streaming loader is
+compared with decoding the whole snapshot with json.load (GameStorage picks
+one or the other by size, see STREAM_LOAD_MIN_BYTES), and with reopening
+from the binary snapshot written next to it.
+
+Usage (from backend/):
+    python benchmarks/storage_load.py
+    python benchmarks/storage_load.py --sizes 10000 100000 500000 --keep
+"""
+
+import argparse
+import json
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Backend modules are imported as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import chess  # noqa: E402
+import storage  # noqa: E402
+from storage import GameRecord, GameStorage, PgnBlob, pack_moves, storage_files, write_binary_snapshot  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+PLAYERS = [f"player{i}" for i in range(200)]
+TIME_CONTROLS = ["60+0", "180+0", "180+2", "300+0", "600+0", "900+10"]
+
+
+def random_game_moves(rng: random.Random, plies: int) -> list:
+    """Play random legal moves from the start position, returning SAN."""
+    board = chess.Board()
+    moves = []
+    for _ in range(plies):
+        legal = list(board.legal_moves)
+        if not legal:
+            break
+        move = rng.choice(legal)
+        moves.append(board.san(move))
+        board.push(move)
+    return moves
+
+
+def generate_database(path: Path, size: int, seed: int = 0):
+    """Write a snapshot and PGN blob with `size` synthetic games."""
+    rng = random.Random(seed)
+    # Random games are slow to generate, so a pool of them is reused
+    pool = []
+    for _ in range(200):
+        moves = random_game_moves(rng, rng.randint(20, 120))
+        pgn = "[Event \"Rated game\"]\n[Site \"https://lichess.org\"]\n\n" + " ".join(moves) + " *"
+        pool.append((pack_moves(moves), pgn))
+
+    blob = PgnBlob(storage_files(path)[3])
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i in range(size):
+            packed, pgn = pool[i % len(pool)]
+            record = GameRecord(
+                game_id=f"game-{i:08d}",
+                platform=rng.choice(["lichess", "chess.com"]),
+                date=f"20{10 + i * 15 // size:02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00",
+                white_player=rng.choice(PLAYERS),
+                black_player=rng.choice(PLAYERS),
+                result=rng.choice(["1-0", "0-1", "1/2-1/2"]),
+                time_control=rng.choice(TIME_CONTROLS),
+                rated=True,
+                pgn=pgn,
+                packed_moves=packed
+            )
+            record.store_pgn(blob)
+            if i:
+                f.write(",")
+            f.write("\n  ")
+            f.write(json.dumps(record.game_id))
+            f.write(": ")
+            f.write(json.dumps(record.to_dict(), ensure_ascii=False))
+        f.write("\n}")
+    blob.sync()
+    blob.close()
+
+
+def write_binary(path: Path):
+    """Write the binary snapshot for a generated database."""
+    storage = GameStorage(str(path))
+    write_binary_snapshot(storage.binary_snapshot_file, path, list(storage.games.values()))
+    storage.close()
+
+
+def hide_binary(path: Path):
+    """Move the binary snapshot aside so GameStorage falls back to the JSON snapshot."""
+    snap = storage_files(path)[4]
+    snap.rename(snap.with_suffix(".snap.hidden"))
+
+
+def restore_binary(path: Path):
+    snap = storage_files(path)[4]
+    snap.with_suffix(".snap.hidden").rename(snap)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(path: Path, mode: str):
+    """Load a database in this process and print the result as JSON."""
+    # Force the JSON decoding path, whatever the size of the snapshot
+    storage.STREAM_LOAD_MIN_BYTES = 0 if mode == "stream" else sys.maxsize
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    games = len(GameStorage(str(path)).games)
+    elapsed = time.perf_counter() - start
+    print("RESULT " + json.dumps({
+        "mode": mode,
+        "games": games,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "baseline_rss_mb": round(baseline, 1)
+    }))
+
+
+def run_child(path: Path, mode: str) -> dict:
+    """Measure in a fresh interpreter so peak RSS isn't shared between runs."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", str(path), "--mode", mode],
+        capture_output=True, text=True, check=True
+    ).stdout
+    for line in output.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"No result from child process:\n{output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Database sizes to benchmark")
+    parser.add_argument("--keep", action="store_true", help="Keep generated databases")
+    parser.add_argument("--measure", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=["stream", "json", "binary"], default="stream", help=argparse.SUPPRESS)
+    parser.add_argument("--write-binary", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.write_binary:
+        write_binary(args.write_binary)
+        return
+    if args.measure:
+        measure(args.measure, args.mode)
+        return
+
+    work_dir = Path(tempfile.mkdtemp(prefix="storage_load_"))
+    try:
+        print(f"{'games':>8} {'mode':>7} {'load (s)':>9} {'peak RSS (MB)':>14} {'above baseline':>15} {'file (MB)':>10}")
+        for size in args.sizes:
+            path = work_dir / f"db_{size}.json"
+            generate_database(path, size)
+            # In a child process too, loading the games would raise this process' peak RSS
+            subprocess.run([sys.executable, __file__, "--write-binary", str(path)], capture_output=True, check=True)
+            file_mb = path.stat().st_size / (1024 * 1024)
+            hide_binary(path)
+            for mode in ("stream", "json", "binary"):
+                if mode == "binary":
+                    restore_binary(path)
+                result = run_child(path, mode)
+                print(
+                    f"{result['games']:>8} {mode:>7} {result['seconds']:>9.2f} "
+                    f"{result['peak_rss_mb']:>14.1f} {result['peak_rss_mb'] - result['baseline_rss_mb']:>15.1f} "
+                    f"{file_mb:>10.1f}"
+                )
+    finally:
+        if args.keep:
+            print(f"Databases kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,10 @@ Fetches public games and normalizes them to the unified Game model.
 
 import httpx
 from typing import List, Dict, Callable
-import uuid
 from datetime import datetime
 import chess.pgn
 import io
-from storage import Game
+from storage import Game, make_game_id
 
 
 class ChessComFetcher:
@@ -114,7 +113,7 @@ class ChessComFetcher:
             rated = game_data.get("rated", False)
 
             return Game(
-                game_id=str(uuid.uuid4()),
+                game_id=make_game_id("chess.com", game_data.get("url"), date, white, black, moves),
                 platform="chess.com",
                 date=date,
                 white_player=white,
@@ -255,7 +254,7 @@ class LichessFetcher:
             rated = game_data.get("rated", False)
 
             return Game(
-                game_id=str(uuid.uuid4()),
+                game_id=make_game_id("lichess", game_data.get("id"), date, white, black, moves),
                 platform="lichess",
                 date=date,
                 white_player=white,
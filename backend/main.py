@@ -3,20 +3,32 @@ FastAPI backend for chess training application.
 Provides endpoints for game import, retrieval, analysis, and opening exploration.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 import uuid
 import asyncio
+import threading
+import os
+import time
 import chess
 import chess.pgn
 import io
 
-from storage import DatabaseManager, DatabaseMetadata, Game
+from storage import (
+    DatabaseManager, DatabaseMetadata, Game, GameRecord, GameStorage, PuzzleStore, analysis_depth, pack_analysis
+)
 from fetchers import ChessComFetcher, LichessFetcher
-from stockfish_engine import stockfish
+from stockfish_engine import EnginePoolTimeout, Priority, engine_pool, evaluation_cache, search_limit
+from puzzles import (
+    PUZZLE_GATE_CP, PUZZLE_GATE_DEPTH, PUZZLE_MIN_SWING_CP, PUZZLE_PREFILTER_MIN_SCORE, SWING_PLIES,
+    classify_puzzle, screen_position
+)
 import logger
 from pathlib import Path
 import json
@@ -126,9 +138,73 @@ async def startup_migration():
     logger.info(f"Database manager initialized with {len(db_manager.metadata)} databases")
 
 
+@app.on_event("shutdown")
+async def shutdown_flush():
+    """Write pending database changes, stop the engines and close the evaluation cache before the process exits."""
+    if db_manager is not None:
+        db_manager.flush()
+    engine_pool.stop()
+    evaluation_cache.close()
+
+
+async def get_loaded_database(db_id: str) -> GameStorage:
+    """Return a database once it has finished loading, without blocking the event loop."""
+    storage = db_manager.get_database(db_id)
+    if not storage.is_loaded:
+        await asyncio.to_thread(storage.wait_until_loaded)
+    return storage
+
+
+# Default latency ceiling for interactive engine searches, queueing included (0 = none)
+ANALYSIS_MAX_LATENCY_MS = int(os.environ.get("CHESS_ANALYSIS_MAX_LATENCY_MS", "10000"))
+
+
+def max_latency_seconds(max_latency_ms: Optional[int]) -> Optional[float]:
+    """Convert a request's latency ceiling to seconds, applying the default (None = no ceiling)."""
+    if max_latency_ms is None:
+        max_latency_ms = ANALYSIS_MAX_LATENCY_MS
+    return max_latency_ms / 1000 if max_latency_ms > 0 else None
+
+
+def movetime_seconds(movetime_ms: Optional[int]) -> Optional[float]:
+    """Convert a request's movetime to seconds (0 or None = no time limit)."""
+    return movetime_ms / 1000 if movetime_ms else None
+
+
+# Non-standard status code for requests abandoned by the client (as used by nginx)
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready."""
+
+
+async def until_disconnected(http_request: Request, awaitable, poll_interval: float = 0.25):
+    """
+    Await a coroutine or future, cancelling it if the client disconnects first.
+
+    Cancelling an engine search stops it, so abandoned requests free their engine.
+
+    Raises:
+        ClientDisconnected: If the client disconnected before the result was ready
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
 # Background task tracking
 import_tasks: Dict[str, Dict] = {}
 puzzle_tasks: Dict[str, Dict] = {}
+game_analysis_tasks: Dict[str, Dict] = {}
 
 
 # Pydantic models for request/response
@@ -154,7 +230,17 @@ class ImportStatus(BaseModel):
 
 class AnalyzePositionRequest(BaseModel):
     fen: str
-    depth: int = 20
+    depth: Optional[int] = 20  # The search stops at the first of depth, nodes and movetime
+    nodes: Optional[int] = None
+    movetime_ms: Optional[int] = None
+    max_latency_ms: Optional[int] = None  # Ceiling including queueing (default ANALYSIS_MAX_LATENCY_MS, 0 = none)
+
+
+class AnalyzeBatchRequest(BaseModel):
+    fens: List[str]
+    depth: Optional[int] = 20  # Limits shared by every position, as in AnalyzePositionRequest
+    nodes: Optional[int] = None
+    movetime_ms: Optional[int] = None
 
 
 class ExplorerQueryRequest(BaseModel):
@@ -165,6 +251,28 @@ class ExplorerQueryRequest(BaseModel):
     to_date: Optional[str] = None
     time_control: Optional[List[str]] = None  # Time control filters (e.g., ["bullet", "blitz"])
     usernames: Optional[List[str]] = None  # List of usernames to identify which color user played
+    max_latency_ms: Optional[int] = None  # Ceiling for the engine searches (default ANALYSIS_MAX_LATENCY_MS, 0 = none)
+
+
+class AnalyzeGamesRequest(BaseModel):
+    game_ids: Optional[List[str]] = None  # Games to analyze (default: every game in the database)
+    depth: Optional[int] = None  # Search depth per position (default GAME_ANALYSIS_DEPTH)
+
+
+class GameAnalysisResponse(BaseModel):
+    task_id: str
+    message: str
+
+
+class GameAnalysisStatus(BaseModel):
+    task_id: str
+    status: str  # "running", "completed", "failed"
+    progress: int  # 0-100
+    current_game: int
+    total_games: int
+    games_analyzed: int  # Games analyzed by this task (already analyzed games are skipped)
+    positions_analyzed: int
+    error: Optional[str] = None
 
 
 class CreateDatabaseRequest(BaseModel):
@@ -196,10 +304,10 @@ class PuzzleCandidate(BaseModel):
     opening_name: str
     opening_eco: str
     player_color: str  # "white" or "black"
+    player: str  # Username of the player to move
     opponent: str
     date: str
     platform: str
-    pgn: str  # Full PGN of the game
 
 
 class GeneratePuzzlesRequest(BaseModel):
@@ -228,10 +336,18 @@ class PuzzleGenerationStatus(BaseModel):
     current_game: int
     total_games: int
     puzzles_found: int
+    stopped: bool = False  # Stopped early by /api/puzzles/stop
     error: Optional[str] = None
     puzzles: Optional[List[PuzzleCandidate]] = None  # Only when completed
 
 
+class PuzzleQueryResponse(BaseModel):
+    total: int  # Puzzles matching the filters
+    offset: int
+    limit: int
+    puzzles: List[PuzzleCandidate]
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -303,6 +419,22 @@ async def rename_database(db_id: str, request: RenameDatabaseRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/databases/pool")
+async def get_database_pool_stats():
+    """Get database pool statistics (memory use, hits, misses, evictions)."""
+    return db_manager.pool_stats()
+
+
+@app.get("/api/databases/{db_id}/status")
+async def get_database_status(db_id: str):
+    """Get load progress of a database (starts loading it if needed)."""
+    try:
+        return db_manager.get_load_progress(db_id)
+    except ValueError as e:
+        logger.warning(f"Database not found: {db_id}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 # ===========================
 # Game Import Endpoints
 # ===========================
@@ -383,78 +515,80 @@ async def run_import_task(
     """Background task to fetch and import games."""
     logger.info(f"Starting import task {task_id} for database {db_id}")
     try:
-        # Get database storage
-        storage = db_manager.get_database(db_id)
-
-        total_fetched = 0
-        new_games_added = 0
-        duplicates_skipped = 0
-
-        tasks_to_run = []
-        if chesscom_username:
-            tasks_to_run.append(("chess.com", chesscom_username))
-            logger.debug(f"Task {task_id}: Added chess.com import for {chesscom_username}")
-        if lichess_username:
-            tasks_to_run.append(("lichess", lichess_username))
-            logger.debug(f"Task {task_id}: Added lichess import for {lichess_username}")
-
-        total_tasks = len(tasks_to_run)
-
-        for idx, (platform, username) in enumerate(tasks_to_run):
-            logger.info(f"Task {task_id}: Fetching games from {platform} for {username}")
-            platform_progress_offset = (idx / total_tasks) * 100
-            platform_progress_range = 100 / total_tasks
-
-            def progress_callback(platform_progress):
-                """Update task progress."""
-                overall_progress = int(platform_progress_offset + (platform_progress / 100) * platform_progress_range)
-                import_tasks[task_id]["progress"] = min(overall_progress, 99)
-
-            # Fetch games
-            if platform == "chess.com":
-                fetcher = ChessComFetcher()
-                games = await fetcher.fetch_games(username, progress_callback)
-            else:
-                fetcher = LichessFetcher()
-                games = await fetcher.fetch_games(username, progress_callback)
-
-            logger.info(f"Task {task_id}: Fetched {len(games)} games from {platform}")
-
-            # Add games to storage (with deduplication)
-            for game in games:
-                total_fetched += 1
-
-                # Check for duplicates
-                if storage.game_exists(
-                    game.platform,
-                    game.date,
-                    game.white_player,
-                    game.black_player
-                ):
-                    duplicates_skipped += 1
+        # Keep the database open in the pool until the task is done
+        with db_manager.pin(db_id):
+            # Get database storage
+            storage = await get_loaded_database(db_id)
+
+            total_fetched = 0
+            new_games_added = 0
+            duplicates_skipped = 0
+
+            tasks_to_run = []
+            if chesscom_username:
+                tasks_to_run.append(("chess.com", chesscom_username))
+                logger.debug(f"Task {task_id}: Added chess.com import for {chesscom_username}")
+            if lichess_username:
+                tasks_to_run.append(("lichess", lichess_username))
+                logger.debug(f"Task {task_id}: Added lichess import for {lichess_username}")
+
+            total_tasks = len(tasks_to_run)
+
+            for idx, (platform, username) in enumerate(tasks_to_run):
+                logger.info(f"Task {task_id}: Fetching games from {platform} for {username}")
+                platform_progress_offset = (idx / total_tasks) * 100
+                platform_progress_range = 100 / total_tasks
+
+                def progress_callback(platform_progress):
+                    """Update task progress."""
+                    overall_progress = int(platform_progress_offset + (platform_progress / 100) * platform_progress_range)
+                    import_tasks[task_id]["progress"] = min(overall_progress, 99)
+
+                # Fetch games
+                if platform == "chess.com":
+                    fetcher = ChessComFetcher()
+                    games = await fetcher.fetch_games(username, progress_callback)
                 else:
-                    storage.add_game(game)
-                    new_games_added += 1
-
-            logger.debug(f"Task {task_id}: Processed {platform} - New: {new_games_added}, Duplicates: {duplicates_skipped}")
-
-        # Save to file
-        storage.save()
-        logger.info(f"Task {task_id}: Saved games to storage")
-
-        # Update game count in metadata
-        db_manager.update_game_count(db_id)
-        logger.debug(f"Task {task_id}: Updated game count for database {db_id}")
-
-        # Mark complete
-        import_tasks[task_id].update({
-            "status": "completed",
-            "progress": 100,
-            "total_fetched": total_fetched,
-            "new_games_added": new_games_added,
-            "duplicates_skipped": duplicates_skipped
-        })
-        logger.info(f"Task {task_id} completed successfully - Total: {total_fetched}, New: {new_games_added}, Duplicates: {duplicates_skipped}")
+                    fetcher = LichessFetcher()
+                    games = await fetcher.fetch_games(username, progress_callback)
+
+                logger.info(f"Task {task_id}: Fetched {len(games)} games from {platform}")
+
+                # Add games to storage (with deduplication)
+                for game in games:
+                    total_fetched += 1
+
+                    # Check for duplicates (same ID on re-import, or same game under an older ID)
+                    if storage.get_game(game.game_id) or storage.game_exists(
+                        game.platform,
+                        game.date,
+                        game.white_player,
+                        game.black_player
+                    ):
+                        duplicates_skipped += 1
+                    else:
+                        storage.add_game(game)
+                        new_games_added += 1
+
+                logger.debug(f"Task {task_id}: Processed {platform} - New: {new_games_added}, Duplicates: {duplicates_skipped}")
+
+            # Save to file
+            storage.save()
+            logger.info(f"Task {task_id}: Saved games to storage")
+
+            # Update game count in metadata
+            db_manager.update_game_count(db_id)
+            logger.debug(f"Task {task_id}: Updated game count for database {db_id}")
+
+            # Mark complete
+            import_tasks[task_id].update({
+                "status": "completed",
+                "progress": 100,
+                "total_fetched": total_fetched,
+                "new_games_added": new_games_added,
+                "duplicates_skipped": duplicates_skipped
+            })
+            logger.info(f"Task {task_id} completed successfully - Total: {total_fetched}, New: {new_games_added}, Duplicates: {duplicates_skipped}")
 
     except Exception as e:
         import_tasks[task_id].update({
@@ -511,7 +645,7 @@ async def get_games(
             "time_control": g.time_control,
             "rated": g.rated
         }
-        for g in sorted(games, key=lambda x: x.date, reverse=True)
+        for g in reversed(games)  # filter_games returns oldest first
     ]
 
 
@@ -533,6 +667,10 @@ async def get_game(game_id: str, db_id: str):
     storage = db_manager.get_database(db_id)
 
     game = storage.get_game(game_id)
+    if not game and not storage.is_loaded:
+        # Not loaded yet, it may still be further down the file
+        await asyncio.to_thread(storage.wait_until_loaded)
+        game = storage.get_game(game_id)
     if not game:
         logger.warning(f"Game not found: {game_id} in database {db_id}")
         raise HTTPException(status_code=404, detail="Game not found")
@@ -554,32 +692,254 @@ async def get_game(game_id: str, db_id: str):
         "pgn": game.pgn,
         "moves": game.moves,
         "opening_name": opening_info['name'],
-        "opening_eco": opening_info['eco']
+        "opening_eco": opening_info['eco'],
+        # Evaluation of the position before each move and after the last one, if analyzed
+        "analysis": game.analysis
+    }
+
+
+@app.post("/api/games/analyze", response_model=GameAnalysisResponse)
+async def analyze_games_endpoint(request: AnalyzeGamesRequest, background_tasks: BackgroundTasks, db_id: str):
+    """
+    Start a background task running every position of some games through the engine.
+
+    The evaluations are stored with each game and returned by /api/games/{game_id}.
+    Games already analyzed at least as deep are skipped.
+
+    Args:
+        request: Games to analyze and search depth
+        db_id: Database ID the games belong to
+
+    Returns:
+        GameAnalysisResponse with task_id for tracking progress
+    """
+    if db_id not in db_manager.metadata:
+        raise HTTPException(status_code=400, detail=f"Database {db_id} not found")
+
+    task_id = str(uuid.uuid4())
+    game_analysis_tasks[task_id] = {
+        "task_id": task_id,
+        "status": "running",
+        "progress": 0,
+        "current_game": 0,
+        "total_games": len(request.game_ids) if request.game_ids is not None else 0,
+        "games_analyzed": 0,
+        "positions_analyzed": 0,
+        "error": None
     }
 
+    background_tasks.add_task(
+        run_game_analysis_task,
+        task_id=task_id,
+        db_id=db_id,
+        game_ids=request.game_ids,
+        depth=request.depth or GAME_ANALYSIS_DEPTH
+    )
+
+    logger.info(f"Started game analysis task {task_id} in database {db_id}")
+
+    return GameAnalysisResponse(task_id=task_id, message="Game analysis started")
+
+
+@app.get("/api/games/analyze/status/{task_id}", response_model=GameAnalysisStatus)
+async def get_game_analysis_status(task_id: str):
+    """Get the status of a game analysis task."""
+    if task_id not in game_analysis_tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return GameAnalysisStatus(**game_analysis_tasks[task_id])
+
 
 @app.post("/api/analyze/position")
-async def analyze_position(request: AnalyzePositionRequest):
+async def analyze_position(request: AnalyzePositionRequest, http_request: Request):
     """Analyze a position with Stockfish."""
-    logger.debug(f"Analyze position request - FEN: {request.fen[:50]}..., depth: {request.depth}")
+    logger.debug(
+        f"Analyze position request - FEN: {request.fen[:50]}..., depth: {request.depth}, "
+        f"nodes: {request.nodes}, movetime: {request.movetime_ms}ms, max latency: {request.max_latency_ms}ms"
+    )
+    movetime = movetime_seconds(request.movetime_ms)
     try:
-        # Ensure Stockfish is started
-        if not stockfish.engine:
-            logger.info("Starting Stockfish engine for analysis")
-            stockfish.start()
-
-        analysis = stockfish.analyze_position(request.fen, request.depth)
+        search_limit(request.depth, request.nodes, movetime)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # Awaiting the pooled engine keeps the event loop free while the search runs
+        analysis = await until_disconnected(
+            http_request,
+            engine_pool.analyze_position_async(
+                request.fen,
+                depth=request.depth,
+                nodes=request.nodes,
+                movetime=movetime,
+                max_latency=max_latency_seconds(request.max_latency_ms)
+            )
+        )
         logger.info(f"Analysis completed - Score: {analysis.get('score', 'N/A')}, Best move: {analysis.get('best_move', 'N/A')}")
         return analysis
 
+    except ClientDisconnected:
+        logger.info("Client disconnected, analysis cancelled")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+    except EnginePoolTimeout as e:
+        logger.warning(f"Analysis rejected: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         logger.exception("Analysis exception traceback")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def server_sent_event(event: str, data: Dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/api/analyze/stream")
+async def analyze_position_stream(
+    fen: str,
+    depth: Optional[int] = 20,
+    multipv: int = 1,
+    nodes: Optional[int] = None,
+    movetime_ms: Optional[int] = None,
+    max_latency_ms: Optional[int] = None
+):
+    """
+    Analyze a position with Stockfish, streaming a result per completed depth.
+
+    Sends server-sent events: an "analysis" event for each depth (same fields
+    as /api/analyze/position), the last one with "final": true, then "done".
+    Failures are sent as an "error" event. Closing the connection stops the
+    search, so clients can stop once the evaluation is good enough.
+
+    Args:
+        depth: Search depth (0 = no depth limit: without nodes, movetime_ms or
+            a latency ceiling the search runs until the client disconnects)
+    """
+    logger.debug(f"Analyze stream request - FEN: {fen[:50]}..., depth: {depth}, multipv: {multipv}")
+    depth = depth or None
+    movetime = movetime_seconds(movetime_ms)
+    try:
+        chess.Board(fen)
+        # No limit at all is allowed here, the search runs until the client disconnects
+        if depth is not None or nodes is not None or movetime is not None:
+            search_limit(depth, nodes, movetime)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        updates = engine_pool.analysis_stream_async(
+            fen,
+            depth=depth,
+            multipv=max(1, multipv),
+            nodes=nodes,
+            movetime=movetime,
+            max_latency=max_latency_seconds(max_latency_ms)
+        )
+        try:
+            async for update in updates:
+                yield server_sent_event("analysis", update)
+            yield server_sent_event("done", {})
+        except asyncio.CancelledError:
+            # The client disconnected, closing the generator below stops the search
+            logger.info("Client disconnected, streamed analysis stopped")
+            raise
+        except EnginePoolTimeout as e:
+            logger.warning(f"Streamed analysis rejected: {e}")
+            yield server_sent_event("error", {"status": 503, "detail": str(e)})
+        except Exception as e:
+            logger.error(f"Streamed analysis failed: {e}")
+            logger.exception("Streamed analysis exception traceback")
+            yield server_sent_event("error", {"status": 500, "detail": f"Analysis failed: {str(e)}"})
+        finally:
+            await updates.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# Most positions accepted by one batch analysis request
+ANALYSIS_BATCH_MAX_POSITIONS = 1000
+
+
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: AnalyzeBatchRequest):
+    """
+    Analyze many positions with shared limits, streaming results as they finish.
+
+    Identical positions (same EPD, move counters aside) are searched once.
+    The searches fan out over the engines background jobs may use.
+
+    Returns:
+        NDJSON stream, one line per requested FEN in completion order, each an
+        analysis result (see /api/analyze/position) plus its "index" in the
+        request. Invalid FENs get a line with an "error".
+    """
+    if len(request.fens) > ANALYSIS_BATCH_MAX_POSITIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {ANALYSIS_BATCH_MAX_POSITIONS} positions per batch ({len(request.fens)} given)"
+        )
+    try:
+        search_limit(request.depth, request.nodes, movetime_seconds(request.movetime_ms))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.debug(f"Batch analysis request - {len(request.fens)} positions, depth: {request.depth}")
+
+    # Requested indexes per distinct position
+    positions: Dict[str, List[int]] = {}
+    invalid = []
+    for index, fen in enumerate(request.fens):
+        try:
+            positions.setdefault(chess.Board(fen).epd(), []).append(index)
+        except ValueError as e:
+            invalid.append({"index": index, "fen": fen, "error": str(e)})
+
+    slots = asyncio.Semaphore(engine_pool.limits[Priority.BACKGROUND])
+
+    async def analyze(indexes: List[int]) -> List[Dict]:
+        async with slots:
+            analysis = await engine_pool.analyze_position_async(
+                request.fens[indexes[0]],
+                depth=request.depth,
+                nodes=request.nodes,
+                movetime=movetime_seconds(request.movetime_ms),
+                priority=Priority.BACKGROUND
+            )
+        return [{**analysis, "index": index, "fen": request.fens[index]} for index in indexes]
+
+    async def lines():
+        for line in invalid:
+            yield json.dumps(line) + "\n"
+        tasks = [asyncio.ensure_future(analyze(indexes)) for indexes in positions.values()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for line in await finished:
+                    yield json.dumps(line) + "\n"
+            logger.info(f"Batch analysis completed - {len(request.fens)} positions, {len(positions)} distinct")
+        finally:
+            # The client went away, stop the searches still running or queued
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/engine/pool")
+async def get_engine_pool_stats():
+    """Get Stockfish engine pool occupancy and wait-time statistics."""
+    return engine_pool.stats()
+
+
+@app.get("/api/engine/cache")
+async def get_evaluation_cache_stats():
+    """Get evaluation cache statistics (entries per tier, hit rate, evictions)."""
+    return evaluation_cache.stats()
+
+
 @app.post("/api/explorer/query")
-async def explorer_query(request: ExplorerQueryRequest, db_id: str):
+async def explorer_query(request: ExplorerQueryRequest, db_id: str, http_request: Request):
     """
     Query the opening explorer.
     Returns all continuations from the database for a given position,
@@ -597,13 +957,14 @@ async def explorer_query(request: ExplorerQueryRequest, db_id: str):
             raise HTTPException(status_code=400, detail=f"Database {db_id} not found")
 
         # Get database storage
-        storage = db_manager.get_database(db_id)
+        storage = await get_loaded_database(db_id)
 
         # Parse the position
         board = chess.Board(request.fen)
 
         # Find all games that reached this position
-        continuations = find_continuations(
+        continuations = await asyncio.to_thread(
+            find_continuations,
             storage,
             board,
             request.color,
@@ -614,12 +975,11 @@ async def explorer_query(request: ExplorerQueryRequest, db_id: str):
         )
         logger.debug(f"Found {len(continuations)} continuations in database {db_id}")
 
-        # Get Stockfish evaluation for current position
-        if not stockfish.engine:
-            logger.info("Starting Stockfish engine for explorer")
-            stockfish.start()
-
-        position_eval = stockfish.analyze_position(request.fen, depth=18)
+        # Evaluate the current position and its continuations (one multipv search)
+        position_eval = await until_disconnected(
+            http_request,
+            analyze_explorer_position(board, request.fen, continuations, max_latency_seconds(request.max_latency_ms))
+        )
 
         # Get Stockfish best move
         best_move_uci = position_eval.get("best_move")
@@ -650,6 +1010,11 @@ async def explorer_query(request: ExplorerQueryRequest, db_id: str):
             "total_games": sum(c["count"] for c in continuations)
         }
 
+    except ClientDisconnected:
+        logger.info("Client disconnected, explorer query cancelled")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+    except EnginePoolTimeout as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Explorer query failed: {str(e)}")
 
@@ -686,7 +1051,12 @@ async def generate_puzzles_endpoint(request: GeneratePuzzlesRequest, background_
         "total_games": 0,
         "puzzles_found": 0,
         "error": None,
-        "puzzles": None
+        "puzzles": None,
+        # Puzzles in the order found, streamed by /api/puzzles/stream
+        "found": [],
+        "stop": threading.Event(),
+        "stopped": False,
+        "listeners": set()
     }
 
     # Start background task
@@ -724,11 +1094,166 @@ async def get_puzzle_generation_status(task_id: str):
         current_game=task["current_game"],
         total_games=task["total_games"],
         puzzles_found=task["puzzles_found"],
+        stopped=task["stopped"],
         error=task.get("error"),
         puzzles=task.get("puzzles")
     )
 
 
+def notify_puzzle_streams(task: Dict):
+    """Wake up the streams of a puzzle generation task (on the event loop)."""
+    for listener in task["listeners"]:
+        listener.set()
+
+
+def puzzle_progress(task: Dict) -> Dict:
+    return {name: task[name] for name in ("progress", "current_game", "total_games", "puzzles_found")}
+
+
+@app.get("/api/puzzles/stream/{task_id}")
+async def stream_puzzle_generation(task_id: str):
+    """
+    Stream the puzzles of a generation task as they are found.
+
+    Sends server-sent events: a "puzzle" event for each puzzle (a PuzzleCandidate,
+    from the first one found, so a client can connect late), a "progress" event
+    when the scan advances, then "done" with the final progress and whether the
+    task was stopped, or "error" if it failed. Closing the connection doesn't stop
+    the task, POST /api/puzzles/stop/{task_id} does.
+    """
+    if task_id not in puzzle_tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task = puzzle_tasks[task_id]
+
+    async def events():
+        listener = asyncio.Event()
+        task["listeners"].add(listener)
+        sent = 0
+        progress = None
+        try:
+            while True:
+                listener.clear()
+                found = task["found"]
+                while sent < len(found):
+                    yield server_sent_event("puzzle", jsonable_encoder(found[sent]))
+                    sent += 1
+
+                if task["status"] == "failed":
+                    yield server_sent_event("error", {"status": 500, "detail": task.get("error")})
+                    return
+                if puzzle_progress(task) != progress:
+                    progress = puzzle_progress(task)
+                    yield server_sent_event("progress", progress)
+                if task["status"] == "completed":
+                    yield server_sent_event("done", {**progress, "stopped": task["stopped"]})
+                    return
+
+                await listener.wait()
+        finally:
+            task["listeners"].discard(listener)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/puzzles/stop/{task_id}", response_model=PuzzleGenerationStatus)
+async def stop_puzzle_generation(task_id: str):
+    """
+    Stop a puzzle generation task early, e.g. once the client has enough puzzles.
+
+    Games not scanned yet are skipped and positions being searched are the last
+    ones, which frees the engines within one search. The task then completes
+    with the puzzles found so far.
+    """
+    if task_id not in puzzle_tasks:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task = puzzle_tasks[task_id]
+    if task["status"] == "running":
+        task["stopped"] = True
+        task["stop"].set()
+        logger.logger.info(f"Stopping puzzle generation task {task_id}")
+
+    return await get_puzzle_generation_status(task_id)
+
+
+# Largest page of /api/puzzles
+PUZZLE_QUERY_MAX_LIMIT = 500
+
+
+@app.get("/api/puzzles", response_model=PuzzleQueryResponse)
+async def query_puzzles(
+    db_id: str,
+    eco: Optional[List[str]] = Query(None),
+    difficulty: Optional[List[str]] = Query(None),
+    color: Optional[str] = None,
+    username: Optional[str] = None,
+    puzzle_type: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    offset: int = 0,
+    limit: int = 50
+):
+    """
+    Query the puzzles generated from a database, newest games first.
+
+    Every puzzle ever generated is kept with its database, so serving a puzzle
+    set is an index lookup. Puzzles reference their game by game_id, see
+    /api/games/{game_id} for the PGN.
+
+    Args:
+        db_id: Database ID to query
+        eco: Opening ECO codes (repeat the parameter for several)
+        difficulty: Difficulties, "easy", "medium" or "hard" (repeat the parameter for several)
+        color: Color of the player to move, "white" or "black"
+        username: Player to move (case-insensitive)
+        puzzle_type: "mistake" or "tactical"
+        from_date: Only puzzles from games played on or after this date
+        to_date: Only puzzles from games played on or before this date
+        offset: Matching puzzles to skip
+        limit: Puzzles per page (at most PUZZLE_QUERY_MAX_LIMIT)
+    """
+    logger.debug(
+        f"Puzzle query for database {db_id} - eco: {eco}, difficulty: {difficulty}, color: {color}, "
+        f"username: {username}, type: {puzzle_type}, from: {from_date}, to: {to_date}, offset: {offset}, limit: {limit}"
+    )
+
+    # Validate database exists
+    if db_id not in db_manager.metadata:
+        raise HTTPException(status_code=400, detail=f"Database {db_id} not found")
+    if offset < 0 or not 0 < limit <= PUZZLE_QUERY_MAX_LIMIT:
+        raise HTTPException(
+            status_code=400, detail=f"offset must be >= 0 and limit between 1 and {PUZZLE_QUERY_MAX_LIMIT}"
+        )
+
+    store = db_manager.get_database(db_id).puzzle_store()
+    total, puzzles = store.query(
+        filters={
+            "opening_eco": eco,
+            "difficulty": difficulty,
+            "player_color": [color] if color else None,
+            "player": [username] if username else None,
+            "puzzle_type": [puzzle_type] if puzzle_type else None
+        },
+        from_date=from_date,
+        to_date=to_date,
+        offset=offset,
+        limit=limit
+    )
+    logger.info(f"Puzzle query for database {db_id} matched {total} puzzles")
+
+    return PuzzleQueryResponse(
+        total=total,
+        offset=offset,
+        limit=limit,
+        puzzles=[PuzzleCandidate(**puzzle) for puzzle in puzzles]
+    )
+
+
 def classify_time_control(time_control_str: str) -> str:
     """
     Classify a time control string into bullet/blitz/rapid/classical/correspondence.
@@ -774,6 +1299,11 @@ def classify_time_control(time_control_str: str) -> str:
         return "blitz"
 
 
+# Explorer search depth, and how many of the position's best lines one search returns
+EXPLORER_DEPTH = 18
+EXPLORER_MAX_MULTIPV = 5
+
+
 def find_continuations(
     storage,
     board: chess.Board,
@@ -792,89 +1322,59 @@ def find_continuations(
         storage: GameStorage instance for the database
     """
     continuations = {}
+    player_color = color.lower()
 
-    # Get all games (optionally filtered by date)
-    if from_date or to_date:
-        all_games = storage.filter_games(from_date, to_date)
-    else:
-        all_games = storage.get_all_games()
-
-    # Filter by color (only include games where user played the specified color)
-    if usernames:
-        # Normalize usernames to lowercase for case-insensitive matching
-        usernames_lower = [u.lower() for u in usernames]
-        filtered_games = []
-        for g in all_games:
-            if color.lower() == "white":
-                # User played white - check if white_player matches any username
-                if g.white_player.lower() in usernames_lower:
-                    filtered_games.append(g)
-            else:
-                # User played black - check if black_player matches any username
-                if g.black_player.lower() in usernames_lower:
-                    filtered_games.append(g)
-        all_games = filtered_games
-
-    # Filter by time control (classify based on time in seconds)
-    if time_control and len(time_control) > 0:
-        # Normalize time controls to lowercase
-        time_controls_lower = [tc.lower() for tc in time_control]
-        filtered_games = []
-        for g in all_games:
-            if classify_time_control(g.time_control) in time_controls_lower:
-                filtered_games.append(g)
-        all_games = filtered_games
-
-    for game in all_games:
+    # Normalize usernames and time controls to lowercase for case-insensitive matching
+    usernames_lower = {u.lower() for u in usernames} if usernames else None
+    time_controls_lower = {tc.lower() for tc in time_control} if time_control else None
+
+    # Look up every game that reached this position in the position index
+    for game, ply, next_move_uci in storage.find_position(board):
         try:
-            # Parse game PGN
-            pgn_io = io.StringIO(game.pgn)
-            pgn_game = chess.pgn.read_game(pgn_io)
-            if not pgn_game:
+            # Filter by date
+            if from_date and game.date < from_date:
+                continue
+            if to_date and game.date > to_date:
                 continue
 
-            # Replay moves to find this position
-            temp_board = chess.Board()
-            found_position = False
-            next_move = None
+            # Filter by color (only include games where user played the specified color)
+            if usernames_lower:
+                player = game.white_player if player_color == "white" else game.black_player
+                if player.lower() not in usernames_lower:
+                    continue
 
-            for move in pgn_game.mainline_moves():
-                if temp_board.fen().split()[0] == board.fen().split()[0]:  # Compare position only (not turn, etc.)
-                    found_position = True
-                    next_move = move
-                    break
-                temp_board.push(move)
-
-            if found_position and next_move:
-                move_san = board.san(next_move)
-
-                if move_san not in continuations:
-                    continuations[move_san] = {
-                        "move": move_san,
-                        "count": 0,
-                        "wins": 0,
-                        "draws": 0,
-                        "losses": 0
-                    }
-
-                continuations[move_san]["count"] += 1
-
-                # Determine result from player's perspective
-                player_color = color.lower()
-                if player_color == "white":
-                    if game.result == "1-0":
-                        continuations[move_san]["wins"] += 1
-                    elif game.result == "0-1":
-                        continuations[move_san]["losses"] += 1
-                    else:
-                        continuations[move_san]["draws"] += 1
-                else:  # black
-                    if game.result == "0-1":
-                        continuations[move_san]["wins"] += 1
-                    elif game.result == "1-0":
-                        continuations[move_san]["losses"] += 1
-                    else:
-                        continuations[move_san]["draws"] += 1
+            # Filter by time control (classify based on time in seconds)
+            if time_controls_lower and classify_time_control(game.time_control) not in time_controls_lower:
+                continue
+
+            move_san = board.san(chess.Move.from_uci(next_move_uci))
+
+            if move_san not in continuations:
+                continuations[move_san] = {
+                    "move": move_san,
+                    "count": 0,
+                    "wins": 0,
+                    "draws": 0,
+                    "losses": 0
+                }
+
+            continuations[move_san]["count"] += 1
+
+            # Determine result from player's perspective
+            if player_color == "white":
+                if game.result == "1-0":
+                    continuations[move_san]["wins"] += 1
+                elif game.result == "0-1":
+                    continuations[move_san]["losses"] += 1
+                else:
+                    continuations[move_san]["draws"] += 1
+            else:  # black
+                if game.result == "0-1":
+                    continuations[move_san]["wins"] += 1
+                elif game.result == "1-0":
+                    continuations[move_san]["losses"] += 1
+                else:
+                    continuations[move_san]["draws"] += 1
 
         except Exception as e:
             continue
@@ -887,18 +1387,6 @@ def find_continuations(
         move_data["draw_pct"] = round((move_data["draws"] / total) * 100, 1) if total > 0 else 0
         move_data["loss_pct"] = round((move_data["losses"] / total) * 100, 1) if total > 0 else 0
 
-        # Add Stockfish eval for this move
-        try:
-            temp_board = board.copy()
-            move = temp_board.parse_san(move_data["move"])
-            temp_board.push(move)
-            move_eval = stockfish.analyze_position(temp_board.fen(), depth=15)
-            move_data["stockfish_eval"] = move_eval.get("score", "0.00")
-            move_data["stockfish_eval_cp"] = move_eval.get("score_cp", 0)
-        except:
-            move_data["stockfish_eval"] = "N/A"
-            move_data["stockfish_eval_cp"] = 0
-
         result.append(move_data)
 
     # Sort by count (most played first)
@@ -907,6 +1395,361 @@ def find_continuations(
     return result
 
 
+async def analyze_explorer_position(
+    board: chess.Board,
+    fen: str,
+    continuations: List[Dict],
+    max_latency: Optional[float] = None
+) -> Dict:
+    """
+    Evaluate a position and its database continuations with as few searches as possible.
+
+    One multipv search on the position gives its own evaluation and the scores
+    of its best moves. Database moves outside those lines get a single extra
+    search restricted to them.
+
+    Args:
+        board: Position to analyze
+        fen: FEN of the position
+        continuations: Result of find_continuations, updated in place with stockfish_eval(_cp)
+        max_latency: Ceiling in seconds for both searches, a third of it is kept for the second one
+
+    Returns:
+        Analysis of the position, with every line under "variations" when more than one was searched
+    """
+    moves = {}
+    for move_data in continuations:
+        move_data["stockfish_eval"] = "N/A"
+        move_data["stockfish_eval_cp"] = 0
+        try:
+            moves[board.parse_san(move_data["move"]).uci()] = move_data
+        except ValueError:
+            continue
+
+    deadline = time.perf_counter() + max_latency if max_latency else None
+    multipv = max(1, min(len(moves), EXPLORER_MAX_MULTIPV))
+    position_eval = await engine_pool.analyze_position_async(
+        fen,
+        depth=EXPLORER_DEPTH,
+        multipv=multipv,
+        max_latency=max_latency * 2 / 3 if max_latency and moves else max_latency,
+        priority=Priority.EXPLORER
+    )
+    lines = {line["best_move"]: line for line in position_eval.get("variations") or [position_eval]}
+
+    missing = [move for move in moves if move not in lines]
+    if missing:
+        targeted = await engine_pool.analyze_position_async(
+            fen,
+            depth=EXPLORER_DEPTH,
+            multipv=len(missing),
+            root_moves=missing,
+            max_latency=max(deadline - time.perf_counter(), 0.05) if deadline else None,
+            priority=Priority.EXPLORER
+        )
+        for line in targeted.get("variations") or [targeted]:
+            lines.setdefault(line["best_move"], line)
+
+    for move, move_data in moves.items():
+        line = lines.get(move)
+        if line is not None:
+            move_data["stockfish_eval"] = line["score"]
+            move_data["stockfish_eval_cp"] = line["score_cp"]
+
+    return position_eval
+
+
+# Limit puzzles per game for better variety
+MAX_PUZZLES_PER_GAME = 2
+# Positions sampled per game
+POSITIONS_PER_GAME = 5
+# Games scanned at once (0 = as many as background jobs may use engines)
+PUZZLE_WORKERS = int(os.environ.get("CHESS_PUZZLE_WORKERS", "0"))
+
+
+def puzzle_search(fen: str, depth: int) -> Dict:
+    """
+    Deep search of a puzzle position.
+
+    Raises:
+        RuntimeError: If the engine failed on the position
+    """
+    result = engine_pool.analyze_position(fen, depth=depth, priority=Priority.BACKGROUND)
+    if "error" in result:
+        raise RuntimeError(f"Analysis of {fen} failed: {result['error']}")
+    return result
+
+
+def evaluate_puzzle_position(board: chess.Board, move: chess.Move, screening: Dict) -> Dict:
+    """
+    Search a position before the move, after the best move and after the played move.
+
+    A shallow search of the position and of the played move comes first: unless
+    the position has material to win (a tactical opportunity), the deep searches
+    only run if the played move already loses PUZZLE_GATE_CP at that depth. A
+    failed shallow search doesn't gate the position.
+
+    Args:
+        board: Position where the user was to move
+        move: Move the user played
+        screening: Static features of the position (see puzzles.screen_position)
+
+    Returns:
+        Ledger entry: best_move (None if the position has no move or didn't pass the gate,
+        then "gated" is True), principal_variation and position_eval_cp / best_move_eval_cp /
+        played_move_eval_cp from the mover's perspective
+
+    Raises:
+        RuntimeError: If a deep search failed (nothing is to be recorded for the position then)
+    """
+    evaluation = {
+        "best_move": None,
+        "principal_variation": [],
+        "position_eval_cp": None,
+        "best_move_eval_cp": None,
+        "played_move_eval_cp": None
+    }
+
+    played_board = board.copy()
+    played_board.push(move)
+    if PUZZLE_GATE_DEPTH and screening["hanging"] < PUZZLE_MIN_SWING_CP:
+        # Only successful shallow searches can rule a position out, after a failed
+        # one the deep searches decide
+        shallow = engine_pool.analyze_position(board.fen(), depth=PUZZLE_GATE_DEPTH, priority=Priority.BACKGROUND)
+        if shallow and "error" not in shallow:
+            if shallow['best_move'] in ('none', move.uci()):
+                evaluation["gated"] = True
+                return evaluation
+            shallow_played = engine_pool.analyze_position(
+                played_board.fen(), depth=PUZZLE_GATE_DEPTH, priority=Priority.BACKGROUND
+            )
+            if shallow_played and "error" not in shallow_played \
+                    and shallow['score_cp'] + shallow_played['score_cp'] < PUZZLE_GATE_CP:
+                evaluation["gated"] = True
+                return evaluation
+
+    # Analyze position BEFORE the move
+    position_analysis = puzzle_search(board.fen(), depth=18)
+    if not position_analysis or position_analysis['best_move'] == 'none':
+        return evaluation
+
+    best_move_uci = position_analysis['best_move']
+    evaluation["best_move"] = best_move_uci
+    evaluation["principal_variation"] = position_analysis.get('principal_variation', [best_move_uci])
+    evaluation["position_eval_cp"] = position_analysis['score_cp']
+
+    # Analyze position AFTER best move
+    temp_board = board.copy()
+    try:
+        temp_board.push(chess.Move.from_uci(best_move_uci))
+    except ValueError:
+        return evaluation
+    best_move_analysis = puzzle_search(temp_board.fen(), depth=15)
+    evaluation["best_move_eval_cp"] = -best_move_analysis['score_cp']  # Flip perspective
+
+    # Analyze position AFTER played move
+    played_move_analysis = puzzle_search(played_board.fen(), depth=15)
+    evaluation["played_move_eval_cp"] = -played_move_analysis['score_cp']  # Flip perspective
+
+    return evaluation
+
+
+def puzzle_from_evaluation(
+    game,
+    board: chess.Board,
+    ply: int,
+    move: chess.Move,
+    evaluation: Dict,
+    player_color: str,
+    opponent: str,
+    opening_info: Dict
+) -> Optional[PuzzleCandidate]:
+    """
+    Turn the ledger entry of a position into a puzzle, if it is one.
+
+    Returns:
+        PuzzleCandidate of any difficulty, or None if the position is not a puzzle
+    """
+    best_move_uci = evaluation["best_move"]
+    if best_move_uci is None or evaluation["played_move_eval_cp"] is None:
+        return None
+
+    position_eval_cp = evaluation["position_eval_cp"]
+    best_move_eval_cp = evaluation["best_move_eval_cp"]
+    played_move_eval_cp = evaluation["played_move_eval_cp"]
+    played_move_uci = move.uci()
+
+    classification = classify_puzzle(
+        best_move_uci, played_move_uci, position_eval_cp, best_move_eval_cp, played_move_eval_cp
+    )
+    if classification is None:
+        return None
+    puzzle_type, eval_loss, difficulty = classification
+
+    # Convert UCI to SAN
+    try:
+        best_move_san = board.san(chess.Move.from_uci(best_move_uci))
+        played_move_san = board.san(move) if puzzle_type == "mistake" else None
+    except:
+        return None
+
+    return PuzzleCandidate(
+        puzzle_id=str(uuid.uuid4()),
+        game_id=game.game_id,
+        fen=board.fen(),
+        move_number=(ply // 2) + 1,
+        ply=ply,
+        best_move=best_move_uci,
+        best_move_san=best_move_san,
+        principal_variation=evaluation["principal_variation"],
+        played_move=played_move_uci if puzzle_type == "mistake" else None,
+        played_move_san=played_move_san,
+        position_eval_cp=position_eval_cp,
+        best_move_eval_cp=best_move_eval_cp,
+        played_move_eval_cp=played_move_eval_cp if puzzle_type == "mistake" else None,
+        eval_loss_cp=eval_loss,
+        difficulty=difficulty,
+        puzzle_type=puzzle_type,
+        opening_name=opening_info['name'],
+        opening_eco=opening_info['eco'],
+        player_color=player_color,
+        player=game.white_player if player_color == "white" else game.black_player,
+        opponent=opponent,
+        date=game.date,
+        platform=game.platform
+    )
+
+
+def find_puzzles_in_game(
+    game,
+    username: str,
+    store: PuzzleStore,
+    difficulty_filter: Optional[List[str]] = None,
+    min_ply: int = 0,
+    max_ply: int = 20,
+    stop: Optional[threading.Event] = None
+) -> List[PuzzleCandidate]:
+    """
+    Look for puzzles in one game: the unit of work of puzzle generation.
+
+    Covers up to POSITIONS_PER_GAME positions where the user was to move,
+    each analyzed before the move, after the best move and after the played
+    move. Positions already in the store's ledger are reused without searching,
+    so only new positions are sampled and searched; their evaluations and any
+    puzzle found, whatever its difficulty, are added to the store. Runs in a
+    worker thread, each search leasing an engine.
+
+    Args:
+        game: Game the user played in
+        username: Username to find puzzles for (case-insensitive)
+        store: Puzzle store of the game's database
+        difficulty_filter: List of difficulties to include (["easy", "medium", "hard"])
+        min_ply: Only analyze positions from ply >= min_ply
+        max_ply: Only analyze positions up to ply < max_ply
+        stop: Set when enough puzzles were found, the remaining positions are skipped
+
+    Returns:
+        Up to MAX_PUZZLES_PER_GAME puzzles
+    """
+    import random
+
+    puzzles = []
+
+    # Determine player color and opponent
+    if game.white_player.lower() == username.lower():
+        player_color = "white"
+        opponent = game.black_player
+    else:
+        player_color = "black"
+        opponent = game.white_player
+
+    # Parse PGN and replay game
+    pgn_io = io.StringIO(game.pgn)
+    chess_game = chess.pgn.read_game(pgn_io)
+    if not chess_game:
+        return puzzles
+
+    # Get opening info from the game's moves
+    opening_info = detect_opening(game.moves)
+
+    # Collect all moves and identify which ones are user's turn within ply range
+    all_moves = list(chess_game.mainline_moves())
+    analyzed = store.analyzed(game.game_id)
+    known_positions = []  # (ply, move) of user's turns analyzed by earlier runs
+    new_positions = []  # (ply, move) of the other user's turns
+    screening = {}  # Static features of the new positions by ply
+
+    temp_board = chess_game.board()
+    for ply, move in enumerate(all_moves):
+        # Check if within ply range
+        if min_ply <= ply < max_ply:
+            # Check if it's user's turn
+            is_user_turn = (temp_board.turn == chess.WHITE and player_color == "white") or \
+                          (temp_board.turn == chess.BLACK and player_color == "black")
+            if is_user_turn and ply in analyzed:
+                known_positions.append((ply, move))
+            elif is_user_turn:
+                screening[ply] = screen_position(temp_board, move, all_moves[ply + 1:ply + 1 + SWING_PLIES])
+                new_positions.append((ply, move))
+        temp_board.push(move)
+
+    # Positions analyzed by earlier runs count towards the sample, the new ones
+    # that look most like puzzles make up the rest. Quiet positions are never searched.
+    random.shuffle(new_positions)
+    new_positions.sort(key=lambda position: screening[position[0]]["score"], reverse=True)
+    new_positions = [
+        (ply, move) for ply, move in new_positions if screening[ply]["score"] >= PUZZLE_PREFILTER_MIN_SCORE
+    ]
+    wanted = POSITIONS_PER_GAME - len(known_positions)
+    sampled_positions = known_positions + new_positions[:max(wanted, 0)]
+
+    try:
+        for ply, move in sampled_positions:
+            # Stop if we've found enough puzzles in this game, or overall
+            if len(puzzles) >= MAX_PUZZLES_PER_GAME or (stop is not None and stop.is_set()):
+                break
+
+            # Replay game up to this position
+            board = chess_game.board()
+            for m in all_moves[:ply]:
+                board.push(m)
+
+            evaluation = analyzed.get(ply)
+            if evaluation is None:
+                try:
+                    evaluation = evaluate_puzzle_position(board, move, screening[ply])
+                except RuntimeError as e:
+                    # Not recorded, so a later run searches the position again
+                    logger.warning(f"Skipping puzzle position of game {game.game_id}: {e}")
+                    continue
+                store.record_analysis(game.game_id, ply, evaluation)
+
+            stored = store.get_puzzle(game.game_id, ply)
+            if stored is not None:
+                puzzle = PuzzleCandidate(**stored)
+            else:
+                puzzle = puzzle_from_evaluation(
+                    game, board, ply, move, evaluation, player_color, opponent, opening_info
+                )
+                if puzzle is None:
+                    continue
+                store.add_puzzle(jsonable_encoder(puzzle))
+                logger.logger.debug(
+                    f"Found {puzzle.puzzle_type} puzzle: {opening_info['name']} "
+                    f"move {puzzle.move_number}, eval loss: {puzzle.eval_loss_cp}cp, difficulty: {puzzle.difficulty}"
+                )
+
+            # Apply difficulty filter
+            if difficulty_filter and puzzle.difficulty not in difficulty_filter:
+                continue
+
+            puzzles.append(puzzle)
+    finally:
+        store.flush()
+
+    return puzzles
+
+
 def generate_puzzles_from_games(
     storage,
     username: str,
@@ -914,7 +1757,9 @@ def generate_puzzles_from_games(
     difficulty_filter: Optional[List[str]] = None,
     min_ply: int = 0,
     max_ply: int = 20,
-    progress_callback = None
+    progress_callback = None,
+    puzzle_callback = None,
+    stop: Optional[threading.Event] = None
 ) -> List[PuzzleCandidate]:
     """
     Scan games and identify puzzle candidates.
@@ -928,6 +1773,12 @@ def generate_puzzles_from_games(
        - If eval loss > 100cp OR position has tactical opportunity, create puzzle
     4. Classify difficulty and randomize order before returning
 
+    Games are scanned in parallel (see find_puzzles_in_game), CHESS_PUZZLE_WORKERS
+    at a time, and their puzzles merged as each game completes. Scanning stops
+    once max_puzzles were found. Positions analyzed and puzzles found are kept
+    in the database's puzzle store, so running again only searches games and
+    positions not seen before.
+
     Args:
         storage: GameStorage instance
         username: Username to find puzzles for
@@ -935,6 +1786,12 @@ def generate_puzzles_from_games(
         difficulty_filter: List of difficulties to include (["easy", "medium", "hard"])
         min_ply: Only analyze positions from ply >= min_ply (default 0)
         max_ply: Only analyze positions up to ply <= max_ply (default 20)
+        progress_callback: Called with (progress %, games scanned, total games,
+            puzzles found) as games complete, from the calling thread
+        puzzle_callback: Called with each puzzle as soon as its game is scanned,
+            in the order found, from the calling thread
+        stop: Set to stop scanning early, e.g. once the client has enough puzzles;
+            the puzzles found so far are returned
 
     Returns:
         List of PuzzleCandidate objects (randomized order)
@@ -958,190 +1815,59 @@ def generate_puzzles_from_games(
     ]
     total_user_games = len(user_games)
 
-    # Limit puzzles per game for better variety
-    MAX_PUZZLES_PER_GAME = 2
-
-    logger.logger.info(f"Generating puzzles for {username} from {total_user_games} games")
-
-    for game_idx, game in enumerate(user_games):
-        # Determine player color and opponent
-        if game.white_player.lower() == username_lower:
-            player_color = "white"
-            opponent = game.black_player
-        else:
-            player_color = "black"
-            opponent = game.white_player
-
-        games_analyzed += 1
-
-        # Report progress
-        if progress_callback and total_user_games > 0:
-            progress_pct = int((game_idx / total_user_games) * 100)
-            progress_callback(progress_pct, game_idx, total_user_games, len(puzzles))
-
-        # Parse PGN and replay game
-        try:
-            pgn_io = io.StringIO(game.pgn)
-            chess_game = chess.pgn.read_game(pgn_io)
-            if not chess_game:
-                continue
-
-            board = chess_game.board()
-
-            # Get opening info from the game's moves
-            opening_info = detect_opening(game.moves)
-
-            # Collect all moves and identify which ones are user's turn within ply range
-            all_moves = list(chess_game.mainline_moves())
-            user_positions = []  # List of (ply, move) tuples where it's user's turn
-
-            temp_board = chess_game.board()
-            for ply, move in enumerate(all_moves):
-                # Check if within ply range
-                if min_ply <= ply < max_ply:
-                    # Check if it's user's turn
-                    is_user_turn = (temp_board.turn == chess.WHITE and player_color == "white") or \
-                                  (temp_board.turn == chess.BLACK and player_color == "black")
-                    if is_user_turn:
-                        user_positions.append((ply, move))
-                temp_board.push(move)
-
-            # Randomly sample positions to analyze (max 5 per game to avoid analyzing every position)
-            if len(user_positions) > 5:
-                sampled_positions = random.sample(user_positions, 5)
-            else:
-                sampled_positions = user_positions
-
-            # Track puzzles found in this game
-            puzzles_this_game = 0
-
-            # Analyze sampled positions
-            for ply, move in sampled_positions:
-                # Stop if we've found enough puzzles in this game
-                if puzzles_this_game >= MAX_PUZZLES_PER_GAME:
-                    break
-
-                # Replay game up to this position
-                board = chess_game.board()
-                for i, m in enumerate(all_moves):
-                    if i >= ply:
-                        break
-                    board.push(m)
-
-                # Analyze position BEFORE the move
-                fen = board.fen()
-                position_analysis = stockfish.analyze_position(fen, depth=18)
-
-                if not position_analysis or position_analysis['best_move'] == 'none':
-                    continue
-
-                best_move_uci = position_analysis['best_move']
-                position_eval_cp = position_analysis['score_cp']
-
-                # Analyze position AFTER best move
-                temp_board = board.copy()
+    store = storage.puzzle_store()
+    workers = PUZZLE_WORKERS or engine_pool.limits[Priority.BACKGROUND]
+    logger.logger.info(f"Generating puzzles for {username} from {total_user_games} games, {workers} at a time")
+
+    stop = stop or threading.Event()
+    games = iter(user_games)
+    running = {}  # Future -> game ID
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="puzzles") as executor:
+        def submit_next() -> bool:
+            game = next(games, None)
+            if game is None:
+                return False
+            future = executor.submit(
+                find_puzzles_in_game, game, username, store, difficulty_filter, min_ply, max_ply, stop
+            )
+            running[future] = game.game_id
+            return True
+
+        # Only a few games are queued ahead, so an early stop doesn't leave many to cancel
+        while len(running) < workers * 2 and submit_next():
+            pass
+
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                game_id = running.pop(future)
+                games_analyzed += 1
                 try:
-                    best_move_obj = chess.Move.from_uci(best_move_uci)
-                    temp_board.push(best_move_obj)
-                    best_move_analysis = stockfish.analyze_position(temp_board.fen(), depth=15)
-                    best_move_eval_cp = -best_move_analysis['score_cp']  # Flip perspective
-                except:
-                    continue
-
-                # Analyze position AFTER played move
-                played_move_uci = move.uci()
-                temp_board2 = board.copy()
-                temp_board2.push(move)
-                played_move_analysis = stockfish.analyze_position(temp_board2.fen(), depth=15)
-                played_move_eval_cp = -played_move_analysis['score_cp']  # Flip perspective
-
-                # Calculate eval loss (from player's perspective)
-                eval_loss = position_eval_cp - played_move_eval_cp
-
-                # Determine if this is a puzzle candidate
-                puzzle_type = None
-
-                # Type A: Mistake (played move significantly worse than best move)
-                if played_move_uci != best_move_uci and eval_loss >= 100:
-                    puzzle_type = "mistake"
-
-                # Type B: Tactical opportunity (best move gives significant advantage)
-                # Only if the best move improves position by at least 100cp
-                elif (position_eval_cp - best_move_eval_cp) >= 100:
-                    puzzle_type = "tactical"
-                    eval_loss = 0  # No loss, it's a tactical opportunity
-
-                if puzzle_type:
-                    # Classify difficulty
-                    if eval_loss < 100:
-                        difficulty = "easy"  # Tactical opportunities
-                    elif eval_loss < 300:
-                        difficulty = "easy"
-                    elif eval_loss < 600:
-                        difficulty = "medium"
-                    else:
-                        difficulty = "hard"
-
-                    # Apply difficulty filter
-                    if difficulty_filter and difficulty not in difficulty_filter:
-                        continue
-
-                    # Convert UCI to SAN
-                    try:
-                        best_move_san = board.san(best_move_obj)
-                        played_move_san = board.san(move) if puzzle_type == "mistake" else None
-                    except:
-                        continue
-
-                    # Create puzzle
-                    puzzle = PuzzleCandidate(
-                        puzzle_id=str(uuid.uuid4()),
-                        game_id=game.game_id,
-                        fen=fen,
-                        move_number=(ply // 2) + 1,
-                        ply=ply,
-                        best_move=best_move_uci,
-                        best_move_san=best_move_san,
-                        principal_variation=position_analysis.get('principal_variation', [best_move_uci]),
-                        played_move=played_move_uci if puzzle_type == "mistake" else None,
-                        played_move_san=played_move_san,
-                        position_eval_cp=position_eval_cp,
-                        best_move_eval_cp=best_move_eval_cp,
-                        played_move_eval_cp=played_move_eval_cp if puzzle_type == "mistake" else None,
-                        eval_loss_cp=eval_loss,
-                        difficulty=difficulty,
-                        puzzle_type=puzzle_type,
-                        opening_name=opening_info['name'],
-                        opening_eco=opening_info['eco'],
-                        player_color=player_color,
-                        opponent=opponent,
-                        date=game.date,
-                        platform=game.platform,
-                        pgn=game.pgn
-                    )
-
-                    puzzles.append(puzzle)
-                    puzzles_this_game += 1
-
-                    logger.logger.debug(
-                        f"Found {puzzle_type} puzzle: {opening_info['name']} "
-                        f"move {puzzle.move_number}, eval loss: {eval_loss}cp, difficulty: {difficulty}"
-                    )
-
-                    # Stop if we've found enough puzzles overall
-                    if len(puzzles) >= max_puzzles:
-                        break
-
-            # Stop scanning games if we have enough puzzles
-            if len(puzzles) >= max_puzzles:
+                    # Games scanned in parallel may overshoot the limit
+                    for puzzle in future.result()[:max(max_puzzles - len(puzzles), 0)]:
+                        puzzles.append(puzzle)
+                        if puzzle_callback:
+                            puzzle_callback(puzzle)
+                except Exception as e:
+                    logger.logger.error(f"Error analyzing game {game_id}: {e}")
+
+                # Report progress
+                if progress_callback and total_user_games > 0:
+                    progress_pct = int((games_analyzed / total_user_games) * 100)
+                    progress_callback(progress_pct, games_analyzed, total_user_games, len(puzzles))
+
+            # Stop scanning games if we have enough puzzles, or were asked to
+            if len(puzzles) >= max_puzzles or stop.is_set():
+                stop.set()
+                for future in running:
+                    future.cancel()
                 break
-
-        except Exception as e:
-            logger.logger.error(f"Error analyzing game {game.game_id}: {e}")
-            continue
+            while len(running) < workers * 2 and submit_next():
+                pass
 
     logger.logger.info(
-        f"Puzzle generation complete: {len(puzzles)} puzzles found from {games_analyzed} games"
+        f"Puzzle generation complete: {len(puzzles)} puzzles found from {games_analyzed} games "
+        f"(puzzle store: {store.stats()})"
     )
 
     # Final shuffle to ensure maximum randomness
@@ -1161,46 +1887,153 @@ async def run_puzzle_generation_task(
 ):
     """Background task to generate puzzles with progress tracking."""
     logger.logger.info(f"Starting puzzle generation task {task_id} for user {username} in database {db_id}")
+    task = puzzle_tasks[task_id]
+    loop = asyncio.get_running_loop()
 
-    try:
-        # Get database storage
-        storage = db_manager.get_database(db_id)
-
-        def progress_callback(progress_pct, current_game, total_games, puzzles_found):
-            """Update task progress."""
-            puzzle_tasks[task_id].update({
-                "progress": min(progress_pct, 99),
-                "current_game": current_game,
-                "total_games": total_games,
-                "puzzles_found": puzzles_found
-            })
+    def notify():
+        """Wake up the task's streams, from any thread."""
+        loop.call_soon_threadsafe(notify_puzzle_streams, task)
 
-        # Generate puzzles
-        puzzles = generate_puzzles_from_games(
-            storage=storage,
-            username=username,
-            max_puzzles=max_puzzles,
-            difficulty_filter=difficulty_filter,
-            min_ply=min_ply,
-            max_ply=max_ply,
-            progress_callback=progress_callback
-        )
+    try:
+        # Keep the database open in the pool until the task is done
+        with db_manager.pin(db_id):
+            # Get database storage
+            storage = await get_loaded_database(db_id)
 
-        # Mark complete
-        puzzle_tasks[task_id].update({
-            "status": "completed",
-            "progress": 100,
-            "puzzles": puzzles
-        })
+            def progress_callback(progress_pct, current_game, total_games, puzzles_found):
+                """Update task progress."""
+                task.update({
+                    "progress": min(progress_pct, 99),
+                    "current_game": current_game,
+                    "total_games": total_games,
+                    "puzzles_found": puzzles_found
+                })
+                notify()
+
+            def puzzle_callback(puzzle):
+                task["found"].append(puzzle)
+                notify()
+
+            # Generate puzzles in a worker thread, which fans the games out to more threads,
+            # each search leasing one engine from the pool
+            puzzles = await asyncio.to_thread(
+                generate_puzzles_from_games,
+                storage=storage,
+                username=username,
+                max_puzzles=max_puzzles,
+                difficulty_filter=difficulty_filter,
+                min_ply=min_ply,
+                max_ply=max_ply,
+                progress_callback=progress_callback,
+                puzzle_callback=puzzle_callback,
+                stop=task["stop"]
+            )
+
+            # Mark complete
+            task.update({
+                "status": "completed",
+                "progress": 100,
+                "puzzles_found": len(puzzles),
+                "puzzles": puzzles
+            })
 
-        logger.logger.info(f"Puzzle generation task {task_id} completed: {len(puzzles)} puzzles found")
+            logger.logger.info(f"Puzzle generation task {task_id} completed: {len(puzzles)} puzzles found")
 
     except Exception as e:
         logger.logger.error(f"Puzzle generation task {task_id} failed: {e}")
-        puzzle_tasks[task_id].update({
+        task.update({
             "status": "failed",
             "error": str(e)
         })
+    finally:
+        notify_puzzle_streams(task)
+
+
+GAME_ANALYSIS_DEPTH = 18
+
+
+def game_positions(game: GameRecord) -> List[str]:
+    """FENs of a game's positions: before each move, and after the last one."""
+    board = chess.Board()
+    fens = [board.fen()]
+    for move in game.mainline():
+        board.push(move)
+        fens.append(board.fen())
+    return fens
+
+
+def evaluation_entry(analysis: Dict) -> tuple:
+    """Convert an engine result to a pack_analysis entry: (score_cp, mate, best_move)."""
+    score = analysis["score"]
+    mate = None
+    if score.startswith("M"):
+        # The score string drops the sign of mates, score_cp keeps it
+        mate = int(score[1:]) if analysis["score_cp"] > 0 else -int(score[1:])
+    return analysis["score_cp"], mate, analysis.get("best_move")
+
+
+async def analyze_game(storage: GameStorage, game: GameRecord, depth: int) -> int:
+    """
+    Evaluate every position of a game and store the result with it.
+
+    The positions go through one engine in game order, so it reuses its hash
+    from one move to the next.
+
+    Returns:
+        Number of positions analyzed
+
+    Raises:
+        RuntimeError: If the engine failed on a position
+    """
+    fens = game_positions(game)
+    results = await engine_pool.analyze_game_async(fens, depth=depth, game=game.game_id)
+    for fen, result in zip(fens, results):
+        if "error" in result:
+            raise RuntimeError(f"Analysis of {fen} failed: {result['error']}")
+    storage.set_analysis(game.game_id, pack_analysis(depth, [evaluation_entry(result) for result in results]))
+    return len(fens)
+
+
+async def run_game_analysis_task(task_id: str, db_id: str, game_ids: Optional[List[str]], depth: int):
+    """Background task analyzing games, as many at once as background jobs may use engines."""
+    logger.info(f"Starting game analysis task {task_id} in database {db_id} at depth {depth}")
+    task = game_analysis_tasks[task_id]
+
+    try:
+        with db_manager.pin(db_id):
+            storage = await get_loaded_database(db_id)
+            if game_ids is None:
+                games = storage.get_all_games()
+            else:
+                games = [game for game in map(storage.get_game, game_ids) if game is not None]
+            pending = [game for game in games if analysis_depth(game.packed_analysis) < depth]
+            task["total_games"] = len(games)
+            task["current_game"] = len(games) - len(pending)
+            logger.info(f"Analyzing {len(pending)} of {len(games)} games, the others are already analyzed")
+
+            slots = asyncio.Semaphore(engine_pool.limits[Priority.BACKGROUND])
+
+            async def run(game: GameRecord):
+                async with slots:
+                    try:
+                        positions = await analyze_game(storage, game, depth)
+                    except Exception as e:
+                        logger.error(f"Error analyzing game {game.game_id}: {e}")
+                        positions = 0
+                    else:
+                        task["games_analyzed"] += 1
+                        task["positions_analyzed"] += positions
+                    task["current_game"] += 1
+                    task["progress"] = min(99, task["current_game"] * 100 // max(1, task["total_games"]))
+
+            await asyncio.gather(*(run(game) for game in pending))
+
+        task.update({"status": "completed", "progress": 100})
+        logger.info(f"Game analysis task {task_id} completed: {task['games_analyzed']} games analyzed")
+
+    except Exception as e:
+        logger.error(f"Game analysis task {task_id} failed: {e}")
+        task.update({"status": "failed", "error": str(e)})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+"""
+Puzzle classification and static pre-screening.
+
+Deciding whether a position holds a puzzle takes three engine searches. The
+board features computed here (material swings, pieces left en prise, checks
+and captures available) take microseconds, so puzzle generation uses them to
+rank the positions of a game and only searches the most promising ones.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import chess
+
+
+PIECE_VALUES = {
+    chess.PAWN: 100,
+    chess.KNIGHT: 300,
+    chess.BISHOP: 300,
+    chess.ROOK: 500,
+    chess.QUEEN: 900,
+    chess.KING: 0,
+}
+# Eval loss of a mistake, or gain of a tactical opportunity, to make a puzzle
+PUZZLE_MIN_SWING_CP = 100
+# Plies of the game after the position over which material swings are measured
+SWING_PLIES = 4
+# Score of each check, and of each capture that doesn't lose material
+CHECK_SCORE = 20
+CAPTURE_SCORE = 10
+# Score a position needs to be searched at all
+PUZZLE_PREFILTER_MIN_SCORE = 50
+# Depth of the shallow searches run before the deep ones (0 = no gate): positions
+# where the played move loses less than PUZZLE_GATE_CP at that depth are skipped
+PUZZLE_GATE_DEPTH = 10
+PUZZLE_GATE_CP = 50
+
+
+def classify_puzzle(
+    best_move: str,
+    played_move: str,
+    position_eval_cp: int,
+    best_move_eval_cp: int,
+    played_move_eval_cp: int
+) -> Optional[Tuple[str, int, str]]:
+    """
+    Decide whether an analyzed position is a puzzle.
+
+    Args:
+        best_move: Engine's best move (UCI)
+        played_move: Move played in the game (UCI)
+        position_eval_cp: Eval of the position, from the mover's perspective
+        best_move_eval_cp: Eval after the best move, from the mover's perspective
+        played_move_eval_cp: Eval after the played move, from the mover's perspective
+
+    Returns:
+        (puzzle type, eval loss, difficulty), or None if the position is not a puzzle
+    """
+    eval_loss = position_eval_cp - played_move_eval_cp
+
+    # Type A: Mistake (played move significantly worse than best move)
+    if played_move != best_move and eval_loss >= PUZZLE_MIN_SWING_CP:
+        puzzle_type = "mistake"
+
+    # Type B: Tactical opportunity (best move gives significant advantage)
+    # Only if the best move improves position by at least 100cp
+    elif (position_eval_cp - best_move_eval_cp) >= PUZZLE_MIN_SWING_CP:
+        puzzle_type = "tactical"
+        eval_loss = 0  # No loss, it's a tactical opportunity
+
+    else:
+        return None
+
+    # Classify difficulty
+    if eval_loss < 300:
+        difficulty = "easy"
+    elif eval_loss < 600:
+        difficulty = "medium"
+    else:
+        difficulty = "hard"
+
+    return puzzle_type, eval_loss, difficulty
+
+
+def material(board: chess.Board, color: chess.Color) -> int:
+    """Material balance in centipawns from color's perspective."""
+    balance = 0
+    for piece_type, value in PIECE_VALUES.items():
+        balance += value * (len(board.pieces(piece_type, color)) - len(board.pieces(piece_type, not color)))
+    return balance
+
+
+def captured_value(board: chess.Board, move: chess.Move) -> int:
+    """Value of the piece a move captures (0 if it isn't a capture)."""
+    if board.is_en_passant(move):
+        return PIECE_VALUES[chess.PAWN]
+    piece_type = board.piece_type_at(move.to_square)
+    return PIECE_VALUES[piece_type] if piece_type else 0
+
+
+def see(board: chess.Board, move: chess.Move) -> int:
+    """
+    Static exchange evaluation of a capture.
+
+    Plays out the exchange on the target square, each side recapturing with its
+    least valuable piece and stopping when that would lose material. Captures are
+    legal moves, so pinned pieces don't take part and x-rayed pieces join in once
+    the piece in front of them has captured.
+
+    Returns:
+        Material won by the side making the capture, in centipawns (negative if it loses material)
+    """
+    target = move.to_square
+    gains = [captured_value(board, move)]
+    attacker_value = PIECE_VALUES[board.piece_type_at(move.from_square)]
+
+    exchange = board.copy(stack=False)
+    exchange.push(move)
+    while True:
+        recaptures = list(exchange.generate_legal_captures(to_mask=chess.BB_SQUARES[target]))
+        if not recaptures:
+            break
+        recapture = min(recaptures, key=lambda m: PIECE_VALUES[exchange.piece_type_at(m.from_square)])
+        gains.append(attacker_value - gains[-1])
+        attacker_value = PIECE_VALUES[exchange.piece_type_at(recapture.from_square)]
+        exchange.push(recapture)
+
+    # Either side may stop the exchange when recapturing loses
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def best_capture(board: chess.Board) -> int:
+    """Most material the side to move can win by a capture (0 if none wins any)."""
+    return max((see(board, move) for move in board.generate_legal_captures()), default=0)
+
+
+def screen_position(board: chess.Board, move: chess.Move, following: List[chess.Move]) -> Dict[str, int]:
+    """
+    Static features of a position hinting at a puzzle, from the mover's perspective.
+
+    Args:
+        board: Position before the move
+        move: Move played in the game
+        following: Moves played after it, of which the first SWING_PLIES are used
+
+    Returns:
+        Dict with:
+            hanging: material the mover could win by a capture (a missed tactic)
+            blunder: material the played move leaves en prise, net of what it captured
+            swing: largest material change over the next moves of the game, in either direction
+            checks / captures: checks and non-losing captures available to the mover
+            score: ranking score of the position, 0 for a quiet one
+    """
+    color = board.turn
+    hanging = best_capture(board)
+
+    checks = 0
+    captures = 0
+    for candidate in board.legal_moves:
+        if board.gives_check(candidate):
+            checks += 1
+        elif board.is_capture(candidate) and see(board, candidate) >= 0:
+            captures += 1
+
+    after = board.copy(stack=False)
+    after.push(move)
+    blunder = max(0, best_capture(after) - captured_value(board, move))
+
+    # Material after each exchange is complete, so even trades don't count
+    start = material(board, color)
+    swing = 0
+    for ply, next_move in enumerate(following[:SWING_PLIES], 2):
+        after.push(next_move)
+        if ply % 2 == 0:
+            swing = max(swing, abs(material(after, color) - start))
+
+    return {
+        "hanging": hanging,
+        "blunder": blunder,
+        "swing": swing,
+        "checks": checks,
+        "captures": captures,
+        "score": max(hanging, blunder, swing) + CHECK_SCORE * checks + CAPTURE_SCORE * captures,
+    }
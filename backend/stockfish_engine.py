@@ -3,22 +3,251 @@ Stockfish chess engine integration.
 Auto-detects platform and uses bundled Stockfish binary.
 """
 
+import asyncio
+import dbm
+import enum
+import json
 import os
 import platform
 import subprocess
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, List
 import chess
 import chess.engine
 import logger
 
 
+# Evaluation cache defaults, overridable through the environment (empty path = memory only)
+EVAL_CACHE_SIZE = int(os.environ.get("CHESS_EVAL_CACHE_SIZE", "100000"))
+EVAL_CACHE_PATH = os.environ.get("CHESS_EVAL_CACHE_PATH", str(Path(__file__).parent / "data" / "eval_cache"))
+EVAL_CACHE_SYNC_EVERY = 1000  # Disk writes between index syncs
+
+
+class EvaluationCache:
+    """
+    Two-tier cache of analysis results.
+
+    Results are keyed by the position's EPD (FEN without move counters) and
+    the number of variations. A result searched at least as deep as the
+    request satisfies it. Recent results are kept in an in-memory LRU, all
+    of them in a dbm file that survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            path: dbm file for the disk tier. Defaults to CHESS_EVAL_CACHE_PATH,
+                an empty string keeps the cache in memory only.
+            max_entries: Size of the in-memory tier. Defaults to CHESS_EVAL_CACHE_SIZE.
+        """
+        self.path = EVAL_CACHE_PATH if path is None else path
+        self.max_entries = EVAL_CACHE_SIZE if max_entries is None else max_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._disk = None
+        self._disk_entries = 0
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.path:
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                self._disk = dbm.open(self.path, 'c')
+                self._disk_entries = len(self._disk)
+                logger.info(f"Opened evaluation cache {self.path} with {self._disk_entries} positions")
+            except Exception as e:
+                logger.warning(f"Could not open evaluation cache {self.path}, keeping it in memory only: {e}")
+                self._disk = None
+
+    @staticmethod
+    def key(board: chess.Board, multipv: int = 1, root_moves: Optional[List[str]] = None) -> str:
+        """Cache key of a position: EPD (no move counters), number of variations and searched moves."""
+        key = f"{board.epd()}|{multipv}"
+        if root_moves:
+            key += "|" + ",".join(sorted(root_moves))
+        return key
+
+    def get(
+        self,
+        board: chess.Board,
+        depth: int,
+        multipv: int = 1,
+        count_miss: bool = True,
+        root_moves: Optional[List[str]] = None
+    ) -> Optional[Dict]:
+        """
+        Look up a result searched to at least `depth`.
+
+        Args:
+            count_miss: Count a miss in the statistics. A caller that checks the
+                cache and then looks again right before searching passes False
+                the first time, so each request counts once.
+
+        Returns:
+            Copy of the cached result, or None
+        """
+        key = self.key(board, multipv, root_moves)
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None and result["depth"] >= depth:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return dict(result)
+
+            if self._disk is not None:
+                try:
+                    stored = self._disk.get(key)
+                except Exception as e:
+                    logger.warning(f"Evaluation cache read failed: {e}")
+                    stored = None
+                if stored is not None:
+                    result = json.loads(stored)
+                    if result["depth"] >= depth:
+                        self._remember(key, result)
+                        self.disk_hits += 1
+                        return dict(result)
+
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def put(self, board: chess.Board, multipv: int, result: Dict, root_moves: Optional[List[str]] = None):
+        """Store a result unless a deeper one for the same position is already cached."""
+        key = self.key(board, multipv, root_moves)
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and cached["depth"] > result["depth"]:
+                return
+            self._remember(key, result)
+
+            if self._disk is not None:
+                try:
+                    stored = self._disk.get(key)
+                    if stored is None:
+                        self._disk_entries += 1
+                    elif json.loads(stored)["depth"] > result["depth"]:
+                        return
+                    self._disk[key] = json.dumps(result)
+                    self._unsynced += 1
+                    if self._unsynced >= EVAL_CACHE_SYNC_EVERY:
+                        self._sync()
+                except Exception as e:
+                    logger.warning(f"Evaluation cache write failed: {e}")
+
+    def _remember(self, key: str, result: Dict):
+        """Insert into the memory tier, evicting the least recently used entry (caller holds the lock)."""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _sync(self):
+        if hasattr(self._disk, "sync"):
+            self._disk.sync()
+        self._unsynced = 0
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with entry counts per tier, hit/miss/eviction counters and hit rate (0-100)
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.max_entries,
+                "disk_entries": self._disk_entries,
+                "disk_path": self.path if self._disk is not None else None,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(hits / lookups * 100, 1) if lookups else 0.0
+            }
+
+    def close(self):
+        """Write the disk tier's index and close it."""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+
+# Engine resources, overridable through the environment. CHESS_ENGINE_OPTIONS takes
+# any other UCI options as a JSON object, e.g. '{"Skill Level": 15, "SyzygyPath": "/tb"}'
+ENGINE_THREADS = int(os.environ.get("CHESS_ENGINE_THREADS", "1"))
+ENGINE_HASH_MB = int(os.environ.get("CHESS_ENGINE_HASH_MB", "64"))
+ENGINE_EXTRA_OPTIONS = json.loads(os.environ.get("CHESS_ENGINE_OPTIONS", "{}"))
+
+# Options python-chess sets per search itself
+_MANAGED_OPTIONS = {"multipv", "ponder", "uci_chess960", "uci_variant"}
+
+
+def default_engine_options() -> Dict:
+    """UCI options every engine is started with."""
+    return {"Threads": ENGINE_THREADS, "Hash": ENGINE_HASH_MB, **ENGINE_EXTRA_OPTIONS}
+
+
+def search_limit(
+    depth: Optional[int] = None,
+    nodes: Optional[int] = None,
+    movetime: Optional[float] = None
+) -> chess.engine.Limit:
+    """
+    Build a search limit, the search stops as soon as any of them is reached.
+
+    Args:
+        depth: Maximum depth in plies
+        nodes: Maximum number of nodes
+        movetime: Maximum search time in seconds
+
+    Raises:
+        ValueError: If no limit is given, or one isn't positive
+    """
+    if depth is None and nodes is None and movetime is None:
+        raise ValueError("At least one of depth, nodes or movetime is required")
+    for name, value in (("depth", depth), ("nodes", nodes), ("movetime", movetime)):
+        if value is not None and value <= 0:
+            raise ValueError(f"{name} must be positive ({value} given)")
+    return chess.engine.Limit(depth=depth, nodes=nodes, time=movetime)
+
+
 class StockfishEngine:
-    """Wrapper for Stockfish chess engine with platform auto-detection."""
+    """
+    Wrapper for Stockfish chess engine with platform auto-detection.
 
-    def __init__(self):
+    The blocking methods (start, analyze_position, ...) drive the engine through
+    a SimpleEngine. The *_async methods drive it through python-chess' asyncio
+    protocol on the running event loop instead. Use one style per instance.
+    """
+
+    def __init__(self, cache: Optional[EvaluationCache] = None, options: Optional[Dict] = None):
+        """
+        Args:
+            cache: Evaluation cache consulted before searching (None = always search)
+            options: UCI options set after starting (default: default_engine_options())
+        """
+        self.options = default_engine_options() if options is None else options
         self.engine_path = self._get_stockfish_path()
         self.engine: Optional[chess.engine.SimpleEngine] = None
+        self.protocol: Optional[chess.engine.UciProtocol] = None
+        self._transport: Optional[asyncio.SubprocessTransport] = None
+        self.cache = cache
+        # Search in progress on the asyncio protocol, and whether interrupt() stopped it
+        self._search: Optional[chess.engine.AnalysisResult] = None
+        self.interrupted = False
 
     def _get_stockfish_path(self) -> Path:
         """Detect platform and return path to appropriate Stockfish binary."""
@@ -54,6 +283,7 @@ class StockfishEngine:
             try:
                 logger.info(f"Starting Stockfish engine from {self.engine_path}")
                 self.engine = chess.engine.SimpleEngine.popen_uci(str(self.engine_path))
+                self.engine.configure(self._supported_options(self.engine.options))
                 logger.info("Stockfish engine started successfully")
             except Exception as e:
                 logger.error(f"Failed to start Stockfish: {e}")
@@ -68,81 +298,317 @@ class StockfishEngine:
             self.engine = None
             logger.info("Stockfish engine stopped")
 
+    async def start_async(self):
+        """Start the Stockfish engine on the running event loop."""
+        if self.protocol is None:
+            try:
+                logger.info(f"Starting Stockfish engine from {self.engine_path}")
+                self._transport, self.protocol = await chess.engine.popen_uci(str(self.engine_path))
+                await self.protocol.configure(self._supported_options(self.protocol.options))
+                logger.info("Stockfish engine started successfully")
+            except Exception as e:
+                logger.error(f"Failed to start Stockfish: {e}")
+                logger.exception("Stockfish start exception traceback")
+                raise RuntimeError(f"Failed to start Stockfish: {e}")
+
+    def _supported_options(self, available) -> Dict:
+        """The configured options this engine knows, skipping (and logging) the others."""
+        options = {}
+        for name, value in self.options.items():
+            if name.lower() in _MANAGED_OPTIONS:
+                logger.warning(f"UCI option {name} is set per search, ignoring it")
+            elif name not in available:
+                logger.warning(f"Stockfish has no UCI option {name}, ignoring it")
+            else:
+                options[name] = value
+        return options
+
+    async def stop_async(self):
+        """Stop an engine started with start_async()."""
+        if self.protocol:
+            logger.info("Stopping Stockfish engine")
+            try:
+                await self.protocol.quit()
+            except chess.engine.EngineTerminatedError:
+                pass
+            self._transport.close()
+            self.protocol = None
+            self._transport = None
+            logger.info("Stockfish engine stopped")
+
     def analyze_position(
         self,
         fen: str,
-        depth: int = 20,
-        multipv: int = 1
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        root_moves: Optional[List[str]] = None,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None
     ) -> Dict:
         """
         Analyze a position and return evaluation.
 
+        The search stops at whichever of depth, nodes and movetime is reached first.
+
         Args:
             fen: Position in FEN notation
-            depth: Search depth (default 20)
+            depth: Search depth (default 20, None = no depth limit)
             multipv: Number of principal variations to return (default 1)
+            root_moves: Only search these moves (UCI), default all legal moves
+            nodes: Maximum number of nodes to search
+            movetime: Maximum search time in seconds
 
         Returns:
-            Dict with score, best_move, and principal_variation
+            Dict with score, best_move, and principal_variation of the best
+            line, plus a "variations" list with every line when multipv > 1.
+            "depth" is the depth actually reached.
         """
-        if not self.engine:
-            self.start()
-
         try:
             board = chess.Board(fen)
+            limit = search_limit(depth, nodes, movetime)
+            cached = self._cached(board, fen, depth, multipv, root_moves)
+            if cached is not None:
+                return cached
+
+            if not self.engine:
+                self.start()
 
             # Run analysis
             info = self.engine.analyse(
                 board,
-                chess.engine.Limit(depth=depth),
-                multipv=multipv
+                limit,
+                multipv=multipv,
+                root_moves=self._parse_root_moves(root_moves)
             )
+            return self._analysis_result(board, fen, multipv, info, root_moves)
 
-            # Handle multipv results (list) vs single result (dict)
-            if isinstance(info, list):
-                info = info[0]  # Take first variation if multiple
-
-            # Extract score
-            score_val = info.get("score")
-            if score_val:
-                # Convert score to centipawns from white's perspective
-                if score_val.is_mate():
-                    mate_in = score_val.white().mate()
-                    score = f"M{mate_in}" if mate_in > 0 else f"M{-mate_in}"
-                    score_cp = 10000 if mate_in > 0 else -10000
-                else:
-                    score_cp = score_val.white().score()
-                    score = f"{score_cp / 100:.2f}"
-            else:
-                score = "0.00"
-                score_cp = 0
+        except Exception as e:
+            print(f"Error analyzing position: {e}")
+            if isinstance(e, chess.engine.EngineTerminatedError):
+                # Restart the process on the next call
+                self.engine = None
+            return self._error_result(fen, e)
 
-            # Extract best move
-            pv = info.get("pv", [])
-            best_move = str(pv[0]) if pv else None
+    async def analyze_position_async(
+        self,
+        fen: str,
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        root_moves: Optional[List[str]] = None,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None,
+        game: object = None
+    ) -> Dict:
+        """
+        Analyze a position without blocking the event loop, see analyze_position.
 
-            # Extract principal variation (first 5 moves)
-            principal_variation = [str(move) for move in pv[:5]] if pv else []
+        Cancelling the awaiting task stops the search in the engine. So does
+        interrupt(), which returns the result reached so far.
 
-            return {
-                "score": score,
-                "score_cp": score_cp,
-                "best_move": best_move,
-                "principal_variation": principal_variation,
-                "depth": depth,
-                "fen": fen
-            }
+        Args:
+            game: Identifies the game the position belongs to. The engine's
+                hash table is cleared whenever it changes, so consecutive
+                positions of the same game reuse each other's search.
+        """
+        # Reset first, so a cached answer isn't taken for an interrupted search
+        self.interrupted = False
+        try:
+            board = chess.Board(fen)
+            limit = search_limit(depth, nodes, movetime)
+            cached = self._cached(board, fen, depth, multipv, root_moves)
+            if cached is not None:
+                return cached
+
+            if not self.protocol:
+                await self.start_async()
+
+            # Leaving the block (including on cancellation) stops the search
+            with await self.protocol.analysis(
+                board,
+                limit,
+                multipv=multipv,
+                game=game,
+                root_moves=self._parse_root_moves(root_moves)
+            ) as search:
+                self._search = search
+                try:
+                    await search.wait()
+                finally:
+                    self._search = None
+            # What an interrupted search found so far doesn't stand for a search to its depth
+            return self._analysis_result(
+                board, fen, multipv, list(search.multipv), root_moves, cache=not self.interrupted
+            )
 
         except Exception as e:
-            print(f"Error analyzing position: {e}")
-            return {
-                "error": str(e),
-                "score": "0.00",
-                "score_cp": 0,
-                "best_move": None,
-                "principal_variation": [],
-                "fen": fen
-            }
+            logger.error(f"Error analyzing position: {e}", exc_info=True)
+            if isinstance(e, chess.engine.EngineTerminatedError):
+                self.protocol = None
+            return self._error_result(fen, e)
+
+    def interrupt(self) -> bool:
+        """
+        Stop the search of a running analyze_position_async call early, it
+        returns what it found so far and `interrupted` is set.
+
+        Returns:
+            False if there was no search to interrupt
+        """
+        if self._search is None or self.interrupted:
+            return False
+        self.interrupted = True
+        self._search.stop()
+        return True
+
+    async def analysis_stream_async(
+        self,
+        fen: str,
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Analyze a position, yielding a result each time the search completes a depth.
+
+        Results have the same shape as analyze_position's. The last one is
+        marked "final" and cached. A cached result searched deep enough is
+        yielded alone. Without any limit the search runs until the generator
+        is closed, which stops the search.
+
+        Raises:
+            ValueError: If the FEN is invalid
+        """
+        board = chess.Board(fen)
+        limit = None if depth is None and nodes is None and movetime is None else search_limit(depth, nodes, movetime)
+        cached = self._cached(board, fen, depth, multipv)
+        if cached is not None:
+            yield {**cached, "final": True}
+            return
+
+        if not self.protocol:
+            await self.start_async()
+
+        lines_per_depth = min(multipv, board.legal_moves.count())
+        try:
+            last_depth = 0
+            # Leaving the block (including on cancellation) stops the search
+            with await self.protocol.analysis(board, limit, multipv=multipv) as analysis:
+                async for info in analysis:
+                    # A depth is complete once its last line arrives; bound scores are
+                    # provisional results of aspiration windows
+                    if (
+                        "pv" not in info
+                        or info.get("multipv", 1) != lines_per_depth
+                        or "lowerbound" in info
+                        or "upperbound" in info
+                        or info.get("depth", 0) <= last_depth
+                    ):
+                        continue
+                    last_depth = info["depth"]
+                    yield {
+                        **self._analysis_result(board, fen, multipv, list(analysis.multipv), cache=False),
+                        "final": False
+                    }
+                await analysis.wait()
+            yield {**self._analysis_result(board, fen, multipv, list(analysis.multipv)), "final": True}
+        except chess.engine.EngineTerminatedError:
+            self.protocol = None
+            raise
+
+    def _cached(
+        self,
+        board: chess.Board,
+        fen: str,
+        depth: int,
+        multipv: int,
+        root_moves: Optional[List[str]] = None
+    ) -> Optional[Dict]:
+        # Without a depth there is no way to tell whether a cached result is good enough
+        if self.cache is None or depth is None:
+            return None
+        cached = self.cache.get(board, depth, multipv, root_moves=root_moves)
+        if cached is not None:
+            cached["fen"] = fen
+        return cached
+
+    @staticmethod
+    def _parse_root_moves(root_moves: Optional[List[str]]) -> Optional[List[chess.Move]]:
+        return [chess.Move.from_uci(move) for move in root_moves] if root_moves else None
+
+    @staticmethod
+    def _variation(info) -> Dict:
+        """Score (from white's perspective), best move and first moves of one line."""
+        score_val = info.get("score")
+        if score_val:
+            # Convert score to centipawns from white's perspective
+            if score_val.is_mate():
+                mate_in = score_val.white().mate()
+                score = f"M{mate_in}" if mate_in > 0 else f"M{-mate_in}"
+                score_cp = 10000 if mate_in > 0 else -10000
+            else:
+                score_cp = score_val.white().score()
+                score = f"{score_cp / 100:.2f}"
+        else:
+            score = "0.00"
+            score_cp = 0
+
+        # Extract best move
+        pv = info.get("pv", [])
+        best_move = str(pv[0]) if pv else None
+
+        # Extract principal variation (first 5 moves)
+        principal_variation = [str(move) for move in pv[:5]] if pv else []
+
+        return {
+            "score": score,
+            "score_cp": score_cp,
+            "best_move": best_move,
+            "principal_variation": principal_variation
+        }
+
+    def _analysis_result(
+        self,
+        board: chess.Board,
+        fen: str,
+        multipv: int,
+        info,
+        root_moves: Optional[List[str]] = None,
+        cache: bool = True
+    ) -> Dict:
+        """
+        Convert engine output to the API result and cache it (unless `cache` is
+        False or the search found no move).
+        """
+        # Handle multipv results (list) vs single result (dict)
+        lines = info if isinstance(info, list) else [info]
+
+        result = {
+            **self._variation(lines[0]),
+            # Node and time limits can stop the search before the requested depth,
+            # and an interrupted search may not have reported any yet
+            "depth": lines[0].get("depth", 0),
+            "fen": fen
+        }
+        if multipv > 1:
+            result["variations"] = [
+                {"multipv": rank, **self._variation(line)}
+                for rank, line in enumerate(lines, start=1)
+            ]
+        if cache and self.cache is not None and result["principal_variation"]:
+            self.cache.put(board, multipv, result, root_moves=root_moves)
+        return result
+
+    @staticmethod
+    def _error_result(fen: str, error: Exception) -> Dict:
+        return {
+            "error": str(error),
+            "score": "0.00",
+            "score_cp": 0,
+            "best_move": None,
+            "principal_variation": [],
+            "fen": fen
+        }
 
     def get_best_move(self, fen: str, time_limit: float = 1.0) -> Optional[str]:
         """
@@ -168,6 +634,27 @@ class StockfishEngine:
 
         except Exception as e:
             print(f"Error getting best move: {e}")
+            if isinstance(e, chess.engine.EngineTerminatedError):
+                self.engine = None
+            return None
+
+    async def get_best_move_async(self, fen: str, time_limit: float = 1.0) -> Optional[str]:
+        """Get the best move without blocking the event loop, see get_best_move."""
+        if not self.protocol:
+            await self.start_async()
+
+        try:
+            board = chess.Board(fen)
+            result = await self.protocol.play(
+                board,
+                chess.engine.Limit(time=time_limit)
+            )
+            return str(result.move) if result.move else None
+
+        except Exception as e:
+            logger.error(f"Error getting best move: {e}", exc_info=True)
+            if isinstance(e, chess.engine.EngineTerminatedError):
+                self.protocol = None
             return None
 
     def __enter__(self):
@@ -180,5 +667,603 @@ class StockfishEngine:
         self.stop()
 
 
-# Singleton instance
-stockfish = StockfishEngine()
+# Pool defaults, overridable through the environment (pool size 0 = one engine per CPU core)
+ENGINE_POOL_SIZE = int(os.environ.get("CHESS_ENGINE_POOL_SIZE", "0"))
+ENGINE_LEASE_TIMEOUT = float(os.environ.get("CHESS_ENGINE_LEASE_TIMEOUT", "30"))
+# Engines each class may use at once (0 = all of them for explorer queries, all but one for background jobs)
+ENGINE_EXPLORER_LIMIT = int(os.environ.get("CHESS_ENGINE_EXPLORER_LIMIT", "0"))
+ENGINE_BACKGROUND_LIMIT = int(os.environ.get("CHESS_ENGINE_BACKGROUND_LIMIT", "0"))
+
+
+# Shortest search left to a request whose latency ceiling is almost used up (seconds)
+MIN_SEARCH_TIME = 0.01
+
+# Marks the end of a streamed analysis
+_STREAM_END = object()
+
+
+class EnginePoolTimeout(TimeoutError):
+    """Raised when no engine became free within the lease timeout."""
+
+
+class Priority(enum.IntEnum):
+    """Scheduling class of an engine search, most urgent first."""
+
+    INTERACTIVE = 0  # A user waiting on a single position
+    EXPLORER = 1  # Opening explorer evaluations
+    BACKGROUND = 2  # Batch jobs such as puzzle generation
+
+
+class _Flight:
+    """A search in progress and the number of requests waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Dict]"):
+        self.task = task
+        self.waiters = 0
+
+
+class EnginePool:
+    """
+    Pool of Stockfish processes shared by all analysis requests.
+
+    Each search leases one engine for its duration, so a background puzzle job
+    only ever occupies one process and interactive requests keep getting the
+    others. Engines are started on first use. When all of them are busy,
+    callers queue until one is returned or the lease timeout expires.
+    Concurrent requests for the same position and limits share one search.
+
+    Searches are scheduled by Priority: a free engine goes to the most urgent
+    class waiting, each class can be limited to a number of engines, and an
+    interactive or explorer request finding every engine busy interrupts a
+    background search, which is queued again and restarted later.
+
+    The engines run on python-chess' asyncio protocol, on an event loop owned
+    by the pool in its own thread. Coroutines (analyze_position_async, ...) can
+    be awaited from any event loop without blocking it, and cancelling them
+    stops the search. The blocking methods are for worker threads.
+    """
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache: Optional[EvaluationCache] = None,
+        limits: Optional[Dict[Priority, int]] = None
+    ):
+        """
+        Args:
+            size: Number of engine processes. Defaults to CHESS_ENGINE_POOL_SIZE,
+                or the number of CPU cores divided by CHESS_ENGINE_THREADS.
+            timeout: Seconds to wait for a free engine. Defaults to CHESS_ENGINE_LEASE_TIMEOUT.
+            cache: Evaluation cache shared by the engines (None = no caching)
+            limits: Engines each priority class may use at once. Defaults to
+                CHESS_ENGINE_EXPLORER_LIMIT and CHESS_ENGINE_BACKGROUND_LIMIT.
+        """
+        self.size = size or ENGINE_POOL_SIZE or max(1, (os.cpu_count() or 1) // max(1, ENGINE_THREADS))
+        self.timeout = ENGINE_LEASE_TIMEOUT if timeout is None else timeout
+        self.cache = cache
+        self.limits = {
+            Priority.INTERACTIVE: self.size,
+            Priority.EXPLORER: ENGINE_EXPLORER_LIMIT or self.size,
+            Priority.BACKGROUND: ENGINE_BACKGROUND_LIMIT or max(1, self.size - 1),
+            **(limits or {})
+        }
+        self._idle: List[StockfishEngine] = []
+        self._leased: Dict[StockfishEngine, Priority] = {}
+        self._started = 0
+        self._in_use = {priority: 0 for priority in Priority}
+        self._waiting = {priority: 0 for priority in Priority}
+        # Pool event loop, started on first use
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._condition: Optional[asyncio.Condition] = None
+        # Searches in progress by position and limits (on the pool loop)
+        self._in_flight: Dict[tuple, _Flight] = {}
+        # Statistics
+        self.leases = 0
+        self.timeouts = 0
+        self.cancellations = 0
+        self.coalesced = 0
+        self.preemptions = 0
+        self._class_leases = {priority: 0 for priority in Priority}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="engine-pool",
+                    daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def _submit(self, coro: Awaitable):
+        """Schedule a coroutine on the pool loop. Returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _run(self, coro: Awaitable):
+        """Await a coroutine on the pool loop from another event loop, forwarding cancellation."""
+        try:
+            return await asyncio.wrap_future(self._submit(coro))
+        except asyncio.CancelledError:
+            self.cancellations += 1
+            raise
+
+    @asynccontextmanager
+    async def _lease(
+        self,
+        timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> AsyncIterator[StockfishEngine]:
+        """
+        Borrow an engine for the duration of the block (on the pool loop).
+
+        Args:
+            timeout: Seconds to wait for an engine (default: the pool's lease
+                timeout). Background leases wait as long as it takes.
+            priority: Scheduling class of the search
+
+        Raises:
+            EnginePoolTimeout: If every engine stayed busy for the whole timeout
+        """
+        if priority == Priority.BACKGROUND:
+            timeout = None
+        elif timeout is None:
+            timeout = self.timeout
+        engine = await self._acquire(timeout, priority)
+        try:
+            yield engine
+        finally:
+            await self._release(engine)
+
+    def _can_lease(self, priority: Priority) -> bool:
+        """Whether a request of this class may take an engine now (caller holds the condition)."""
+        if not (self._idle or self._started < self.size):
+            return False
+        if self._in_use[priority] >= self.limits[priority]:
+            return False
+        # Engines go to the most urgent class first, unless it is at its own limit
+        return not any(
+            self._waiting[other] and self._in_use[other] < self.limits[other]
+            for other in Priority if other < priority
+        )
+
+    def _preempt(self, priority: Priority):
+        """Interrupt a background search to free an engine for a more urgent request."""
+        if priority == Priority.BACKGROUND or self._idle or self._started < self.size:
+            return
+        for engine, leased_priority in self._leased.items():
+            if leased_priority == Priority.BACKGROUND and engine.interrupt():
+                self.preemptions += 1
+                return
+
+    async def _acquire(self, timeout: Optional[float], priority: Priority) -> StockfishEngine:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        start = time.perf_counter()
+        async with self._condition:
+            self._waiting[priority] += 1
+            try:
+                if not self._can_lease(priority):
+                    self._preempt(priority)
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._can_lease(priority)),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise EnginePoolTimeout(f"No engine available after {timeout:.1f}s ({self.size} engines busy)")
+            finally:
+                self._waiting[priority] -= 1
+                # Requests of other classes may be able to go ahead now
+                self._condition.notify_all()
+
+            if self._idle:
+                engine = self._idle.pop()
+            else:
+                engine = None
+                self._started += 1
+            self._in_use[priority] += 1
+
+            waited = time.perf_counter() - start
+            self.leases += 1
+            self._class_leases[priority] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if engine is None:
+                engine = StockfishEngine(cache=self.cache)
+            if engine.protocol is None:
+                # New engine, or its process died during an earlier search
+                await engine.start_async()
+        except Exception:
+            # Give the slot back, the next lease starts a fresh engine
+            async with self._condition:
+                self._started -= 1
+                self._in_use[priority] -= 1
+                self._condition.notify_all()
+            raise
+        self._leased[engine] = priority
+        # A search preempted during an earlier lease must not count against this one
+        engine.interrupted = False
+        return engine
+
+    async def _release(self, engine: StockfishEngine):
+        async with self._condition:
+            priority = self._leased.pop(engine)
+            self._idle.append(engine)
+            self._in_use[priority] -= 1
+            self._condition.notify_all()
+
+    def _cached(self, fen: str, depth: Optional[int], multipv: int, root_moves: Optional[List[str]]) -> Optional[Dict]:
+        """Look up the cache before leasing, so cached positions don't queue behind running searches."""
+        if self.cache is None or depth is None:
+            return None
+        try:
+            cached = self.cache.get(chess.Board(fen), depth, multipv, count_miss=False, root_moves=root_moves)
+        except ValueError:
+            return None
+        if cached is not None:
+            cached["fen"] = fen
+        return cached
+
+    @staticmethod
+    def _flight_key(
+        fen: str,
+        depth: Optional[int],
+        multipv: int,
+        root_moves: Optional[List[str]],
+        nodes: Optional[int],
+        movetime: Optional[float],
+        max_latency: Optional[float],
+        priority: Priority
+    ) -> tuple:
+        """
+        Searches with the same key return the same result: same position (as
+        cached) and limits. Requests only join searches of their own class and
+        latency ceiling, so none waits past its own ceiling.
+        """
+        try:
+            position = EvaluationCache.key(chess.Board(fen), multipv, root_moves)
+        except ValueError:
+            # Invalid FEN, the search reports the error
+            position = fen
+        return (position, depth, nodes, movetime, max_latency, priority)
+
+    async def _analyze(
+        self,
+        fen: str,
+        depth: Optional[int],
+        multipv: int,
+        root_moves: Optional[List[str]],
+        nodes: Optional[int],
+        movetime: Optional[float],
+        max_latency: Optional[float],
+        priority: Priority
+    ) -> Dict:
+        """
+        Run a search, or join an identical one already in flight (on the pool loop).
+
+        The shared search runs with the latency ceiling of the request that
+        started it. It is cancelled once every request waiting for it is.
+        """
+        key = self._flight_key(fen, depth, multipv, root_moves, nodes, movetime, max_latency, priority)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(
+                self._search(fen, depth, multipv, root_moves, nodes, movetime, max_latency, priority)
+            ))
+            self._in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Requests arriving while the search unwinds start a new one instead of joining it
+                self._land(key, flight)
+                flight.task.cancel()
+        # Copy, the result is shared between the coalesced requests
+        return {**result, "fen": fen}
+
+    def _land(self, key: tuple, flight: _Flight):
+        """Stop offering a search to new requests (a newer one may have taken its key)."""
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+
+    async def _search(
+        self,
+        fen: str,
+        depth: Optional[int],
+        multipv: int,
+        root_moves: Optional[List[str]],
+        nodes: Optional[int],
+        movetime: Optional[float],
+        max_latency: Optional[float],
+        priority: Priority
+    ) -> Dict:
+        deadline = time.perf_counter() + max_latency if max_latency is not None else None
+        while True:
+            async with self._lease(self._lease_timeout(max_latency), priority) as engine:
+                result = await engine.analyze_position_async(
+                    fen,
+                    depth=depth,
+                    multipv=multipv,
+                    root_moves=root_moves,
+                    nodes=nodes,
+                    movetime=self._remaining_movetime(deadline, movetime)
+                )
+                if not engine.interrupted:
+                    return result
+            # Preempted by a more urgent request, queue again
+
+    def _lease_timeout(self, max_latency: Optional[float]) -> Optional[float]:
+        # The latency ceiling covers queueing too
+        return None if max_latency is None else min(self.timeout, max_latency)
+
+    @staticmethod
+    def _remaining_movetime(deadline: Optional[float], movetime: Optional[float]) -> Optional[float]:
+        """Cap the movetime to what is left of the latency ceiling once an engine is leased."""
+        if deadline is None:
+            return movetime
+        remaining = max(deadline - time.perf_counter(), MIN_SEARCH_TIME)
+        return min(movetime, remaining) if movetime else remaining
+
+    async def _stream(
+        self,
+        fen: str,
+        depth: Optional[int],
+        multipv: int,
+        nodes: Optional[int],
+        movetime: Optional[float],
+        max_latency: Optional[float],
+        emit: Callable[[object], None]
+    ):
+        """Run a streaming search on the pool loop, passing each result to `emit`."""
+        try:
+            deadline = time.perf_counter() + max_latency if max_latency is not None else None
+            async with self._lease(self._lease_timeout(max_latency)) as engine:
+                movetime = self._remaining_movetime(deadline, movetime)
+                async for update in engine.analysis_stream_async(
+                    fen,
+                    depth=depth,
+                    multipv=multipv,
+                    nodes=nodes,
+                    movetime=movetime
+                ):
+                    emit(update)
+        finally:
+            emit(_STREAM_END)
+
+    async def _analyze_game(
+        self,
+        fens: List[str],
+        depth: int,
+        game: object,
+        priority: Priority,
+        progress_callback: Optional[Callable[[int, int], None]]
+    ) -> List[Dict]:
+        """Analyze consecutive positions on one leased engine, keeping its hash between them."""
+        results = []
+        while len(results) < len(fens):
+            async with self._lease(priority=priority) as engine:
+                while len(results) < len(fens):
+                    result = await engine.analyze_position_async(fens[len(results)], depth=depth, game=game)
+                    if engine.interrupted:
+                        # Preempted by a more urgent request, queue again and redo this position
+                        break
+                    results.append(result)
+                    if progress_callback:
+                        progress_callback(len(results), len(fens))
+        return results
+
+    async def _best_move(self, fen: str, time_limit: float) -> Optional[str]:
+        async with self._lease() as engine:
+            return await engine.get_best_move_async(fen, time_limit=time_limit)
+
+    async def analyze_position_async(
+        self,
+        fen: str,
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        root_moves: Optional[List[str]] = None,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None,
+        max_latency: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict:
+        """
+        Analyze a position on a leased engine, see StockfishEngine.analyze_position.
+
+        Args:
+            max_latency: Hard ceiling in seconds for waiting for an engine plus
+                searching. The search is cut short to fit, waiting longer raises
+                EnginePoolTimeout.
+            priority: Scheduling class. Background searches wait for an engine
+                as long as it takes and may be preempted (and restarted).
+        """
+        cached = self._cached(fen, depth, multipv, root_moves)
+        if cached is not None:
+            return cached
+        return await self._run(self._analyze(fen, depth, multipv, root_moves, nodes, movetime, max_latency, priority))
+
+    async def analysis_stream_async(
+        self,
+        fen: str,
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None,
+        max_latency: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Analyze a position on a leased engine, yielding a result per completed
+        depth, see StockfishEngine.analysis_stream_async.
+
+        Closing the generator early stops the search and returns the engine.
+
+        Args:
+            max_latency: Hard ceiling in seconds, as for analyze_position_async
+
+        Raises:
+            EnginePoolTimeout: If no engine became free in time
+        """
+        cached = self._cached(fen, depth, multipv, None)
+        if cached is not None:
+            yield {**cached, "final": True}
+            return
+
+        # Results are handed over from the pool loop to the caller's loop
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue = asyncio.Queue()
+        future = self._submit(self._stream(
+            fen, depth, multipv, nodes, movetime, max_latency,
+            lambda update: loop.call_soon_threadsafe(updates.put_nowait, update)
+        ))
+        try:
+            while True:
+                update = await updates.get()
+                if update is _STREAM_END:
+                    break
+                yield update
+            # Raises the search's error, if any
+            await asyncio.wrap_future(future)
+        finally:
+            if not future.done():
+                future.cancel()
+                self.cancellations += 1
+
+    def analyze_position(
+        self,
+        fen: str,
+        depth: Optional[int] = 20,
+        multipv: int = 1,
+        root_moves: Optional[List[str]] = None,
+        nodes: Optional[int] = None,
+        movetime: Optional[float] = None,
+        max_latency: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE
+    ) -> Dict:
+        """Blocking version of analyze_position_async, for worker threads."""
+        cached = self._cached(fen, depth, multipv, root_moves)
+        if cached is not None:
+            return cached
+        return self._submit(
+            self._analyze(fen, depth, multipv, root_moves, nodes, movetime, max_latency, priority)
+        ).result()
+
+    async def analyze_game_async(
+        self,
+        fens: List[str],
+        depth: int = 18,
+        game: object = None,
+        priority: Priority = Priority.BACKGROUND,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict]:
+        """
+        Analyze the positions of a game in order on a single engine.
+
+        The engine keeps its hash table from one position to the next, so each
+        search starts from what the previous ones found. Cached positions are
+        not searched again.
+
+        Args:
+            fens: Positions in game order
+            depth: Search depth
+            game: Identifies the game (e.g. its ID), the hash table is cleared when it changes
+            priority: Scheduling class, background by default
+            progress_callback: Called with (positions done, total) after each position
+
+        Returns:
+            One analysis result per position, see StockfishEngine.analyze_position
+        """
+        return await self._run(self._analyze_game(fens, depth, game, priority, progress_callback))
+
+    async def get_best_move_async(self, fen: str, time_limit: float = 1.0) -> Optional[str]:
+        """Get the best move on a leased engine, see StockfishEngine.get_best_move."""
+        return await self._run(self._best_move(fen, time_limit))
+
+    def get_best_move(self, fen: str, time_limit: float = 1.0) -> Optional[str]:
+        """Blocking version of get_best_move_async, for worker threads."""
+        return self._submit(self._best_move(fen, time_limit)).result()
+
+    def stats(self) -> Dict:
+        """
+        Get pool occupancy and wait-time statistics.
+
+        Returns:
+            Dict with size, engine UCI options, started/in-use/idle/waiting counts,
+            searches in flight, lease, timeout, cancellation, coalesced-request and
+            preemption counters, average/max wait in milliseconds, and per priority
+            class its engine limit, engines in use, queue depth and leases
+        """
+        return {
+            "size": self.size,
+            "engine_options": default_engine_options(),
+            "started": self._started,
+            "in_use": sum(self._in_use.values()),
+            "idle": len(self._idle),
+            "waiting": sum(self._waiting.values()),
+            "in_flight": len(self._in_flight),
+            "leases": self.leases,
+            "timeouts": self.timeouts,
+            "cancellations": self.cancellations,
+            "coalesced": self.coalesced,
+            "avg_wait_ms": round(self._wait_total / self.leases * 1000, 1) if self.leases else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 1),
+            "preemptions": self.preemptions,
+            "classes": {
+                priority.name.lower(): {
+                    "limit": self.limits[priority],
+                    "in_use": self._in_use[priority],
+                    "waiting": self._waiting[priority],
+                    "leases": self._class_leases[priority]
+                }
+                for priority in Priority
+            }
+        }
+
+    async def _shutdown(self):
+        # Cancel running searches, their engines return to the idle list
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        idle, self._idle = self._idle, []
+        self._started -= len(idle)
+        for engine in idle:
+            await engine.stop_async()
+
+    def stop(self):
+        """Cancel running searches, stop all engines and the pool loop."""
+        with self._loop_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Engine pool did not shut down cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+        self._condition = None
+
+
+# Shared cache and pool instances
+evaluation_cache = EvaluationCache()
+engine_pool = EnginePool(cache=evaluation_cache)
@@ -3,17 +3,74 @@ Data models and JSON-based storage layer.
 No SQL, no ORM - just Python dataclasses and file persistence.
 """
 
+import base64
+import bisect
+import codecs
+import gc
 import json
+import mmap
 import os
+import re
+import struct
+import sys
 import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 import uuid
+import chess
+import chess.polyglot
 import logger
 
 
+# Zobrist hasher used for the position index. Only the piece placement is hashed
+# (no turn, castling or en passant) so lookups match positions the same way the
+# explorer always has: by the board part of the FEN.
+_position_hasher = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+
+
+def position_key(board: chess.Board) -> int:
+    """Return the position index key (placement-only Zobrist hash) for a board."""
+    return _position_hasher.hash_board(board)
+
+
+# Namespace for deterministic (UUIDv5) game IDs
+GAME_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "chess-study-toolkit")
+
+
+def make_game_id(
+    platform: str,
+    source_id: Optional[str],
+    date: str,
+    white_player: str,
+    black_player: str,
+    moves: List[str]
+) -> str:
+    """
+    Derive a stable game ID so the same game always gets the same ID.
+
+    Uses the platform's own game ID/URL when available, otherwise a hash of
+    platform, date, players and moves.
+    """
+    if source_id:
+        key = f"{platform}:{source_id}"
+    else:
+        key = "|".join([platform, date, white_player, black_player, " ".join(moves)])
+    return str(uuid.uuid5(GAME_ID_NAMESPACE, key))
+
+
+def dedup_key(platform: str, date: str, white_player: str, black_player: str) -> Tuple[str, str, str, str]:
+    """Natural key used to detect the same game imported under another ID."""
+    return (platform, date, white_player, black_player)
+
+
 @dataclass
 class Game:
     """Normalized chess game model."""
@@ -29,6 +86,409 @@ class Game:
     moves: List[str]  # List of moves in SAN notation
 
 
+class StringPool:
+    """
+    Keeps one copy of each repeated string (players, platforms, time controls...).
+
+    Each GameStorage has its own, so the strings of a database are freed
+    together with its games when it is closed.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+
+    def intern(self, value: str) -> str:
+        """Return the pool's copy of a string, adding it if needed."""
+        return self._strings.setdefault(value, value)
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+def pack_moves(moves: List[str]) -> Optional[bytes]:
+    """
+    Encode SAN moves played from the standard start position as 16-bit codes.
+
+    Each code is from_square | to_square << 6 | promotion << 12, stored little-endian.
+    Returns None if the moves can't be replayed from the start position.
+    """
+    board = chess.Board()
+    codes = array('H')
+    try:
+        for san in moves:
+            move = board.parse_san(san)
+            codes.append(move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12))
+            board.push(move)
+    except ValueError:
+        return None
+    if sys.byteorder == "big":
+        codes.byteswap()
+    return codes.tobytes()
+
+
+def unpack_moves(packed: bytes) -> Iterator[chess.Move]:
+    """Decode 16-bit move codes produced by pack_moves."""
+    codes = array('H')
+    codes.frombytes(packed)
+    if sys.byteorder == "big":
+        codes.byteswap()
+    for code in codes:
+        yield chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None)
+
+
+# Packed game analysis: depth, then per position (before each move, and after
+# the last one) the score in centipawns from white's perspective and the best
+# move as a pack_moves code. Mates are scores beyond ANALYSIS_MATE_THRESHOLD.
+ANALYSIS_MATE = 32000
+ANALYSIS_MATE_THRESHOLD = 31000
+ANALYSIS_NO_MOVE = 0xFFFF
+# Centipawn score reported for a mate, as in the engine results
+MATE_SCORE_CP = 10000
+_analysis_header = struct.Struct("<H")
+_analysis_entry = struct.Struct("<hH")
+
+
+def pack_analysis(depth: int, evaluations: List[Tuple[int, Optional[int], Optional[str]]]) -> bytes:
+    """
+    Encode the evaluation of every position of a game.
+
+    Args:
+        depth: Search depth of the evaluations
+        evaluations: (score_cp, mate, best_move) per position, from white's
+            perspective; mate is the signed number of moves to mate or None,
+            best_move is in UCI notation or None when there is no legal move
+    """
+    packed = bytearray(_analysis_header.pack(depth))
+    for score_cp, mate, best_move in evaluations:
+        if mate is not None:
+            score = ANALYSIS_MATE - min(abs(mate), ANALYSIS_MATE - ANALYSIS_MATE_THRESHOLD - 1)
+            score = score if mate > 0 else -score
+        else:
+            score = max(-ANALYSIS_MATE_THRESHOLD, min(ANALYSIS_MATE_THRESHOLD, score_cp))
+        code = ANALYSIS_NO_MOVE
+        if best_move:
+            move = chess.Move.from_uci(best_move)
+            code = move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+        packed += _analysis_entry.pack(score, code)
+    return bytes(packed)
+
+
+def unpack_analysis(packed: bytes) -> Dict:
+    """
+    Decode a packed game analysis.
+
+    Returns:
+        Dict with the search depth and per-position arrays "score" and
+        "score_cp" (as in engine results) and "best_move" (UCI)
+    """
+    (depth,) = _analysis_header.unpack_from(packed)
+    scores = []
+    scores_cp = []
+    best_moves = []
+    for score, code in _analysis_entry.iter_unpack(packed[_analysis_header.size:]):
+        if abs(score) > ANALYSIS_MATE_THRESHOLD:
+            scores.append(f"M{ANALYSIS_MATE - abs(score)}")
+            scores_cp.append(MATE_SCORE_CP if score > 0 else -MATE_SCORE_CP)
+        else:
+            scores.append(f"{score / 100:.2f}")
+            scores_cp.append(score)
+        if code == ANALYSIS_NO_MOVE:
+            best_moves.append(None)
+        else:
+            best_moves.append(chess.Move(code & 0x3F, (code >> 6) & 0x3F, (code >> 12) or None).uci())
+    return {"depth": depth, "score": scores, "score_cp": scores_cp, "best_move": best_moves}
+
+
+def analysis_depth(packed: Optional[bytes]) -> int:
+    """Search depth of a packed game analysis (0 if there is none)."""
+    return _analysis_header.unpack_from(packed)[0] if packed else 0
+
+
+class PgnBlob:
+    """
+    Append-only file of PGN texts, read back through mmap by (offset, length).
+
+    Texts are separated by blank lines, so the blob is itself a valid PGN file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._append_file = None
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def append(self, text: str) -> Tuple[int, int]:
+        """Append a PGN text. Returns its (offset, length) in bytes."""
+        data = text.encode('utf-8')
+        with self._lock:
+            if self._append_file is None:
+                self._append_file = open(self.path, 'ab')
+            offset = self._append_file.seek(0, os.SEEK_END)
+            self._append_file.write(data)
+            self._append_file.write(b'\n\n')
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> str:
+        """Read the PGN text stored at (offset, length)."""
+        with self._lock:
+            if self._append_file is not None:
+                self._append_file.flush()
+            if self._map is None or offset + length > len(self._map):
+                # The file grew since it was mapped (or was never mapped)
+                self._remap()
+            if self._map is None or offset + length > len(self._map):
+                logger.warning(f"PGN at offset {offset} is past the end of {self.path}")
+                return ""
+            return self._map[offset:offset + length].decode('utf-8')
+
+    def _remap(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def sync(self):
+        """Flush appended texts to disk."""
+        with self._lock:
+            if self._append_file is not None:
+                self._append_file.flush()
+                os.fsync(self._append_file.fileno())
+
+    def truncate(self):
+        """Drop all stored texts."""
+        with self._lock:
+            self._close()
+            with open(self.path, 'wb'):
+                pass
+
+    def close(self):
+        """Release the file handle and the mapping."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._append_file is not None:
+            self._append_file.close()
+            self._append_file = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class GameRecord:
+    """
+    Compact in-memory form of a Game.
+
+    Moves are packed as 16-bit codes. Once the record belongs to a GameStorage,
+    its player names, platform, result and time control are shared with the
+    other games of the storage (see StringPool), and its PGN lives in the
+    storage's PgnBlob and is only read when accessed. Exposes the same
+    attributes as Game, so it can be used as a read-only Game wherever one is
+    expected. Engine analysis of the game, once run, is kept packed alongside
+    (see pack_analysis).
+    """
+
+    __slots__ = (
+        "game_id", "date", "rated",
+        "platform", "white_player", "black_player", "result", "time_control", "_moves",
+        "_pgn", "_pgn_offset", "_pgn_length", "_blob", "_analysis"
+    )
+
+    def __init__(
+        self,
+        game_id: str,
+        platform: str,
+        date: str,
+        white_player: str,
+        black_player: str,
+        result: str,
+        time_control: str,
+        rated: bool,
+        pgn: Optional[str] = None,
+        moves: Optional[List[str]] = None,
+        packed_moves: Optional[bytes] = None,
+        pgn_offset: Optional[int] = None,
+        pgn_length: Optional[int] = None,
+        blob: Optional[PgnBlob] = None,
+        analysis: Optional[bytes] = None
+    ):
+        self.game_id = game_id
+        self.date = date
+        self.rated = rated
+        # Either the PGN text itself, or its location in a PgnBlob
+        self._pgn = pgn if blob is None else None
+        self._pgn_offset = pgn_offset
+        self._pgn_length = pgn_length
+        self._blob = blob
+        self.platform = platform
+        self.white_player = white_player
+        self.black_player = black_player
+        self.result = result
+        self.time_control = time_control
+        if packed_moves is None:
+            packed_moves = pack_moves(moves or [])
+        # Games that don't start from the standard position keep their SAN moves
+        self._moves = packed_moves if packed_moves is not None else tuple(moves)
+        self._analysis = analysis
+
+    def share_strings(self, strings: StringPool):
+        """Replace the repeated strings with the pool's copies."""
+        self.platform = strings.intern(self.platform)
+        self.white_player = strings.intern(self.white_player)
+        self.black_player = strings.intern(self.black_player)
+        self.result = strings.intern(self.result)
+        self.time_control = strings.intern(self.time_control)
+
+    @property
+    def pgn(self) -> str:
+        """Full PGN notation (read from the blob on access)."""
+        if self._blob is None:
+            return self._pgn or ""
+        return self._blob.read(self._pgn_offset, self._pgn_length)
+
+    def store_pgn(self, blob: PgnBlob) -> bool:
+        """Move the PGN text into a blob. Returns False if it was already stored."""
+        if self._blob is not None:
+            return False
+        self._pgn_offset, self._pgn_length = blob.append(self._pgn or "")
+        self._pgn = None
+        self._blob = blob
+        return True
+
+    @property
+    def moves(self) -> List[str]:
+        """Moves in SAN notation (decoded on access)."""
+        if not isinstance(self._moves, bytes):
+            return list(self._moves)
+        board = chess.Board()
+        sans = []
+        for move in unpack_moves(self._moves):
+            sans.append(board.san(move))
+            board.push(move)
+        return sans
+
+    @property
+    def packed_moves(self) -> Optional[bytes]:
+        """16-bit move codes, or None for games kept as SAN (non-standard start)."""
+        return self._moves if isinstance(self._moves, bytes) else None
+
+    @property
+    def analysis(self) -> Optional[Dict]:
+        """Per-position engine evaluations (see unpack_analysis), or None if the game wasn't analyzed."""
+        return unpack_analysis(self._analysis) if self._analysis else None
+
+    @property
+    def packed_analysis(self) -> Optional[bytes]:
+        return self._analysis
+
+    def mainline(self) -> Iterator[chess.Move]:
+        """Iterate over the mainline moves from the standard start position."""
+        if isinstance(self._moves, bytes):
+            yield from unpack_moves(self._moves)
+            return
+        board = chess.Board()
+        for san in self._moves:
+            try:
+                move = board.parse_san(san)
+            except ValueError:
+                return
+            yield move
+            board.push(move)
+
+    @classmethod
+    def from_game(cls, game: Game) -> "GameRecord":
+        return cls(
+            game_id=game.game_id,
+            platform=game.platform,
+            date=game.date,
+            white_player=game.white_player,
+            black_player=game.black_player,
+            result=game.result,
+            time_control=game.time_control,
+            rated=game.rated,
+            pgn=game.pgn,
+            moves=game.moves
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict, blob: Optional[PgnBlob] = None) -> "GameRecord":
+        """
+        Build a record from its stored form (see to_dict) or a plain Game dict.
+
+        Args:
+            data: Stored game fields
+            blob: PGN blob that pgn_offset/pgn_length refer to
+        """
+        data = dict(data)
+        packed = data.pop("packed_moves", None)
+        if packed is not None:
+            data["packed_moves"] = base64.b64decode(packed)
+        analysis = data.pop("analysis", None)
+        if analysis is not None:
+            data["analysis"] = base64.b64decode(analysis)
+        if "pgn_offset" in data:
+            data["blob"] = blob
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        """
+        Stored form: a Game dict, with packed moves instead of SAN when possible
+        and the PGN location instead of its text once it is in a blob.
+        """
+        data = {
+            "game_id": self.game_id,
+            "platform": self.platform,
+            "date": self.date,
+            "white_player": self.white_player,
+            "black_player": self.black_player,
+            "result": self.result,
+            "time_control": self.time_control,
+            "rated": self.rated,
+        }
+        if self._blob is not None:
+            data["pgn_offset"] = self._pgn_offset
+            data["pgn_length"] = self._pgn_length
+        else:
+            data["pgn"] = self._pgn or ""
+        if self.packed_moves is not None:
+            data["packed_moves"] = base64.b64encode(self._moves).decode("ascii")
+        else:
+            data["moves"] = list(self._moves)
+        if self._analysis is not None:
+            data["analysis"] = base64.b64encode(self._analysis).decode("ascii")
+        return data
+
+    def to_game(self) -> Game:
+        """Materialize a full Game object."""
+        return Game(
+            game_id=self.game_id,
+            platform=self.platform,
+            date=self.date,
+            white_player=self.white_player,
+            black_player=self.black_player,
+            result=self.result,
+            time_control=self.time_control,
+            rated=self.rated,
+            pgn=self.pgn,
+            moves=self.moves
+        )
+
+    def memory_size(self) -> int:
+        """Approximate memory used by this record in bytes."""
+        size = (sys.getsizeof(self) + sys.getsizeof(self.game_id) +
+                sys.getsizeof(self.date) + sys.getsizeof(self._moves))
+        if self._pgn is not None:
+            size += sys.getsizeof(self._pgn)
+        if self._analysis is not None:
+            size += sys.getsizeof(self._analysis)
+        return size
+
+    def __repr__(self) -> str:
+        return f"GameRecord(game_id={self.game_id!r}, date={self.date!r}, {self.white_player!r} vs {self.black_player!r})"
+
+
 @dataclass
 class DatabaseMetadata:
     """Metadata for a database."""
@@ -40,80 +500,1281 @@ class DatabaseMetadata:
     file_path: str
 
 
+_json_decoder = json.JSONDecoder()
+_json_whitespace = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_object(f, chunk_size: int = 1 << 20) -> Iterator[Tuple[str, object, int]]:
+    """
+    Incrementally decode a top-level JSON object from a binary file.
+
+    Members are yielded as soon as they have been read, so the whole document
+    is never held in memory at once.
+
+    Yields:
+        (key, value, bytes_read) tuples, bytes_read being the file position so far
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ""
+    pos = 0
+    bytes_read = 0
+    eof = False
+
+    def fill() -> bool:
+        """Read the next chunk, keeping the unparsed tail. Returns False at EOF."""
+        nonlocal buf, pos, bytes_read, eof
+        if eof:
+            return False
+        chunk = f.read(chunk_size)
+        bytes_read += len(chunk)
+        eof = not chunk
+        buf = buf[pos:] + decoder.decode(chunk, final=eof)
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            pos = _json_whitespace.match(buf, pos).end()
+            if pos < len(buf) or not fill():
+                return
+
+    def decode_value():
+        nonlocal pos
+        while True:
+            try:
+                value, end = _json_decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if not fill():
+                    raise
+                continue
+            if end == len(buf) and fill():
+                # A number or literal may have been cut off at the chunk boundary
+                continue
+            pos = end
+            return value
+
+    def expect(char: str):
+        nonlocal pos
+        skip_whitespace()
+        if buf[pos:pos + 1] != char:
+            raise ValueError(f"Expected {char!r} near byte {bytes_read} of {getattr(f, 'name', 'JSON file')}")
+        pos += 1
+
+    expect('{')
+    skip_whitespace()
+    if buf[pos:pos + 1] == '}':
+        return
+    while True:
+        skip_whitespace()
+        key = decode_value()
+        expect(':')
+        skip_whitespace()
+        value = decode_value()
+        yield key, value, bytes_read
+        skip_whitespace()
+        if buf[pos:pos + 1] == ',':
+            pos += 1
+        else:
+            expect('}')
+            return
+
+
+# Games are indexed by date in batches while loading, at least this many at a time
+LOAD_BATCH_SIZE = 5000
+
+# Snapshots at least this large are decoded incrementally, smaller ones with json.load:
+# streaming cuts the peak memory of a load to about a third but takes about 1.5x longer
+STREAM_LOAD_MIN_BYTES = int(os.environ.get("CHESS_STREAM_LOAD_MIN_MB", "64")) * 1024 * 1024
+
+# Approximate memory cost of the per-game index entries (games dict, dedup and
+# date indexes), and of each position index key and posting
+INDEX_BYTES_PER_GAME = 200
+POSITION_KEY_BYTES = 150
+POSTING_BYTES = 80
+
+# Journal compaction thresholds: fold the journal into the snapshot once it holds
+# at least this many records and at least this fraction of the database size.
+COMPACT_MIN_RECORDS = 1000
+COMPACT_RATIO = 0.5
+
+
+@contextmanager
+def atomic_write(path: Path, binary: bool = False):
+    """
+    Open a temporary file next to path and move it into place when the block exits.
+
+    The data is fsynced before the rename and the directory after it, so a
+    crash leaves either the old file or the complete new one.
+
+    Usage:
+        with atomic_write(path) as f:
+            json.dump(data, f)
+    """
+    path = Path(path)
+    tmp_file = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_file, 'wb' if binary else 'w', encoding=None if binary else 'utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        if tmp_file.exists():
+            tmp_file.unlink()
+        raise
+    if os.name == "posix":
+        # Make the rename itself durable
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+# Seconds the background writer waits after a change before writing, overridable through the environment
+WRITE_INTERVAL_SECONDS = float(os.environ.get("CHESS_WRITE_INTERVAL_SECONDS", "1.0"))
+
+
+class BackgroundWriter:
+    """
+    Coalesces bursts of changes into one write per interval.
+
+    Callers mark a key dirty together with the function that writes it. A
+    background thread waits for the interval after the first change, then
+    runs each dirty key's write function once, however many times the key
+    was marked meanwhile.
+    """
+
+    def __init__(self, interval: float = None, name: str = "writer"):
+        """
+        Args:
+            interval: Seconds between a change and its write. Defaults to CHESS_WRITE_INTERVAL_SECONDS.
+            name: Name of the writer thread
+        """
+        self.interval = WRITE_INTERVAL_SECONDS if interval is None else interval
+        self.name = name
+        self._dirty: "OrderedDict[str, Callable[[], None]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()  # Serializes the thread and flush()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        # Statistics
+        self.notifications = 0
+        self.writes = 0
+
+    def mark_dirty(self, key: str, write: Callable[[], None]):
+        """Schedule write() to run at the end of the current interval."""
+        with self._condition:
+            self.notifications += 1
+            self._dirty[key] = write
+            if self._closed:
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def discard(self, key: str):
+        """Drop a pending write, waiting for one in progress (e.g. before deleting the file)."""
+        with self._write_lock:
+            with self._condition:
+                self._dirty.pop(key, None)
+
+    def flush(self):
+        """Run all pending writes now, in the calling thread."""
+        with self._write_lock:
+            with self._condition:
+                batch = self._dirty
+                self._dirty = OrderedDict()
+            for key, write in batch.items():
+                try:
+                    write()
+                    self.writes += 1
+                except Exception as e:
+                    logger.error(f"Background write of {key} failed: {e}")
+                    logger.exception("Background write exception traceback")
+
+    def close(self):
+        """Stop the thread after writing everything still pending."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._dirty and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                # Let the burst that started with this change settle
+                self._condition.wait_for(lambda: self._closed, timeout=self.interval)
+                if self._closed:
+                    return
+            self.flush()
+
+
+def storage_files(db_file: Path) -> List[Path]:
+    """
+    Return every file belonging to a database (snapshot, journal, compaction journal,
+    PGN blob, binary snapshot, puzzle ledger, puzzles).
+    """
+    db_file = Path(db_file)
+    return [
+        db_file,
+        db_file.with_suffix(".journal"),
+        db_file.with_suffix(".journal.compacting"),
+        db_file.with_suffix(".pgn"),
+        db_file.with_suffix(".snap"),
+        db_file.with_suffix(".ledger"),
+        db_file.with_suffix(".puzzles"),
+    ]
+
+
+# Binary snapshot: header, then length-prefixed little-endian column sections.
+# The header ties it to the JSON snapshot it was written with (mtime and size)
+# and carries a CRC32 of the sections.
+SNAPSHOT_MAGIC = b"CSTKSNAP"
+SNAPSHOT_VERSION = 2
+# magic, version, json mtime_ns, json size, games, estimated memory, crc32
+_snapshot_header = struct.Struct("<8sIqqIqI")
+_section_length = struct.Struct("<Q")
+
+
+def _column_bytes(typecode: str, values) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _column_from_bytes(typecode: str, data) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _text_bytes(values: List[str]) -> bytes:
+    # IDs, dates and names never contain NUL, so it can separate them
+    return "\0".join(values).encode('utf-8')
+
+
+def _text_from_bytes(data) -> List[str]:
+    text = bytes(data).decode('utf-8')
+    return text.split("\0") if text else []
+
+
+def write_binary_snapshot(path: Path, json_file: Path, games: List[GameRecord]):
+    """
+    Write a set of games as a binary snapshot of columns, with their date order.
+
+    Must be called right after json_file was written: the snapshot is only
+    used as long as the JSON snapshot keeps its mtime and size.
+    """
+    # Table of the repeated strings, the columns hold indexes into it
+    local_codes: Dict[str, int] = {}
+    table: List[str] = []
+
+    def local(value: str) -> int:
+        if value not in local_codes:
+            local_codes[value] = len(table)
+            table.append(value)
+        return local_codes[value]
+
+    code_columns = [[], [], [], [], []]
+    moves_offsets = [0]
+    moves_data = []
+    # Games without analysis get an empty range
+    analysis_offsets = [0]
+    analysis_data = []
+    san_games = []
+    memory = 0
+    for i, game in enumerate(games):
+        for column, code in zip(code_columns, (game.platform, game.white_player, game.black_player, game.result, game.time_control)):
+            column.append(local(code))
+        moves = game.packed_moves
+        if moves is None:
+            # Non-standard start position, kept as space separated SAN
+            san_games.append(i)
+            moves = " ".join(game._moves).encode('utf-8')
+        moves_data.append(moves)
+        moves_offsets.append(moves_offsets[-1] + len(moves))
+        analysis = game._analysis or b""
+        analysis_data.append(analysis)
+        analysis_offsets.append(analysis_offsets[-1] + len(analysis))
+        memory += game.memory_size() + INDEX_BYTES_PER_GAME
+
+    date_order = sorted(range(len(games)), key=lambda i: (games[i].date, games[i].game_id))
+    sections = [
+        _text_bytes(table),
+        _text_bytes([game.game_id for game in games]),
+        _text_bytes([game.date for game in games]),
+        *(_column_bytes('I', column) for column in code_columns),
+        _column_bytes('B', [game.rated for game in games]),
+        _column_bytes('Q', [game._pgn_offset for game in games]),
+        _column_bytes('Q', [game._pgn_length for game in games]),
+        _column_bytes('Q', moves_offsets),
+        b"".join(moves_data),
+        _column_bytes('I', san_games),
+        _column_bytes('I', date_order),
+        _column_bytes('Q', analysis_offsets),
+        b"".join(analysis_data),
+    ]
+    payload = b"".join(_section_length.pack(len(section)) + section for section in sections)
+
+    stat = json_file.stat()
+    with atomic_write(path, binary=True) as f:
+        f.write(_snapshot_header.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size,
+            len(games), memory, zlib.crc32(payload)
+        ))
+        f.write(payload)
+
+
+def read_binary_snapshot(
+    path: Path,
+    json_file: Path,
+    blob: PgnBlob,
+    strings: Optional[StringPool] = None
+) -> Optional[Tuple[Dict[str, GameRecord], List[str], List[str], int]]:
+    """
+    Read games from a binary snapshot through mmap.
+
+    The games' repeated strings are taken from `strings` when given.
+
+    Returns:
+        (games by ID, dates, game_ids, estimated_memory) with dates and game IDs
+        in date order, or None if the snapshot is missing, stale or corrupt
+    """
+    if not path.exists() or not json_file.exists():
+        return None
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < _snapshot_header.size:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            magic, version, mtime_ns, size, count, memory, crc = _snapshot_header.unpack_from(mapped, 0)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            stat = json_file.stat()
+            if mtime_ns != stat.st_mtime_ns or size != stat.st_size:
+                logger.info(f"Binary snapshot {path} is stale, falling back to JSON")
+                return None
+            view = memoryview(mapped)
+            payload = view[_snapshot_header.size:]
+            try:
+                if zlib.crc32(payload) != crc:
+                    logger.warning(f"Binary snapshot {path} failed its checksum, falling back to JSON")
+                    return None
+
+                sections = []
+                pos = 0
+                while pos < len(payload):
+                    (length,) = _section_length.unpack_from(payload, pos)
+                    pos += _section_length.size
+                    sections.append(payload[pos:pos + length])
+                    pos += length
+
+                table = _text_from_bytes(sections[0])
+                if strings is not None:
+                    table = [strings.intern(value) for value in table]
+                game_ids = _text_from_bytes(sections[1])
+                dates = _text_from_bytes(sections[2])
+                code_columns = [_column_from_bytes('I', sections[i]) for i in range(3, 8)]
+                rated = _column_from_bytes('B', sections[8])
+                pgn_offsets = _column_from_bytes('Q', sections[9])
+                pgn_lengths = _column_from_bytes('Q', sections[10])
+                moves_offsets = _column_from_bytes('Q', sections[11])
+                moves_data = bytes(sections[12])
+                san_games = _column_from_bytes('I', sections[13])
+                date_order = _column_from_bytes('I', sections[14]).tolist()
+                analysis_offsets = _column_from_bytes('Q', sections[15])
+                analysis_data = bytes(sections[16])
+            finally:
+                # The map can't be closed while views into it are alive
+                sections = None
+                payload.release()
+                view.release()
+
+    if not (len(game_ids) == len(dates) == len(rated) == len(date_order) == count):
+        return None
+    san_games = set(san_games)
+    new_record = GameRecord.__new__
+
+    def build(row: int) -> GameRecord:
+        # Slots are filled directly, the values are already in their stored form
+        record = new_record(GameRecord)
+        record.game_id = game_ids[row]
+        record.date = dates[row]
+        record.rated = bool(rated[row])
+        record.platform, record.white_player, record.black_player, record.result, record.time_control = (
+            table[column[row]] for column in code_columns
+        )
+        moves = moves_data[moves_offsets[row]:moves_offsets[row + 1]]
+        record._moves = tuple(moves.decode('utf-8').split()) if row in san_games else moves
+        record._pgn = None
+        record._pgn_offset = pgn_offsets[row]
+        record._pgn_length = pgn_lengths[row]
+        record._blob = blob
+        record._analysis = analysis_data[analysis_offsets[row]:analysis_offsets[row + 1]] or None
+        return record
+
+    sorted_dates = list(map(dates.__getitem__, date_order))
+    sorted_ids = list(map(game_ids.__getitem__, date_order))
+    return SnapshotGames(game_ids, build), sorted_dates, sorted_ids, memory
+
+
+class SnapshotGames(MutableMapping):
+    """
+    Games of a binary snapshot by ID, each built as a GameRecord on first access.
+
+    Building every record is most of the cost of a reopen, so only the ID
+    index is built up front. Until a game is accessed, its entry holds its
+    row in the snapshot columns.
+    """
+
+    def __init__(self, game_ids: List[str], build: Callable[[int], GameRecord]):
+        self._games: Dict[str, object] = dict(zip(game_ids, range(len(game_ids))))
+        self._build = build
+        self._unbuilt = len(game_ids)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, game_id: str) -> GameRecord:
+        game = self._games[game_id]
+        if type(game) is int:
+            game = self._build_game(game_id)
+        return game
+
+    def _build_game(self, game_id: str) -> GameRecord:
+        with self._lock:
+            game = self._games[game_id]
+            if type(game) is int:
+                game = self._build(game)
+                self._games[game_id] = game
+                self._built_one()
+            return game
+
+    def _built_one(self):
+        """Count a row as built or dropped, releasing the columns after the last one (caller holds the lock)."""
+        self._unbuilt -= 1
+        if not self._unbuilt:
+            self._build = None
+
+    def build_all(self):
+        """Build the records of every game not accessed yet."""
+        with self._lock:
+            if not self._unbuilt:
+                return
+            # None of these objects can form reference cycles, so the cyclic GC
+            # is paused instead of letting it rescan the new records over and over
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for game_id, game in list(self._games.items()):
+                    if type(game) is int:
+                        self._games[game_id] = self._build(game)
+                        self._built_one()
+            finally:
+                if gc_enabled:
+                    gc.enable()
+
+    def get(self, game_id: str, default=None):
+        if game_id not in self._games:
+            return default
+        return self[game_id]
+
+    def __setitem__(self, game_id: str, game: GameRecord):
+        with self._lock:
+            if type(self._games.get(game_id)) is int:
+                self._built_one()
+            self._games[game_id] = game
+
+    def __delitem__(self, game_id: str):
+        with self._lock:
+            if type(self._games.pop(game_id)) is int:
+                self._built_one()
+
+    def pop(self, game_id: str, default=None):
+        if game_id not in self._games:
+            return default
+        game = self[game_id]
+        del self[game_id]
+        return game
+
+    def values(self):
+        self.build_all()
+        return self._games.values()
+
+    def items(self):
+        self.build_all()
+        return self._games.items()
+
+    def __contains__(self, game_id) -> bool:
+        return game_id in self._games
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._games)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+
+# Puzzle fields with an index, see PuzzleStore.query ("player" is indexed lowercased)
+PUZZLE_INDEX_FIELDS = ("opening_eco", "difficulty", "player_color", "player", "puzzle_type")
+
+
+class PuzzleStore:
+    """
+    Puzzle generation state of a database.
+
+    The ledger holds the evaluations of the positions already analyzed for
+    puzzles, so later runs only search positions they haven't seen. The
+    puzzles found are kept next to it, referencing their game by ID, and
+    indexed by PUZZLE_INDEX_FIELDS and date for queries. Both are append-only
+    NDJSON files of records keyed by (game_id, ply), read when the store is
+    opened; a later record for the same key replaces an earlier one, and a
+    {"game_id", "removed": true} record drops the puzzles of a deleted game.
+    """
+
+    def __init__(self, ledger_file: Path, puzzles_file: Path):
+        self.ledger_file = Path(ledger_file)
+        self.puzzles_file = Path(puzzles_file)
+        # game_id -> ply -> evaluation
+        self._ledger: Dict[str, Dict[int, Dict]] = {}
+        self._puzzles: Dict[Tuple[str, int], Dict] = {}
+        # field -> value -> puzzle keys
+        self._index: Dict[str, Dict[str, set]] = {field: {} for field in PUZZLE_INDEX_FIELDS}
+        # Puzzle keys sorted by date, for range scans
+        self._dates: List[str] = []
+        self._date_keys: List[Tuple[str, int]] = []
+        self._pending_ledger: List[Dict] = []
+        self._pending_puzzles: List[Dict] = []
+        self._lock = threading.Lock()
+
+        for record in self._read(self.ledger_file):
+            game_id, ply = record.pop("game_id"), record.pop("ply")
+            self._ledger.setdefault(game_id, {})[ply] = record
+        for record in self._read(self.puzzles_file):
+            if record.get("removed"):
+                self._remove_game(record["game_id"])
+            else:
+                self._add(record)
+        logger.info(
+            f"Opened puzzle store {self.puzzles_file} with {len(self._puzzles)} puzzles "
+            f"and {sum(map(len, self._ledger.values()))} analyzed positions"
+        )
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[Dict]:
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash, everything before it is intact
+                    logger.warning(f"Ignoring corrupt record at {path}:{line_number}")
+
+    def analyzed(self, game_id: str) -> Dict[int, Dict]:
+        """Evaluations of the positions of a game already analyzed, by ply."""
+        with self._lock:
+            return dict(self._ledger.get(game_id, {}))
+
+    def record_analysis(self, game_id: str, ply: int, evaluation: Dict):
+        """Add the evaluation of a position to the ledger (written on flush)."""
+        with self._lock:
+            self._ledger.setdefault(game_id, {})[ply] = evaluation
+            self._pending_ledger.append({"game_id": game_id, "ply": ply, **evaluation})
+
+    def _add(self, puzzle: Dict):
+        key = (puzzle["game_id"], puzzle["ply"])
+        if key in self._puzzles:
+            self._unindex(key)
+        self._puzzles[key] = puzzle
+        for field in PUZZLE_INDEX_FIELDS:
+            value = puzzle.get(field)
+            if value is not None:
+                self._index[field].setdefault(self._index_value(field, value), set()).add(key)
+        position = bisect.bisect_right(self._dates, puzzle["date"])
+        self._dates.insert(position, puzzle["date"])
+        self._date_keys.insert(position, key)
+
+    def _unindex(self, key: Tuple[str, int]):
+        puzzle = self._puzzles[key]
+        for field in PUZZLE_INDEX_FIELDS:
+            value = puzzle.get(field)
+            if value is not None:
+                self._index[field][self._index_value(field, value)].discard(key)
+        lo = bisect.bisect_left(self._dates, puzzle["date"])
+        hi = bisect.bisect_right(self._dates, puzzle["date"])
+        position = self._date_keys.index(key, lo, hi)
+        del self._dates[position]
+        del self._date_keys[position]
+
+    def _remove_game(self, game_id: str):
+        for key in [key for key in self._puzzles if key[0] == game_id]:
+            self._unindex(key)
+            del self._puzzles[key]
+
+    @staticmethod
+    def _index_value(field: str, value: str) -> str:
+        return value.lower() if field == "player" else value
+
+    def get_puzzle(self, game_id: str, ply: int) -> Optional[Dict]:
+        with self._lock:
+            return self._puzzles.get((game_id, ply))
+
+    def add_puzzle(self, puzzle: Dict) -> bool:
+        """
+        Store a puzzle (written on flush). It must have "game_id" and "ply".
+
+        Returns:
+            False if a puzzle for that position is already stored
+        """
+        key = (puzzle["game_id"], puzzle["ply"])
+        with self._lock:
+            if key in self._puzzles:
+                return False
+            self._add(puzzle)
+            self._pending_puzzles.append(puzzle)
+            return True
+
+    def remove_game(self, game_id: str):
+        """Drop the puzzles of a deleted game (written on flush)."""
+        with self._lock:
+            self._remove_game(game_id)
+            self._pending_puzzles.append({"game_id": game_id, "removed": True})
+
+    def query(
+        self,
+        filters: Optional[Dict[str, List[str]]] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Find stored puzzles, newest first.
+
+        The filters intersect the index entries of each field, and the date range
+        is a range scan over the date index.
+
+        Args:
+            filters: Accepted values by field of PUZZLE_INDEX_FIELDS (a puzzle matches
+                if each filtered field has one of its values)
+            from_date: Only puzzles from games played on or after this date
+            to_date: Only puzzles from games played on or before this date
+            offset: Matching puzzles to skip
+            limit: Most puzzles to return
+
+        Returns:
+            (number of matching puzzles, the requested page of them)
+
+        Raises:
+            ValueError: If a filter is on a field that isn't indexed
+        """
+        with self._lock:
+            selected = None
+            for field, values in (filters or {}).items():
+                if field not in self._index:
+                    raise ValueError(f"Puzzles can't be filtered by {field}")
+                if not values:
+                    continue
+                keys = set()
+                for value in values:
+                    keys |= self._index[field].get(self._index_value(field, value), set())
+                selected = keys if selected is None else selected & keys
+
+            lo = bisect.bisect_left(self._dates, from_date) if from_date else 0
+            hi = bisect.bisect_right(self._dates, to_date) if to_date else len(self._dates)
+            matching = reversed(self._date_keys[lo:hi])
+            if selected is not None:
+                matching = [key for key in matching if key in selected]
+            else:
+                matching = list(matching)
+
+            return len(matching), [self._puzzles[key] for key in matching[offset:offset + limit]]
+
+    def puzzles(self) -> List[Dict]:
+        """All stored puzzles."""
+        with self._lock:
+            return list(self._puzzles.values())
+
+    def flush(self):
+        """Append pending ledger and puzzle records to their files."""
+        with self._lock:
+            for path, pending in ((self.ledger_file, self._pending_ledger), (self.puzzles_file, self._pending_puzzles)):
+                if not pending:
+                    continue
+                with open(path, 'a', encoding='utf-8') as f:
+                    for record in pending:
+                        f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                        f.write('\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                pending.clear()
+
+    def clear(self):
+        """Forget every analyzed position and puzzle."""
+        with self._lock:
+            self._ledger = {}
+            self._puzzles = {}
+            self._index = {field: {} for field in PUZZLE_INDEX_FIELDS}
+            self._dates = []
+            self._date_keys = []
+            self._pending_ledger = []
+            self._pending_puzzles = []
+            for path in (self.ledger_file, self.puzzles_file):
+                if path.exists():
+                    path.unlink()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "analyzed_positions": sum(map(len, self._ledger.values())),
+                "puzzles": len(self._puzzles)
+            }
+
+
 class GameStorage:
-    """Simple file-based storage for chess games using JSON."""
+    """
+    Simple file-based storage for chess games using JSON.
+
+    Games live in a JSON snapshot plus an append-only NDJSON journal of changes
+    since the snapshot. Saving only appends the changed games to the journal;
+    a background compaction folds the journal back into the snapshot.
+
+    In memory, games are kept as compact GameRecord objects. PGN texts are
+    appended to a separate .pgn blob and memory-mapped on demand, the snapshot
+    and journal only record where each one is.
 
-    def __init__(self, db_file: str):
+    Every JSON snapshot is accompanied by a binary .snap file holding the same
+    games as columns. Reopening an unchanged database reads that instead of
+    decoding the JSON, and only builds each game's record on first access
+    (see SnapshotGames).
+
+    Loading can run in a background thread. Reads are served from the games
+    loaded so far; writes wait until loading has finished.
+    """
+
+    def __init__(self, db_file: str, background: bool = False, writer: Optional[BackgroundWriter] = None):
         """
         Initialize storage for a single database file.
 
         Args:
             db_file: Full path to the database JSON file (e.g., "backend/data/db_001.json")
+            background: Load the database in a background thread instead of blocking
+            writer: Background writer that saves changes shortly after they are made.
+                Without one, changes are only persisted by explicit save() calls.
         """
-        self.games_file = Path(db_file)
+        (self.games_file, self.journal_file, self.compacting_file,
+         pgn_file, self.binary_snapshot_file, self.ledger_file, self.puzzles_file) = storage_files(Path(db_file))
         # Ensure parent directory exists
         self.games_file.parent.mkdir(parents=True, exist_ok=True)
-        self.games: Dict[str, Game] = {}
+        # A SnapshotGames when loaded from the binary snapshot
+        self.games: MutableMapping[str, GameRecord] = {}
+        self._strings = StringPool()
+        self.pgn_blob = PgnBlob(pgn_file)
+        # Position hash -> [(game_id, ply, next_move_uci)], built lazily on first lookup
+        self._position_index: Optional[Dict[int, List[Tuple[str, int, str]]]] = None
+        self._index_lock = threading.Lock()
+        # Dedup key -> number of games with that key
+        self._dedup_index: Optional[Dict[Tuple[str, str, str, str], int]] = {}
+        # Game dates in ascending order with the matching game IDs (parallel lists)
+        self._dates: List[str] = []
+        self._date_ids: List[str] = []
+        # Journal records not yet written to disk, and records already in the journal files
+        self._pending: List[Dict] = []
+        self._journal_records = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._writer = writer
+        self._puzzle_store: Optional[PuzzleStore] = None
+        self._lock = threading.RLock()
+        # Load state and progress
+        self._loaded = threading.Event()
+        self._load_thread: Optional[threading.Thread] = None
+        self._bytes_read = 0
+        self._bytes_total = 0
+        # Memory accounting for the database pool budget
+        self._memory_bytes = 0
+        self._position_postings = 0
         logger.info(f"Initializing GameStorage with file: {self.games_file}")
-        self.load()
+        if background:
+            self._load_thread = threading.Thread(
+                target=self.load,
+                name=f"load-{self.games_file.stem}",
+                daemon=True
+            )
+            self._load_thread.start()
+        else:
+            self.load()
 
     def load(self):
-        """Load games from JSON file into memory."""
-        if self.games_file.exists():
+        """
+        Load games from the JSON snapshot and replay the journal on top of it.
+
+        Snapshots of STREAM_LOAD_MIN_BYTES or more are decoded incrementally:
+        games become visible as soon as they are read and are indexed in
+        batches, so the whole file is never held in memory as one parsed
+        document. Smaller ones are decoded in one go, which is faster.
+        """
+        with self._lock:
+            self._loaded.clear()
+            self.games = {}
+            self._strings = StringPool()
+            self._pending = []
+            self._journal_records = 0
+            self._legacy_records = 0
+            self._dedup_index = {}
+            self._dates = []
+            self._date_ids = []
+            self._position_index = None
+            self._memory_bytes = 0
+            self._bytes_read = 0
+            self._bytes_total = self.games_file.stat().st_size if self.games_file.exists() else 0
+
+        if self.games_file.exists() and self._load_binary_snapshot():
+            logger.info(f"Loaded {len(self.games)} games from binary snapshot")
+        elif self.games_file.exists():
             try:
                 logger.debug(f"Loading games from {self.games_file}")
-                with open(self.games_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.games = {
-                        game_id: Game(**game_data)
-                        for game_id, game_data in data.items()
-                    }
+                batch = []
+                with open(self.games_file, 'rb') as f:
+                    if self._bytes_total >= STREAM_LOAD_MIN_BYTES:
+                        members = iter_json_object(f)
+                    else:
+                        members = ((game_id, game_data, self._bytes_total) for game_id, game_data in json.load(f).items())
+                    for game_id, game_data, bytes_read in members:
+                        game = self._adopt(game_data)
+                        self.games[game_id] = game
+                        batch.append(game)
+                        self._bytes_read = bytes_read
+                        if len(batch) >= max(LOAD_BATCH_SIZE, len(self.games) // 4):
+                            self._index_loaded_batch(batch)
+                            batch = []
+                self._index_loaded_batch(batch)
                 logger.info(f"Loaded {len(self.games)} games from storage")
             except Exception as e:
                 logger.error(f"Error loading games: {e}")
                 logger.exception("Load games exception traceback")
-                self.games = {}
+                with self._lock:
+                    self.games = {}
+                    self._dedup_index = {}
+                    self._dates = []
+                    self._date_ids = []
+                    self._memory_bytes = 0
         else:
             logger.info("No existing games file found, starting with empty database")
-            self.games = {}
+
+        with self._lock:
+            # A leftover compaction journal means a compaction was interrupted,
+            # its records come before the ones in the current journal
+            for journal in (self.compacting_file, self.journal_file):
+                if journal.exists():
+                    self._journal_records += self._replay_journal(journal)
+            self._bytes_read = self._bytes_total
+
+        self._loaded.set()
+
+        if self._legacy_records:
+            # Rewrite the snapshot in the current format so later loads skip the conversion
+            logger.info(f"Converting {self._legacy_records} games stored in an older format")
+            self.compact()
+
+    def _load_binary_snapshot(self) -> bool:
+        """Load games and the date index from the binary snapshot. Returns False if it can't be used."""
+        try:
+            snapshot = read_binary_snapshot(self.binary_snapshot_file, self.games_file, self.pgn_blob, self._strings)
+        except Exception as e:
+            logger.warning(f"Could not read binary snapshot {self.binary_snapshot_file}: {e}")
+            return False
+        if snapshot is None:
+            return False
+
+        games, dates, date_ids, memory = snapshot
+        with self._lock:
+            self.games = games
+            # Built on first use, see _ensure_dedup_index
+            self._dedup_index = None
+            self._dates = dates
+            self._date_ids = date_ids
+            self._memory_bytes = memory
+        return True
+
+    def _index_loaded_batch(self, batch: List[GameRecord]):
+        """Add a batch of freshly loaded games to the dedup and date indexes."""
+        if not batch:
+            return
+        with self._lock:
+            for game in batch:
+                self._add_dedup_key(game)
+                self._memory_bytes += game.memory_size() + INDEX_BYTES_PER_GAME
+            # Two sorted runs, which the sort merges in linear time
+            by_date = list(zip(self._dates, self._date_ids))
+            by_date.extend(sorted((game.date, game.game_id) for game in batch))
+            by_date.sort()
+            self._dates = [date for date, _ in by_date]
+            self._date_ids = [game_id for _, game_id in by_date]
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether loading has finished."""
+        return self._loaded.is_set()
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        """Block until loading has finished. Returns False on timeout."""
+        return self._loaded.wait(timeout)
+
+    def get_load_progress(self) -> Dict:
+        """Return load progress: games loaded so far and bytes of the snapshot read."""
+        loaded = self._loaded.is_set()
+        if loaded or not self._bytes_total:
+            progress = 100 if loaded else 0
+        else:
+            progress = min(99, int(self._bytes_read * 100 / self._bytes_total))
+        return {
+            "loaded": loaded,
+            "games_loaded": len(self.games),
+            "bytes_read": self._bytes_read,
+            "bytes_total": self._bytes_total,
+            "progress": progress
+        }
+
+    def estimated_memory(self) -> int:
+        """Approximate memory used by the games and indexes in bytes."""
+        index = self._position_index
+        index_bytes = 0
+        if index is not None:
+            index_bytes = len(index) * POSITION_KEY_BYTES + self._position_postings * POSTING_BYTES
+        return self._memory_bytes + index_bytes
+
+    def _adopt(self, game_data: Dict) -> GameRecord:
+        """Build a record from stored data, converting older formats on the way."""
+        game = GameRecord.from_dict(game_data, self.pgn_blob)
+        game.share_strings(self._strings)
+        # Older files store SAN move lists and inline PGN texts
+        legacy = "packed_moves" not in game_data and game.packed_moves is not None
+        if game.store_pgn(self.pgn_blob):
+            legacy = True
+        if legacy:
+            self._legacy_records += 1
+        return game
+
+    def _replay_journal(self, journal: Path) -> int:
+        """Apply journal records to the in-memory games. Returns the number of records."""
+        count = 0
+        try:
+            with open(journal, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write from a crash, everything before it is intact
+                        logger.warning(f"Ignoring corrupt journal record at {journal}:{line_number}")
+                        continue
+                    if record["op"] == "add":
+                        self._apply_add(self._adopt(record["game"]))
+                    elif record["op"] == "delete":
+                        self._apply_delete(record["game_id"])
+                    elif record["op"] == "analysis":
+                        self._apply_analysis(record["game_id"], base64.b64decode(record["analysis"]))
+                    count += 1
+            logger.info(f"Replayed {count} journal records from {journal}")
+        except Exception as e:
+            logger.error(f"Error replaying journal {journal}: {e}")
+            logger.exception("Replay journal exception traceback")
+        return count
 
     def save(self):
-        """Persist games to JSON file."""
+        """
+        Persist changes since the last save.
+
+        Appends one journal record per added or deleted game, so the cost scales
+        with the number of changes rather than the database size.
+        """
+        self.wait_until_loaded()
+        with self._lock:
+            try:
+                if not self.games_file.exists():
+                    # First save of a new database, write the snapshot directly
+                    self._write_snapshot(dict(self.games))
+                    self._pending = []
+                    for journal in (self.journal_file, self.compacting_file):
+                        if journal.exists():
+                            journal.unlink()
+                    self._journal_records = 0
+                    logger.info(f"Successfully saved {len(self.games)} games to storage")
+                    return
+
+                if not self._pending:
+                    return
+
+                count = len(self._pending)
+                logger.debug(f"Appending {count} records to {self.journal_file}")
+                self._flush_pending()
+                logger.info(f"Successfully journaled {count} changes ({len(self.games)} games in storage)")
+            except Exception as e:
+                logger.error(f"Error saving games: {e}")
+                logger.exception("Save games exception traceback")
+                return
+
+            if (self._journal_records >= COMPACT_MIN_RECORDS and
+                    self._journal_records >= len(self.games) * COMPACT_RATIO):
+                self.compact()
+
+    def compact(self, wait: bool = False):
+        """
+        Fold the journal into a fresh snapshot in a background thread.
+
+        The current journal is set aside and new changes go to a fresh journal,
+        so saves are not blocked while the snapshot is being written.
+
+        Args:
+            wait: Block until the compaction has finished
+        """
+        self.wait_until_loaded()
+        with self._lock:
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                thread = self._compaction_thread
+            else:
+                # Make sure everything up to now is on disk before rotating the journal
+                self._flush_pending()
+                if self.journal_file.exists():
+                    if self.compacting_file.exists():
+                        # Interrupted compaction: keep its records, append ours after them
+                        with open(self.journal_file, 'r', encoding='utf-8') as src, \
+                                open(self.compacting_file, 'a', encoding='utf-8') as dst:
+                            dst.write(src.read())
+                        self.journal_file.unlink()
+                    else:
+                        self.journal_file.rename(self.compacting_file)
+                self._journal_records = 0
+
+                games = dict(self.games)
+                thread = threading.Thread(
+                    target=self._run_compaction,
+                    args=(games,),
+                    name=f"compact-{self.games_file.stem}",
+                    daemon=True
+                )
+                self._compaction_thread = thread
+                thread.start()
+
+        if wait:
+            thread.join()
+
+    def _run_compaction(self, games: Dict[str, GameRecord]):
+        """Write the snapshot and drop the journal it replaces."""
         try:
-            logger.debug(f"Saving {len(self.games)} games to {self.games_file}")
-            data = {
-                game_id: asdict(game)
-                for game_id, game in self.games.items()
-            }
-            with open(self.games_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Successfully saved {len(self.games)} games to storage")
+            logger.debug(f"Compacting {self.games_file} ({len(games)} games)")
+            self.pgn_blob.sync()
+            self._write_snapshot(games)
+            if self.compacting_file.exists():
+                self.compacting_file.unlink()
+            logger.info(f"Compacted {self.games_file} into a snapshot of {len(games)} games")
         except Exception as e:
-            logger.error(f"Error saving games: {e}")
-            logger.exception("Save games exception traceback")
+            # The compaction journal stays in place and is replayed on the next load
+            logger.error(f"Error compacting games: {e}")
+            logger.exception("Compact games exception traceback")
+
+    def _flush_pending(self):
+        """Append pending records to the journal (caller holds the lock)."""
+        if self._pending:
+            # The journal refers to PGN texts in the blob, they must hit the disk first
+            self.pgn_blob.sync()
+
+            # Start on a fresh line if the last write was torn by a crash
+            torn = False
+            if self.journal_file.exists() and self.journal_file.stat().st_size > 0:
+                with open(self.journal_file, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b'\n'
+
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                if torn:
+                    f.write('\n')
+                for record in self._pending:
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_records += len(self._pending)
+            self._pending = []
+
+    def _write_snapshot(self, games: Dict[str, GameRecord]):
+        """Write a full JSON snapshot via a temporary file and an atomic rename."""
+        data = {
+            game_id: game.to_dict()
+            for game_id, game in games.items()
+        }
+        with atomic_write(self.games_file) as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+        try:
+            write_binary_snapshot(self.binary_snapshot_file, self.games_file, list(games.values()))
+        except Exception as e:
+            # Only costs a slower reopen, the JSON snapshot is the source of truth
+            logger.warning(f"Could not write binary snapshot {self.binary_snapshot_file}: {e}")
 
     def add_game(self, game: Game) -> str:
         """Add a game to storage. Returns game_id."""
-        self.games[game.game_id] = game
+        self.wait_until_loaded()
+        if not isinstance(game, GameRecord):
+            game = GameRecord.from_game(game)
+        game.share_strings(self._strings)
+        game.store_pgn(self.pgn_blob)
+
+        with self._lock:
+            replaced = self._apply_add(game) is not None
+            self._pending.append({"op": "add", "game": game.to_dict()})
+        self._mark_dirty()
+
+        with self._index_lock:
+            if self._position_index is not None:
+                if replaced:
+                    # Old postings can't be removed cheaply, rebuild on next lookup
+                    self._position_index = None
+                else:
+                    self._position_postings += self._index_game(game, self._position_index)
+
         return game.game_id
 
-    def get_game(self, game_id: str) -> Optional[Game]:
+    def delete_game(self, game_id: str) -> bool:
+        """Remove a game from storage. Returns True if the game existed."""
+        self.wait_until_loaded()
+        with self._lock:
+            if self._apply_delete(game_id) is None:
+                return False
+            self._pending.append({"op": "delete", "game_id": game_id})
+        self._mark_dirty()
+
+        if self._puzzle_store is not None or self.puzzles_file.exists():
+            store = self.puzzle_store()
+            store.remove_game(game_id)
+            store.flush()
+
+        with self._index_lock:
+            # Stale postings would be counted again if the game is re-added
+            self._position_index = None
+
+        return True
+
+    def set_analysis(self, game_id: str, analysis: bytes) -> bool:
+        """
+        Store the engine analysis of a game (see pack_analysis).
+
+        Returns:
+            False if the game doesn't exist (anymore)
+        """
+        self.wait_until_loaded()
+        with self._lock:
+            if not self._apply_analysis(game_id, analysis):
+                return False
+            self._pending.append({
+                "op": "analysis",
+                "game_id": game_id,
+                "analysis": base64.b64encode(analysis).decode("ascii")
+            })
+        self._mark_dirty()
+        return True
+
+    def _apply_analysis(self, game_id: str, analysis: bytes) -> bool:
+        """Attach an analysis to a game (caller holds the lock)."""
+        game = self.games.get(game_id)
+        if game is None:
+            return False
+        self._memory_bytes -= game.memory_size()
+        game._analysis = analysis
+        self._memory_bytes += game.memory_size()
+        return True
+
+    def _mark_dirty(self):
+        if self._writer is not None:
+            self._writer.mark_dirty(str(self.games_file), self.save)
+
+    def _apply_add(self, game: GameRecord) -> Optional[GameRecord]:
+        """Insert a game and update the indexes (caller holds the lock). Returns the replaced game."""
+        old_game = self.games.get(game.game_id)
+        if old_game is not None:
+            self._remove_dedup_key(old_game)
+            self._remove_date_entry(old_game)
+            self._memory_bytes -= old_game.memory_size() + INDEX_BYTES_PER_GAME
+        self.games[game.game_id] = game
+        self._add_dedup_key(game)
+        self._add_date_entry(game)
+        self._memory_bytes += game.memory_size() + INDEX_BYTES_PER_GAME
+        return old_game
+
+    def _apply_delete(self, game_id: str) -> Optional[GameRecord]:
+        """Remove a game and update the indexes (caller holds the lock). Returns the removed game."""
+        game = self.games.pop(game_id, None)
+        if game is not None:
+            self._remove_dedup_key(game)
+            self._remove_date_entry(game)
+            self._memory_bytes -= game.memory_size() + INDEX_BYTES_PER_GAME
+        return game
+
+    def get_game(self, game_id: str) -> Optional[GameRecord]:
         """Get a game by ID."""
         return self.games.get(game_id)
 
-    def get_all_games(self) -> List[Game]:
+    def get_all_games(self) -> List[GameRecord]:
         """Get all games as a list."""
         return list(self.games.values())
 
     def game_exists(self, platform: str, date: str, white_player: str, black_player: str) -> bool:
         """Check if a game already exists (for deduplication)."""
-        for game in self.games.values():
-            if (game.platform == platform and
-                game.date == date and
-                game.white_player == white_player and
-                game.black_player == black_player):
-                return True
-        return False
+        return dedup_key(platform, date, white_player, black_player) in self._ensure_dedup_index()
+
+    def _ensure_dedup_index(self) -> Dict[Tuple[str, str, str, str], int]:
+        """Return the dedup index, building it from all games if needed."""
+        with self._lock:
+            if self._dedup_index is None:
+                self._dedup_index = {}
+                for game in self.games.values():
+                    self._add_dedup_key(game)
+            return self._dedup_index
+
+    def _add_dedup_key(self, game: GameRecord):
+        if self._dedup_index is None:
+            return
+        key = dedup_key(game.platform, game.date, game.white_player, game.black_player)
+        self._dedup_index[key] = self._dedup_index.get(key, 0) + 1
+
+    def _remove_dedup_key(self, game: GameRecord):
+        if self._dedup_index is None:
+            return
+        key = dedup_key(game.platform, game.date, game.white_player, game.black_player)
+        count = self._dedup_index.get(key, 0) - 1
+        if count > 0:
+            self._dedup_index[key] = count
+        else:
+            self._dedup_index.pop(key, None)
+
+    def _add_date_entry(self, game: GameRecord):
+        idx = bisect.bisect_right(self._dates, game.date)
+        self._dates.insert(idx, game.date)
+        self._date_ids.insert(idx, game.game_id)
+
+    def _remove_date_entry(self, game: GameRecord):
+        idx = bisect.bisect_left(self._dates, game.date)
+        while idx < len(self._dates) and self._dates[idx] == game.date:
+            if self._date_ids[idx] == game.game_id:
+                del self._dates[idx]
+                del self._date_ids[idx]
+                return
+            idx += 1
 
     def filter_games(
         self,
@@ -121,53 +1782,145 @@ class GameStorage:
         to_date: Optional[str] = None,
         color: Optional[str] = None,
         username: Optional[str] = None
-    ) -> List[Game]:
-        """Filter games by date range and/or color played."""
-        filtered = self.games.values()
-
-        if from_date:
-            filtered = [g for g in filtered if g.date >= from_date]
+    ) -> List[GameRecord]:
+        """
+        Filter games by date range and/or color played.
 
-        if to_date:
-            filtered = [g for g in filtered if g.date <= to_date]
+        The date range is a range scan over the date index, and results are
+        returned in date order (oldest first).
+        """
+        with self._lock:
+            lo = bisect.bisect_left(self._dates, from_date) if from_date else 0
+            hi = bisect.bisect_right(self._dates, to_date) if to_date else len(self._dates)
+            filtered = [self.games[game_id] for game_id in self._date_ids[lo:hi]]
 
         if color and username:
+            username_lower = username.lower()
             if color.lower() == "white":
-                filtered = [g for g in filtered if g.white_player.lower() == username.lower()]
+                filtered = [g for g in filtered if g.white_player.lower() == username_lower]
             elif color.lower() == "black":
-                filtered = [g for g in filtered if g.black_player.lower() == username.lower()]
+                filtered = [g for g in filtered if g.black_player.lower() == username_lower]
 
-        return list(filtered)
+        return filtered
 
-    def get_position_continuations(self, fen: str, color: str) -> Dict:
-        """
-        Find all games that reached a given position and return continuations.
-        Returns dict with move continuations and their statistics.
+    def find_position(self, board: chess.Board) -> List[Tuple[GameRecord, int, str]]:
         """
-        # This will be implemented using python-chess to match positions
-        # For MVP, we'll use a simplified approach based on move sequences
-        continuations = {}
+        Find all games that reached a given position.
 
-        # TODO: Implement position matching using FEN
-        # For now, return empty dict as placeholder
+        Positions are matched on piece placement only. Each game is reported once,
+        at the first ply where it reached the position.
 
-        return continuations
+        Returns:
+            List of (game, ply, next_move_uci) tuples
+        """
+        index = self._ensure_position_index()
+        postings = index.get(position_key(board), [])
+        return [
+            (self.games[game_id], ply, next_move)
+            for game_id, ply, next_move in postings
+            if game_id in self.games
+        ]
+
+    def _ensure_position_index(self) -> Dict[int, List[Tuple[str, int, str]]]:
+        """Return the position index, building it from all games if needed."""
+        self.wait_until_loaded()
+        with self._index_lock:
+            if self._position_index is None:
+                logger.debug(f"Building position index for {len(self.games)} games")
+                index: Dict[int, List[Tuple[str, int, str]]] = {}
+                postings = 0
+                for game in self.games.values():
+                    postings += self._index_game(game, index)
+                self._position_index = index
+                self._position_postings = postings
+                logger.info(f"Built position index with {len(index)} positions")
+            return self._position_index
+
+    @staticmethod
+    def _index_game(game: GameRecord, index: Dict[int, List[Tuple[str, int, str]]]) -> int:
+        """Add postings for every position of a game's mainline to the index. Returns the number added."""
+        board = chess.Board()
+        seen = set()
+        for ply, move in enumerate(game.mainline()):
+            key = position_key(board)
+            if key not in seen:
+                seen.add(key)
+                index.setdefault(key, []).append((game.game_id, ply, sys.intern(move.uci())))
+            board.push(move)
+        return len(seen)
+
+    def puzzle_store(self) -> PuzzleStore:
+        """The database's puzzle ledger and puzzles, opened on first use."""
+        with self._lock:
+            if self._puzzle_store is None:
+                self._puzzle_store = PuzzleStore(self.ledger_file, self.puzzles_file)
+            return self._puzzle_store
+
+    def close(self):
+        """Wait for a running load or compaction and release file handles."""
+        self.wait_until_loaded()
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        if self._puzzle_store is not None:
+            self._puzzle_store.flush()
+        self.pgn_blob.close()
 
     def clear_all(self):
         """Clear all games (useful for testing)."""
-        self.games = {}
-        self.save()
+        self.wait_until_loaded()
+        if self._compaction_thread:
+            self._compaction_thread.join()
+        with self._lock:
+            self.games = {}
+            self._strings = StringPool()
+            self._pending = []
+            self._dedup_index = {}
+            self._dates = []
+            self._date_ids = []
+            self._position_index = None
+            self._memory_bytes = 0
+            self._write_snapshot({})
+            self.pgn_blob.truncate()
+            for journal in (self.journal_file, self.compacting_file):
+                if journal.exists():
+                    journal.unlink()
+            self._journal_records = 0
+            self.puzzle_store().clear()
+
+
+# Default budget for open databases (0 = unlimited), overridable through the environment
+MAX_OPEN_DATABASES = int(os.environ.get("CHESS_MAX_OPEN_DATABASES", "0"))
+DATABASE_MEMORY_BUDGET_MB = int(os.environ.get("CHESS_DATABASE_MEMORY_BUDGET_MB", "0"))
 
 
 class DatabaseManager:
-    """Manages multiple GameStorage instances for multi-database support."""
+    """
+    Manages multiple GameStorage instances for multi-database support.
+
+    Open databases form a pool bounded by a count and/or memory budget. When
+    the pool is over budget, the least recently used databases are evicted:
+    the background writer saves and closes them. Databases pinned by a
+    running task are never evicted.
 
-    def __init__(self, data_dir: str = None):
+    Metadata and game changes are written by a shared BackgroundWriter, call
+    flush() before shutting down.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = None,
+        max_open_databases: Optional[int] = None,
+        memory_budget_mb: Optional[int] = None
+    ):
         """
         Initialize database manager.
 
         Args:
             data_dir: Directory containing database files. Defaults to backend/data/
+            max_open_databases: Maximum number of databases kept open (0 = unlimited).
+                Defaults to CHESS_MAX_OPEN_DATABASES.
+            memory_budget_mb: Approximate memory budget for open databases in MB
+                (0 = unlimited). Defaults to CHESS_DATABASE_MEMORY_BUDGET_MB.
         """
         if data_dir is None:
             base_dir = Path(__file__).parent
@@ -176,11 +1929,23 @@ class DatabaseManager:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_file = self.data_dir / "databases.json"
-        self.databases: Dict[str, GameStorage] = {}  # Lazy-loaded pool
+        self.databases: "OrderedDict[str, GameStorage]" = OrderedDict()  # Lazy-loaded pool, least recently used first
+        self._evicted: Dict[str, GameStorage] = {}  # Evicted databases not saved and closed yet
         self.metadata: Dict[str, DatabaseMetadata] = {}
-        self._lock = threading.Lock()  # Thread safety
+        self._lock = threading.RLock()  # Thread safety
         self._next_id = 1  # Counter for auto-generating IDs
 
+        # Pool budget and statistics
+        self.max_open_databases = MAX_OPEN_DATABASES if max_open_databases is None else max_open_databases
+        self.memory_budget_mb = DATABASE_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+        self._pins: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Coalesces metadata and journal writes during bursts of changes
+        self._writer = BackgroundWriter(name="database-writer")
+
         logger.info(f"Initializing DatabaseManager with data directory: {self.data_dir}")
         self.load_metadata()
 
@@ -210,24 +1975,40 @@ class DatabaseManager:
             self.metadata = {}
 
     def save_metadata(self):
+        """Schedule databases.json to be written by the background writer."""
+        self._writer.mark_dirty(str(self.metadata_file), self._write_metadata)
+
+    def _write_metadata(self):
         """Persist database metadata to databases.json"""
         try:
-            logger.debug(f"Saving metadata for {len(self.metadata)} databases")
-            data = {
-                db_id: asdict(db_meta)
-                for db_id, db_meta in self.metadata.items()
-            }
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
+            with self._lock:
+                logger.debug(f"Saving metadata for {len(self.metadata)} databases")
+                data = {
+                    db_id: asdict(db_meta)
+                    for db_id, db_meta in self.metadata.items()
+                }
+            with atomic_write(self.metadata_file) as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
             logger.info("Successfully saved database metadata")
         except Exception as e:
             logger.error(f"Error saving database metadata: {e}")
             logger.exception("Save metadata exception traceback")
 
+    def flush(self):
+        """Write all pending metadata and game changes now (call at shutdown)."""
+        self._writer.flush()
+        with self._lock:
+            open_databases = list(self.databases.values())
+        for storage in open_databases:
+            if storage.is_loaded:
+                storage.save()
+        logger.info("Flushed pending database writes")
+
     def get_database(self, db_id: str) -> GameStorage:
         """
         Lazy-load and return database instance.
-        Thread-safe caching - only loads from disk once.
+        Thread-safe caching - only loads from disk once. Loading runs in the
+        background, use wait_until_loaded() on the result before writing to it.
 
         Args:
             db_id: Database ID (e.g., "db_001")
@@ -242,23 +2023,142 @@ class DatabaseManager:
         if db_id not in self.metadata:
             raise ValueError(f"Database {db_id} not found")
 
-        # Check cache first (lock-free read)
-        if db_id in self.databases:
-            return self.databases[db_id]
+        with self._lock:
+            storage = self.databases.get(db_id)
+            if storage is not None:
+                self.hits += 1
+                self.databases.move_to_end(db_id)
+            else:
+                self.misses += 1
+
+                storage = self._evicted.pop(db_id, None)
+                if storage is not None:
+                    # Its files may not hold its latest changes yet, keep using it
+                    logger.info(f"Reopening evicted database {db_id} ({self.metadata[db_id].name})")
+                else:
+                    # Load from disk in the background, already-loaded games are served meanwhile
+                    file_path = self.data_dir / self.metadata[db_id].file_path
+                    storage = GameStorage(str(file_path), background=True, writer=self._writer)
+                    logger.info(f"Loading database {db_id} ({self.metadata[db_id].name})")
+                self.databases[db_id] = storage
+
+            # Loaded databases grow, so the budget is checked on every access
+            self._evict_over_budget(keep=db_id)
+            return storage
 
-        # Not in cache - acquire lock and load
+    @contextmanager
+    def pin(self, db_id: str):
+        """
+        Keep a database open for the duration of a long-running task.
+
+        Usage:
+            with db_manager.pin(db_id):
+                storage = db_manager.get_database(db_id)
+                ...
+        """
         with self._lock:
-            # Double-check after acquiring lock (another thread may have loaded)
-            if db_id in self.databases:
-                return self.databases[db_id]
+            self._pins[db_id] = self._pins.get(db_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins[db_id] -= 1
+                if not self._pins[db_id]:
+                    del self._pins[db_id]
+
+    def _over_budget(self) -> bool:
+        if self.max_open_databases and len(self.databases) > self.max_open_databases:
+            return True
+        if self.memory_budget_mb:
+            used = sum(storage.estimated_memory() for storage in self.databases.values())
+            return used > self.memory_budget_mb * 1024 * 1024
+        return False
 
-            # Load from disk
-            file_path = self.data_dir / self.metadata[db_id].file_path
-            storage = GameStorage(str(file_path))
-            self.databases[db_id] = storage
+    def _evict_over_budget(self, keep: Optional[str] = None):
+        """
+        Evict least recently used databases until the pool fits its budget (caller holds the lock).
 
-            logger.info(f"Loaded database {db_id} ({self.metadata[db_id].name}) with {len(storage.games)} games")
-            return storage
+        Saving and closing them is left to the background writer, a large
+        save must not hold up every other database lookup.
+        """
+        while self._over_budget():
+            victim = next(
+                (
+                    db_id for db_id, storage in self.databases.items()
+                    if db_id != keep and db_id not in self._pins and storage.is_loaded
+                ),
+                None
+            )
+            if victim is None:
+                # Everything left is in use or still loading
+                return
+            storage = self.databases.pop(victim)
+            self._evicted[victim] = storage
+            self._writer.mark_dirty(self._eviction_key(storage.games_file), partial(self._close_evicted, victim, storage))
+            self.evictions += 1
+            logger.info(f"Evicted database {victim} from the pool ({len(storage.games)} games)")
+
+    @staticmethod
+    def _eviction_key(db_file: Path) -> str:
+        """Background writer key of the job closing an evicted database."""
+        return f"{db_file}:evicted"
+
+    def _close_evicted(self, db_id: str, storage: GameStorage):
+        """Save and close an evicted database (run by the background writer)."""
+        storage.save()
+        with self._lock:
+            if self._evicted.get(db_id) is not storage:
+                # Reopened in the meantime, or deleted
+                return
+            del self._evicted[db_id]
+        storage.close()
+
+    def pool_stats(self) -> Dict:
+        """
+        Get database pool statistics for tuning the budget.
+
+        Returns:
+            Dict with budget, memory use, hit/miss/eviction counters, background
+            writer counters and per-database sizes
+        """
+        with self._lock:
+            databases = [
+                {
+                    "id": db_id,
+                    "games": len(storage.games),
+                    "memory_mb": round(storage.estimated_memory() / (1024 * 1024), 1),
+                    "loaded": storage.is_loaded,
+                    "pinned": db_id in self._pins
+                }
+                for db_id, storage in self.databases.items()
+            ]
+            return {
+                "open_databases": len(databases),
+                "max_open_databases": self.max_open_databases,
+                "memory_budget_mb": self.memory_budget_mb,
+                "memory_used_mb": round(sum(db["memory_mb"] for db in databases), 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "write_notifications": self._writer.notifications,
+                "writes": self._writer.writes,
+                "databases": databases
+            }
+
+    def get_load_progress(self, db_id: str) -> Dict:
+        """
+        Get load progress for a database, starting to load it if needed.
+
+        Args:
+            db_id: Database ID
+
+        Returns:
+            Dict with loaded, games_loaded, bytes_read, bytes_total and progress (0-100)
+
+        Raises:
+            ValueError: If db_id not found in metadata
+        """
+        return self.get_database(db_id).get_load_progress()
 
     def create_database(self, name: str) -> DatabaseMetadata:
         """
@@ -293,9 +2193,10 @@ class DatabaseManager:
 
             # Create empty database file
             db_file_path = self.data_dir / file_path
-            storage = GameStorage(str(db_file_path))
+            storage = GameStorage(str(db_file_path), writer=self._writer)
             storage.save()  # Create empty JSON file
             self.databases[db_id] = storage
+            self._evict_over_budget(keep=db_id)
 
             logger.info(f"Created new database: {db_id} ({name})")
             return metadata
@@ -313,16 +2214,24 @@ class DatabaseManager:
         if db_id not in self.metadata:
             raise ValueError(f"Database {db_id} not found")
 
+        # A pending save would recreate the journal after the files are deleted.
+        # Not under the lock: a running metadata write needs it.
+        db_file = self.data_dir / self.metadata[db_id].file_path
+        self._writer.discard(str(db_file))
+        self._writer.discard(self._eviction_key(db_file))
+
         with self._lock:
             # Remove from cache
             if db_id in self.databases:
-                del self.databases[db_id]
-
-            # Delete file
-            file_path = self.data_dir / self.metadata[db_id].file_path
-            if file_path.exists():
-                file_path.unlink()
-                logger.info(f"Deleted database file: {file_path}")
+                self.databases.pop(db_id).close()
+            if db_id in self._evicted:
+                self._evicted.pop(db_id).close()
+
+            # Delete snapshot and journal files
+            for file_path in storage_files(self.data_dir / self.metadata[db_id].file_path):
+                if file_path.exists():
+                    file_path.unlink()
+                    logger.info(f"Deleted database file: {file_path}")
 
             # Remove metadata
             db_name = self.metadata[db_id].name
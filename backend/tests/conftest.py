@@ -0,0 +1,104 @@
+"""
+Shared fixtures: a fake Stockfish protocol, so engine pool scheduling can be
+tested without the bundled binaries.
+
+Run from backend/:
+    python -m pytest -q
+"""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Keep the evaluation cache in memory, tests must not write to backend/data
+os.environ.setdefault("CHESS_EVAL_CACHE_PATH", "")
+
+# Backend modules are imported as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import chess  # noqa: E402
+import chess.engine  # noqa: E402
+import pytest  # noqa: E402
+import stockfish_engine  # noqa: E402
+
+
+class FakeSearch:
+    """Stands in for chess.engine.AnalysisResult: runs until stopped or `seconds` elapsed."""
+
+    def __init__(self, board: chess.Board, seconds: float):
+        self.board = board
+        self.seconds = seconds
+        self._stopped = asyncio.Event()
+
+    @property
+    def multipv(self):
+        move = next(iter(self.board.legal_moves))
+        return [{"depth": 20, "score": chess.engine.PovScore(chess.engine.Cp(25), chess.WHITE), "pv": [move]}]
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self._stopped.wait(), self.seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self):
+        self._stopped.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class FakeProtocol:
+    """Stands in for chess.engine.UciProtocol, counting the searches it runs."""
+
+    # Search time by FEN, other positions take FakeProtocol.default_seconds
+    seconds = {}
+    default_seconds = 0.01
+    searches = 0
+
+    options = {}
+
+    async def configure(self, options):
+        pass
+
+    async def analysis(self, board, limit=None, multipv=None, game=None, root_moves=None):
+        FakeProtocol.searches += 1
+        return FakeSearch(board, self.seconds.get(board.fen(), self.default_seconds))
+
+    async def quit(self):
+        pass
+
+
+class FakeTransport:
+    def close(self):
+        pass
+
+
+class FakeEngine(stockfish_engine.StockfishEngine):
+    def _get_stockfish_path(self) -> Path:
+        return Path("fake-stockfish")
+
+    async def start_async(self):
+        self.protocol = FakeProtocol()
+        self._transport = FakeTransport()
+
+
+@pytest.fixture
+def fake_engines(monkeypatch):
+    """Make engine pools start FakeEngine instead of Stockfish processes."""
+    monkeypatch.setattr(stockfish_engine, "StockfishEngine", FakeEngine)
+    monkeypatch.setattr(FakeProtocol, "seconds", {})
+    monkeypatch.setattr(FakeProtocol, "searches", 0)
+    return FakeProtocol
+
+
+@pytest.fixture
+def pool(fake_engines):
+    """A one-engine pool with an in-memory cache, stopped after the test."""
+    pool = stockfish_engine.EnginePool(size=1, timeout=5, cache=stockfish_engine.EvaluationCache(path=""))
+    yield pool
+    pool.stop()
@@ -0,0 +1,36 @@
+import chess
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    # Without the startup event, no database is opened
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("limits", [
+    {"depth": None},
+    {"depth": -1},
+    {"depth": None, "nodes": 0},
+    {"depth": 20, "movetime_ms": -100},
+])
+def test_analyze_position_rejects_invalid_limits(client, limits):
+    response = client.post("/api/analyze/position", json={"fen": chess.STARTING_FEN, **limits})
+
+    assert response.status_code == 400
+
+
+def test_analyze_stream_rejects_invalid_limits(client):
+    response = client.get("/api/analyze/stream", params={"fen": chess.STARTING_FEN, "nodes": -5})
+
+    assert response.status_code == 400
+    assert "nodes" in response.json()["detail"]
+
+
+def test_analyze_batch_rejects_missing_limits(client):
+    response = client.post("/api/analyze/batch", json={"fens": [chess.STARTING_FEN], "depth": None})
+
+    assert response.status_code == 400
@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+import chess
+
+import stockfish_engine
+from conftest import FakeSearch
+from stockfish_engine import EvaluationCache, Priority
+
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+def cache_result(pool, fen: str, depth: int = 20):
+    result = {"score": "0.30", "score_cp": 30, "best_move": "e7e5", "principal_variation": ["e7e5"], "depth": depth}
+    pool.cache.put(chess.Board(fen), 1, {**result, "fen": fen})
+
+
+def wait_for_search(fake_engines, searches: int = 1):
+    deadline = time.perf_counter() + 5
+    while fake_engines.searches < searches:
+        assert time.perf_counter() < deadline, "search never started"
+        time.sleep(0.01)
+
+
+def test_preempted_engine_answers_cached_lookup(pool, fake_engines):
+    start = chess.STARTING_FEN
+    fake_engines.seconds[start] = 0.5
+    cache_result(pool, AFTER_E4)
+
+    background = pool._submit(pool._analyze(start, 20, 1, None, None, None, None, Priority.BACKGROUND))
+    wait_for_search(fake_engines)
+    # Skips the pool's own cache check, as when the position is cached after it
+    interactive = pool._submit(pool._analyze(AFTER_E4, 20, 1, None, None, None, None, Priority.INTERACTIVE))
+
+    assert interactive.result(timeout=5)["best_move"] == "e7e5"
+    assert pool.preemptions == 1
+    assert background.result(timeout=5)["depth"] == 20
+
+
+def test_game_analysis_with_preempted_engine_and_cached_position(pool, fake_engines):
+    pool.analyze_position(AFTER_E4, depth=1)
+    # The engine's last search was preempted, and the game starts with a cached position
+    pool._idle[0].interrupted = True
+    cache_result(pool, chess.STARTING_FEN)
+
+    results = asyncio.run(asyncio.wait_for(pool.analyze_game_async([chess.STARTING_FEN, AFTER_E4], depth=20), 5))
+
+    assert [result["fen"] for result in results] == [chess.STARTING_FEN, AFTER_E4]
+
+
+def test_cached_answer_clears_interrupted(fake_engines):
+    engine = stockfish_engine.StockfishEngine(cache=EvaluationCache(path=""))
+    engine.interrupted = True
+    engine.cache.put(chess.Board(), 1, {"score": "0.30", "score_cp": 30, "best_move": "e2e4",
+                                        "principal_variation": ["e2e4"], "depth": 20})
+
+    result = asyncio.run(engine.analyze_position_async(chess.STARTING_FEN, depth=20))
+
+    assert result["best_move"] == "e2e4"
+    assert not engine.interrupted
+
+
+def test_request_does_not_join_cancelled_search(pool):
+    searches = []
+
+    async def search(*args):
+        searches.append(args)
+        if len(searches) == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                # Like stopping the engine, cancelling takes a round trip
+                await asyncio.sleep(0.1)
+                raise
+        return {"best_move": "e2e4", "depth": 20}
+
+    pool._search = search
+    first = pool._submit(pool._analyze(chess.STARTING_FEN, 20, 1, None, None, None, None, Priority.INTERACTIVE))
+    time.sleep(0.05)
+    first.cancel()
+    time.sleep(0.01)
+    second = pool._submit(pool._analyze(chess.STARTING_FEN, 20, 1, None, None, None, None, Priority.INTERACTIVE))
+
+    assert second.result(timeout=5)["best_move"] == "e2e4"
+    assert len(searches) == 2
+
+
+def test_requests_join_searches_with_their_latency_ceiling(pool, fake_engines):
+    fake_engines.seconds[chess.STARTING_FEN] = 0.2
+
+    def analyze(max_latency):
+        return pool._submit(pool._analyze(chess.STARTING_FEN, 20, 1, None, None, None, max_latency, Priority.INTERACTIVE))
+
+    requests = [analyze(None), analyze(None), analyze(2.0)]
+    for request in requests:
+        request.result(timeout=5)
+
+    assert pool.coalesced == 1
+
+
+def test_interrupted_search_is_not_cached(fake_engines):
+    engine = stockfish_engine.StockfishEngine(cache=EvaluationCache(path=""))
+    fake_engines.seconds[chess.STARTING_FEN] = 5
+
+    async def interrupted_search():
+        search = asyncio.ensure_future(engine.analyze_position_async(chess.STARTING_FEN, depth=20))
+        while engine._search is None:
+            await asyncio.sleep(0.01)
+        engine.interrupt()
+        return await search
+
+    result = asyncio.run(asyncio.wait_for(interrupted_search(), 5))
+
+    assert engine.interrupted and result["best_move"]
+    assert engine.cache.get(chess.Board(), 1) is None
+
+
+def test_search_without_a_move_is_not_cached(fake_engines, monkeypatch):
+    monkeypatch.setattr(FakeSearch, "multipv", property(lambda search: [{}]))
+    engine = stockfish_engine.StockfishEngine(cache=EvaluationCache(path=""))
+
+    result = asyncio.run(engine.analyze_position_async(chess.STARTING_FEN, depth=20))
+
+    assert result["depth"] == 0 and result["best_move"] is None
+    assert engine.cache.get(chess.Board(), 0) is None
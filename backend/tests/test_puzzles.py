@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import chess
+import pytest
+
+import main
+from puzzles import PUZZLE_GATE_DEPTH
+from storage import PuzzleStore
+
+E4 = chess.Move.from_uci("e2e4")
+QUIET = {"hanging": 0}
+
+
+def search_result(best_move: str = "d2d4", score_cp: int = 30) -> dict:
+    return {"best_move": best_move, "score_cp": score_cp, "score": f"{score_cp / 100:.2f}", "principal_variation": [best_move]}
+
+
+def error_result(fen: str) -> dict:
+    return {
+        "error": "Engine crashed", "score": "0.00", "score_cp": 0, "best_move": None, "principal_variation": [], "fen": fen
+    }
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Searches made through the engine pool, answered by `searches.answer(fen, depth)`."""
+    class Searches(list):
+        def answer(self, fen, depth):
+            return search_result()
+
+    made = Searches()
+
+    def analyze_position(fen, depth=None, **kwargs):
+        made.append((fen, depth))
+        return made.answer(fen, depth)
+
+    monkeypatch.setattr(main.engine_pool, "analyze_position", analyze_position)
+    return made
+
+
+def test_failed_shallow_search_does_not_gate(searches):
+    searches.answer = lambda fen, depth: error_result(fen) if depth == PUZZLE_GATE_DEPTH else search_result()
+
+    evaluation = main.evaluate_puzzle_position(chess.Board(), E4, QUIET)
+
+    assert "gated" not in evaluation
+    assert evaluation["best_move"] == "d2d4"
+    assert [depth for _, depth in searches] == [PUZZLE_GATE_DEPTH, 18, 15, 15]
+
+
+def test_failed_shallow_search_of_played_move_does_not_gate(searches):
+    after_e4 = chess.Board()
+    after_e4.push(E4)
+    searches.answer = lambda fen, depth: (
+        error_result(fen) if depth == PUZZLE_GATE_DEPTH and fen == after_e4.fen() else search_result()
+    )
+
+    evaluation = main.evaluate_puzzle_position(chess.Board(), E4, QUIET)
+
+    assert "gated" not in evaluation
+    assert evaluation["played_move_eval_cp"] == -30
+
+
+def test_shallow_search_gates_good_moves(searches):
+    # The opponent is as worse off after the played move as the user was before it
+    searches.answer = lambda fen, depth: search_result(score_cp=30 if " w " in fen else -30)
+
+    evaluation = main.evaluate_puzzle_position(chess.Board(), E4, QUIET)
+
+    assert evaluation["gated"]
+    assert len(searches) == 2
+
+
+@pytest.fixture
+def game():
+    return SimpleNamespace(
+        game_id="game1", pgn="1. e4 e5 2. Nf3 Nc6 *", moves=["e4", "e5", "Nf3", "Nc6"], white_player="alice",
+        black_player="bob", date="2024-01-01T12:00:00", platform="lichess"
+    )
+
+
+@pytest.fixture
+def tactical(monkeypatch):
+    """Every position screens as a tactic, so each is searched without the gate."""
+    monkeypatch.setattr(main, "screen_position", lambda board, move, replies: {"score": 100, "hanging": 300})
+
+
+def test_failed_searches_are_not_recorded(tmp_path, searches, game, tactical):
+    store = PuzzleStore(tmp_path / "db.ledger", tmp_path / "db.puzzles")
+    searches.answer = lambda fen, depth: error_result(fen) if depth == 15 else search_result()
+
+    assert main.find_puzzles_in_game(game, "alice", store) == []
+
+    assert store.analyzed("game1") == {}
+    assert not (tmp_path / "db.ledger").exists()
+
+
+def test_successful_searches_are_recorded(tmp_path, searches, game, tactical):
+    store = PuzzleStore(tmp_path / "db.ledger", tmp_path / "db.puzzles")
+
+    main.find_puzzles_in_game(game, "alice", store)
+
+    assert sorted(store.analyzed("game1")) == [0, 2]
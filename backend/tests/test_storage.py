@@ -0,0 +1,465 @@
+import gc
+import io
+import json
+import os
+import threading
+import weakref
+
+import pytest
+
+import storage as storage_module
+from storage import (
+    BackgroundWriter, DatabaseManager, Game, GameStorage, SnapshotGames, atomic_write, dedup_key, iter_json_object,
+    PuzzleStore, make_game_id, pack_analysis, read_binary_snapshot
+)
+
+
+def make_game(number: int, date: str = "2024-01-01T12:00:00", white: str = "alice", black: str = "bob") -> Game:
+    moves = ["e4", "e5", "Nf3"] if number % 2 else ["d4", "d5"]
+    return Game(
+        game_id=make_game_id("lichess", f"game{number}", date, white, black, moves),
+        platform="lichess",
+        date=date,
+        white_player=white,
+        black_player=black,
+        result="1-0",
+        time_control="600+0",
+        rated=True,
+        pgn=f'[Event "Game {number}"]\n\n1. {moves[0]} *',
+        moves=moves
+    )
+
+
+def open_storage(tmp_path) -> GameStorage:
+    return GameStorage(str(tmp_path / "db.json"))
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.save()
+    games = [make_game(i) for i in range(3)]
+    for game in games:
+        storage.add_game(game)
+    storage.delete_game(games[0].game_id)
+    storage.save()
+    # Crash halfway through the next append
+    with open(storage.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "game": {"game_id"')
+
+    reopened = open_storage(tmp_path)
+
+    assert sorted(reopened.games) == sorted(game.game_id for game in games[1:])
+    assert reopened.get_game(games[1].game_id).pgn == games[1].pgn
+    assert reopened.get_game(games[1].game_id).moves == games[1].moves
+
+
+def test_journal_appends_after_a_torn_record(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.save()
+    storage.add_game(make_game(1))
+    storage.save()
+    with open(storage.journal_file, 'a', encoding='utf-8') as f:
+        f.write('{"op": "del')
+
+    reopened = open_storage(tmp_path)
+    reopened.add_game(make_game(2))
+    reopened.save()
+
+    assert len(open_storage(tmp_path).games) == 2
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.save()
+    games = [make_game(i) for i in range(5)]
+    for game in games:
+        storage.add_game(game)
+    storage.save()
+
+    storage.compact(wait=True)
+
+    assert not storage.journal_file.exists()
+    assert not storage.compacting_file.exists()
+    with open(storage.games_file, encoding='utf-8') as f:
+        assert sorted(json.load(f)) == sorted(game.game_id for game in games)
+    assert sorted(open_storage(tmp_path).games) == sorted(game.game_id for game in games)
+
+
+def test_interrupted_compaction_is_replayed_before_the_journal(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.save()
+    game = make_game(1)
+    storage.add_game(game)
+    storage.save()
+    # Crash after rotating the journal, before the snapshot was written
+    storage.journal_file.rename(storage.compacting_file)
+    storage.delete_game(game.game_id)
+    storage.save()
+
+    reopened = open_storage(tmp_path)
+    assert reopened.games == {}
+
+    reopened.add_game(make_game(2))
+    reopened.compact(wait=True)
+    assert not reopened.compacting_file.exists()
+    assert list(open_storage(tmp_path).games) == [make_game(2).game_id]
+
+
+def test_game_ids_are_stable():
+    moves = ["e4", "e5"]
+    assert make_game_id("lichess", "abc", "2024-01-01", "alice", "bob", moves) == \
+        make_game_id("lichess", "abc", "2024-01-02", "carol", "dave", [])
+    assert make_game_id("lichess", None, "2024-01-01", "alice", "bob", moves) == \
+        make_game_id("lichess", None, "2024-01-01", "alice", "bob", moves)
+    assert make_game_id("lichess", None, "2024-01-01", "alice", "bob", moves) != \
+        make_game_id("lichess", None, "2024-01-01", "alice", "bob", moves + ["Nf3"])
+    assert make_game_id("lichess", "abc", "", "", "", []) != make_game_id("chess.com", "abc", "", "", "", [])
+
+
+def test_reimported_game_replaces_the_stored_one(tmp_path):
+    storage = open_storage(tmp_path)
+    game = make_game(1)
+    storage.add_game(game)
+    storage.add_game(make_game(1))
+
+    assert len(storage.games) == 1
+    assert storage._ensure_dedup_index() == {dedup_key("lichess", game.date, "alice", "bob"): 1}
+
+
+def test_dedup_index_follows_adds_and_deletes(tmp_path):
+    storage = open_storage(tmp_path)
+    first, second = make_game(1), make_game(2)
+    storage.add_game(first)
+    storage.add_game(second)
+    storage.save()
+
+    assert storage.game_exists("lichess", first.date, "alice", "bob")
+    assert not storage.game_exists("lichess", first.date, "bob", "alice")
+
+    storage.delete_game(first.game_id)
+    assert storage.game_exists("lichess", first.date, "alice", "bob")
+    storage.delete_game(second.game_id)
+    assert not storage.game_exists("lichess", first.date, "alice", "bob")
+
+
+def test_dedup_index_is_rebuilt_on_reopen(tmp_path):
+    storage = open_storage(tmp_path)
+    storage.save()
+    storage.add_game(make_game(1, white="carol"))
+    storage.save()
+    storage.compact(wait=True)
+
+    reopened = open_storage(tmp_path)
+
+    assert reopened.game_exists("lichess", "2024-01-01T12:00:00", "carol", "bob")
+    assert not reopened.game_exists("lichess", "2024-01-01T12:00:00", "alice", "bob")
+
+
+def test_iter_json_object_across_chunk_boundaries():
+    data = {"a": 1, "b": [1.5, {"c": "d\u00e9"}], "long": "x" * 50, "t": True, "n": None, "e": {}}
+    encoded = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+    members = list(iter_json_object(io.BytesIO(encoded), chunk_size=3))
+
+    assert {key: value for key, value, _ in members} == data
+    assert members[-1][2] == len(encoded)
+
+
+@pytest.mark.parametrize("stream_min_bytes", [0, 1 << 40])
+def test_snapshot_loads_streamed_or_at_once(tmp_path, monkeypatch, stream_min_bytes):
+    storage = open_storage(tmp_path)
+    games = [make_game(i, date=f"2024-01-{i + 1:02d}") for i in range(3)]
+    for game in games:
+        storage.add_game(game)
+    storage.compact(wait=True)
+    storage.binary_snapshot_file.unlink()
+    monkeypatch.setattr(storage_module, "STREAM_LOAD_MIN_BYTES", stream_min_bytes)
+
+    reopened = open_storage(tmp_path)
+
+    assert [game.game_id for game in reopened.filter_games()] == [game.game_id for game in games]
+    assert reopened.get_load_progress()["progress"] == 100
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """A manager keeping two databases open, whose writer only runs when flushed."""
+    manager = DatabaseManager(data_dir=str(tmp_path), max_open_databases=2)
+    manager._writer.interval = 60
+    yield manager
+    manager.flush()
+    manager._writer.close()
+
+
+def open_database(manager: DatabaseManager, db_id: str) -> GameStorage:
+    storage = manager.get_database(db_id)
+    storage.wait_until_loaded()
+    return storage
+
+
+def test_least_recently_used_database_is_evicted(manager):
+    first, second, third = (manager.create_database(name).id for name in ("a", "b", "c"))
+
+    assert list(manager.databases) == [second, third]
+    open_database(manager, second)
+    open_database(manager, first)
+
+    assert list(manager.databases) == [second, first]
+    assert manager.evictions == 2
+
+
+def test_pinned_database_is_not_evicted(manager):
+    first, second, third = (manager.create_database(name).id for name in ("a", "b", "c"))
+
+    with manager.pin(first):
+        open_database(manager, first)
+        open_database(manager, second)
+        open_database(manager, third)
+        assert first in manager.databases
+
+    assert list(manager.databases) == [first, third]
+
+
+def test_evicted_database_is_saved_and_closed_by_the_writer(manager):
+    first = manager.create_database("a").id
+    storage = open_database(manager, first)
+    game = make_game(1)
+    storage.add_game(game)
+    manager.create_database("b")
+    manager.create_database("c")
+
+    # Written by the writer, not by the request that caused the eviction
+    assert manager._evicted == {first: storage}
+    storage = weakref.ref(storage)
+    manager._writer.flush()
+
+    assert manager._evicted == {}
+    gc.collect()
+    assert storage() is None
+    assert list(open_database(manager, first).games) == [game.game_id]
+
+
+def test_evicted_database_reopened_before_it_is_written(manager):
+    first = manager.create_database("a").id
+    storage = open_database(manager, first)
+    storage.add_game(make_game(1))
+    manager.create_database("b")
+    manager.create_database("c")
+
+    assert open_database(manager, first) is storage
+    manager.flush()
+
+    assert first in manager.databases
+    assert len(GameStorage(str(storage.games_file)).games) == 1
+
+
+def test_games_share_strings_within_their_database(tmp_path):
+    storage = open_storage(tmp_path)
+    for i in range(2):
+        storage.add_game(make_game(i, white="".join(["ali", "ce"])))
+    storage.compact(wait=True)
+
+    for games in (storage.get_all_games(), open_storage(tmp_path).get_all_games()):
+        assert games[0].white_player == "alice"
+        assert games[0].white_player is games[1].white_player
+
+
+def snapshot_storage(tmp_path) -> GameStorage:
+    """A compacted storage with analysis and a game that doesn't start from the standard position."""
+    storage = open_storage(tmp_path)
+    for i in range(4):
+        storage.add_game(make_game(i, date=f"2024-01-0{4 - i}"))
+    odd = make_game(9)
+    odd.moves = ["Kd2"]
+    storage.add_game(odd)
+    storage.set_analysis(make_game(1).game_id, pack_analysis(12, [(20, None, "e2e4"), (-15, None, None)]))
+    storage.compact(wait=True)
+    return storage
+
+
+def test_binary_snapshot_reopens_the_same_games(tmp_path):
+    storage = snapshot_storage(tmp_path)
+
+    reopened = open_storage(tmp_path)
+
+    assert isinstance(reopened.games, SnapshotGames)
+    assert reopened.get_game(make_game(9).game_id).moves == ["Kd2"]
+    assert reopened.get_game(make_game(1).game_id).analysis["best_move"] == ["e2e4", None]
+    assert [game.to_dict() for game in reopened.filter_games()] == [game.to_dict() for game in storage.filter_games()]
+    assert reopened.get_game(make_game(2).game_id).pgn == make_game(2).pgn
+
+
+def change_mtime(storage: GameStorage):
+    stat = storage.games_file.stat()
+    os.utime(storage.games_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+
+def change_size(storage: GameStorage):
+    stat = storage.games_file.stat()
+    with open(storage.games_file, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    os.utime(storage.games_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+def change_payload(storage: GameStorage):
+    data = bytearray(storage.binary_snapshot_file.read_bytes())
+    data[-1] ^= 0xFF
+    storage.binary_snapshot_file.write_bytes(bytes(data))
+
+
+@pytest.mark.parametrize("change", [change_mtime, change_size, change_payload])
+def test_binary_snapshot_is_rejected_when_it_does_not_match(tmp_path, change):
+    storage = snapshot_storage(tmp_path)
+    assert read_binary_snapshot(storage.binary_snapshot_file, storage.games_file, storage.pgn_blob) is not None
+
+    change(storage)
+
+    assert read_binary_snapshot(storage.binary_snapshot_file, storage.games_file, storage.pgn_blob) is None
+    reopened = open_storage(tmp_path)
+    assert not isinstance(reopened.games, SnapshotGames)
+    assert len(reopened.games) == 5
+
+
+def test_snapshot_games_are_built_on_access(tmp_path):
+    snapshot_storage(tmp_path)
+    storage = open_storage(tmp_path)
+    games = storage.games
+    assert games._unbuilt == 5
+
+    assert storage.get_game(make_game(0).game_id).white_player == "alice"
+    storage.delete_game(make_game(1).game_id)
+    storage.add_game(make_game(2))
+    assert games._unbuilt == 2
+
+    assert len(storage.get_all_games()) == 4
+    assert games._unbuilt == 0 and games._build is None
+
+
+def test_background_writer_flush_runs_each_key_once():
+    writer = BackgroundWriter(interval=60)
+    writes = []
+    writer.mark_dirty("a", lambda: writes.append("a1"))
+    writer.mark_dirty("b", lambda: 1 / 0)
+    writer.mark_dirty("a", lambda: writes.append("a2"))
+    writer.mark_dirty("c", lambda: writes.append("c"))
+    writer.discard("c")
+
+    writer.flush()
+    writer.flush()
+
+    assert writes == ["a2"]
+    assert (writer.notifications, writer.writes) == (4, 1)
+    writer.close()
+
+
+def test_background_writer_writes_after_the_interval():
+    writer = BackgroundWriter(interval=0.01)
+    written = threading.Event()
+    writer.mark_dirty("a", written.set)
+
+    assert written.wait(5)
+    writer.close()
+
+
+def test_background_writer_close_writes_pending_changes():
+    writer = BackgroundWriter(interval=60)
+    writes = []
+    writer.mark_dirty("a", lambda: writes.append("a"))
+
+    writer.close()
+
+    assert writes == ["a"]
+
+
+def test_atomic_write_keeps_the_old_file_on_failure(tmp_path):
+    path = tmp_path / "data.json"
+    with atomic_write(path) as f:
+        f.write("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write("new")
+            raise RuntimeError("crash")
+
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def make_puzzle(game: str, ply: int, date: str, **fields) -> dict:
+    return {"game_id": game, "ply": ply, "date": date, **fields}
+
+
+def open_puzzle_store(tmp_path) -> PuzzleStore:
+    return PuzzleStore(tmp_path / "db.ledger", tmp_path / "db.puzzles")
+
+
+@pytest.fixture
+def puzzle_store(tmp_path):
+    store = open_puzzle_store(tmp_path)
+    store.add_puzzle(make_puzzle("a", 10, "2024-01-01", opening_eco="C20", difficulty="easy", player="Alice"))
+    store.add_puzzle(make_puzzle("a", 20, "2024-01-01", opening_eco="C20", difficulty="hard", player="Bob"))
+    store.add_puzzle(make_puzzle("b", 10, "2024-02-01", opening_eco="D00", difficulty="easy", player="alice"))
+    store.add_puzzle(make_puzzle("c", 10, "2024-03-01", opening_eco="C20", difficulty="easy", player="carol"))
+    return store
+
+
+def keys(puzzles) -> list:
+    return [(puzzle["game_id"], puzzle["ply"]) for puzzle in puzzles]
+
+
+def test_puzzle_query_intersects_index_filters(puzzle_store):
+    total, puzzles = puzzle_store.query({"opening_eco": ["C20"], "difficulty": ["easy"]})
+    assert total == 2
+    assert keys(puzzles) == [("c", 10), ("a", 10)]
+
+    total, puzzles = puzzle_store.query({"opening_eco": ["C20", "D00"], "player": ["ALICE"]})
+    assert keys(puzzles) == [("b", 10), ("a", 10)]
+
+    assert puzzle_store.query({"difficulty": ["medium"]}) == (0, [])
+    assert puzzle_store.query({"difficulty": []})[0] == 4
+
+
+def test_puzzle_query_rejects_unindexed_fields(puzzle_store):
+    with pytest.raises(ValueError):
+        puzzle_store.query({"date": ["2024-01-01"]})
+
+
+def test_puzzle_query_date_range_newest_first(puzzle_store):
+    total, puzzles = puzzle_store.query(from_date="2024-01-15", to_date="2024-03-01")
+    assert total == 2
+    assert keys(puzzles) == [("c", 10), ("b", 10)]
+
+    total, puzzles = puzzle_store.query(to_date="2024-01-01")
+    assert total == 2
+    assert {key[0] for key in keys(puzzles)} == {"a"}
+
+    total, puzzles = puzzle_store.query(offset=1, limit=2)
+    assert total == 4
+    assert keys(puzzles)[0] == ("b", 10)
+    assert len(puzzles) == 2
+
+
+def test_puzzle_store_keeps_one_puzzle_per_position(puzzle_store):
+    assert not puzzle_store.add_puzzle(make_puzzle("a", 10, "2024-01-01", difficulty="hard"))
+    assert puzzle_store.get_puzzle("a", 10)["difficulty"] == "easy"
+
+
+def test_puzzle_store_reopens_after_flush(tmp_path, puzzle_store):
+    puzzle_store.record_analysis("a", 10, {"score_cp": 30})
+    puzzle_store.remove_game("a")
+    puzzle_store.flush()
+
+    reopened = open_puzzle_store(tmp_path)
+
+    assert reopened.stats() == {"analyzed_positions": 1, "puzzles": 2}
+    assert reopened.analyzed("a") == {10: {"score_cp": 30}}
+    assert reopened.query({"opening_eco": ["C20"]})[0] == 1
+    assert keys(reopened.query(to_date="2024-02-01")[1]) == [("b", 10)]
+
+
+def test_puzzle_store_ignores_torn_records(tmp_path, puzzle_store):
+    puzzle_store.flush()
+    with open(tmp_path / "db.puzzles", "a") as f:
+        f.write('{"game_id": "d", "pl')
+
+    assert open_puzzle_store(tmp_path).stats()["puzzles"] == 4
@@ -19,6 +19,7 @@ function HistoryView() {
   const [boardPosition, setBoardPosition] = useState(null)
   const [analyzing, setAnalyzing] = useState(false)
   const [analysis, setAnalysis] = useState(null)
+  const [analyzingGame, setAnalyzingGame] = useState(false)
 
   // Set default date range (last 90 days)
   useEffect(() => {
@@ -39,12 +40,24 @@ function HistoryView() {
     }
   }, [fromDate, toDate, currentDbId])
 
-  // Auto-analyze position when it changes
+  // Auto-analyze position when it changes, the previous stream is closed
+  // so the engine stops searching a position the user has left.
+  // Games analyzed as a whole already have every position's evaluation.
   useEffect(() => {
-    if (boardPosition && selectedGame) {
-      analyzePosition()
+    if (!boardPosition || !selectedGame) return
+    const stored = gameDetails?.analysis
+    if (stored) {
+      const index = currentMoveIndex + 1
+      setAnalysis({
+        score: stored.score[index],
+        score_cp: stored.score_cp[index],
+        best_move: stored.best_move[index],
+        depth: stored.depth
+      })
+      return
     }
-  }, [boardPosition])
+    return analyzePosition()
+  }, [boardPosition, gameDetails])
 
   const loadGames = async () => {
     if (!currentDbId) {
@@ -168,20 +181,55 @@ function HistoryView() {
     }
   }
 
-  const analyzePosition = async () => {
-    if (!boardPosition) return
-
-    setAnalyzing(true)
+  // Run every position of the game through the engine and store the result with it
+  const analyzeGame = async () => {
+    setAnalyzingGame(true)
     try {
-      const response = await axios.post(`${API_BASE}/analyze/position`, {
-        fen: boardPosition,
-        depth: 20
+      const response = await axios.post(`${API_BASE}/games/analyze`, {
+        game_ids: [selectedGame]
+      }, {
+        params: { db_id: currentDbId }
       })
-      setAnalysis(response.data)
+      const taskId = response.data.task_id
+      let status = 'running'
+      while (status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000))
+        const statusResponse = await axios.get(`${API_BASE}/games/analyze/status/${taskId}`)
+        status = statusResponse.data.status
+      }
+      const gameResponse = await axios.get(`${API_BASE}/games/${selectedGame}`, {
+        params: { db_id: currentDbId }
+      })
+      setGameDetails(gameResponse.data)
     } catch (error) {
-      console.error('Error analyzing position:', error)
+      console.error('Error analyzing game:', error)
     }
-    setAnalyzing(false)
+    setAnalyzingGame(false)
+  }
+
+  // Stream the analysis, showing each depth as soon as the engine completes it.
+  // Returns a function that stops the analysis.
+  const analyzePosition = () => {
+    if (!boardPosition) return
+
+    setAnalyzing(true)
+    const params = new URLSearchParams({ fen: boardPosition, depth: 20 })
+    const source = new EventSource(`${API_BASE}/analyze/stream?${params}`)
+    const stop = () => {
+      source.close()
+      setAnalyzing(false)
+    }
+    source.addEventListener('analysis', (event) => {
+      setAnalysis(JSON.parse(event.data))
+    })
+    source.addEventListener('done', stop)
+    source.addEventListener('error', (event) => {
+      if (event.data) {
+        console.error('Error analyzing position:', JSON.parse(event.data).detail)
+      }
+      stop()
+    })
+    return stop
   }
 
   // Show empty state if no database is selected
@@ -233,6 +281,11 @@ function HistoryView() {
           <button onClick={() => setSelectedGame(null)} style={styles.backButton}>
             ← Back to List
           </button>
+          {!gameDetails?.analysis && (
+            <button onClick={analyzeGame} disabled={analyzingGame} style={styles.analyzeGameButton}>
+              {analyzingGame ? 'Analyzing game...' : 'Analyze Game'}
+            </button>
+          )}
 
           <div style={styles.gameContent}>
             <div style={styles.boardSection}>
@@ -458,6 +511,12 @@ const styles = {
     color: 'white',
     marginBottom: '20px'
   },
+  analyzeGameButton: {
+    background: '#4caf50',
+    color: 'white',
+    marginBottom: '20px',
+    marginLeft: '10px'
+  },
   gameContent: {
     display: 'grid',
     gridTemplateColumns: '1fr 1fr',
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react'
+import React, { useState, useEffect, useRef } from 'react'
 import axios from 'axios'
 import { Chess } from 'chess.js'
 import { Chessboard } from 'react-chessboard'
@@ -22,6 +22,9 @@ function PuzzlesView() {
   const [error, setError] = useState(null)
   const [progress, setProgress] = useState(0)
   const [progressMessage, setProgressMessage] = useState('')
+  const [taskId, setTaskId] = useState(null)
+  const [gamePgn, setGamePgn] = useState(null)
+  const puzzleStream = useRef(null)
 
   // Board state
   const [game, setGame] = useState(new Chess())
@@ -54,7 +57,8 @@ function PuzzlesView() {
     }
   }, [currentDbId])
 
-  // Load puzzle position when current puzzle changes
+  // Load puzzle position when current puzzle changes (not when more puzzles arrive)
+  const currentPuzzleId = puzzles[currentPuzzleIndex]?.puzzle_id
   useEffect(() => {
     if (puzzles.length > 0 && currentPuzzleIndex < puzzles.length) {
       const puzzle = puzzles[currentPuzzleIndex]
@@ -66,49 +70,96 @@ function PuzzlesView() {
       setShowSolution(false)
       setPvIndex(0) // Reset principal variation index
     }
-  }, [currentPuzzleIndex, puzzles])
+  }, [currentPuzzleIndex, currentPuzzleId])
 
-  const pollPuzzleStatus = async (taskId) => {
-    try {
-      const response = await axios.get(`${API_BASE}/puzzles/status/${taskId}`)
-      const status = response.data
+  // Puzzles reference their game, fetch its PGN for the game information
+  useEffect(() => {
+    setGamePgn(null)
+    const puzzle = puzzles[currentPuzzleIndex]
+    if (!puzzle || !currentDbId) return
+    let cancelled = false
+    axios.get(`${API_BASE}/games/${puzzle.game_id}?db_id=${currentDbId}`)
+      .then(response => { if (!cancelled) setGamePgn(response.data.pgn) })
+      .catch(err => console.error('Error loading puzzle game:', err))
+    return () => { cancelled = true }
+  }, [currentPuzzleId, currentDbId])
+
+  // Close the puzzle stream when leaving the view
+  useEffect(() => () => puzzleStream.current?.close(), [])
+
+  const streamPuzzles = (taskId) => {
+    const solvedPuzzleIds = getSolvedPuzzleIds()
+    let received = 0
+    let accepted = 0
+    const source = new EventSource(`${API_BASE}/puzzles/stream/${taskId}`)
+    puzzleStream.current = source
+
+    const finish = () => {
+      source.close()
+      setLoading(false)
+      setTaskId(null)
+    }
 
+    // Puzzles are playable as soon as they are found
+    source.addEventListener('puzzle', (event) => {
+      const puzzle = JSON.parse(event.data)
+      received += 1
+      if (!solvedPuzzleIds.includes(puzzle.puzzle_id)) {
+        accepted += 1
+        setPuzzles(current => [...current, puzzle])
+      }
+    })
+    source.addEventListener('progress', (event) => {
+      const status = JSON.parse(event.data)
       setProgress(status.progress)
       setProgressMessage(`Analyzing game ${status.current_game}/${status.total_games} - ${status.puzzles_found} puzzles found`)
+    })
+    source.addEventListener('done', () => {
+      finish()
+      setProgress(100)
+      if (accepted === 0) {
+        setError(received > 0
+          ? `All ${received} puzzles have been solved! Try different filters or reset progress.`
+          : 'No puzzles found. Try different filters or import more games.')
+      } else if (accepted < received) {
+        console.log(`Filtered out ${received - accepted} already-solved puzzles`)
+      }
+    })
+    source.addEventListener('error', (event) => {
+      finish()
+      setError(event.data ? JSON.parse(event.data).detail : 'Puzzle generation failed')
+    })
+  }
 
-      if (status.status === 'running') {
-        // Continue polling
-        setTimeout(() => pollPuzzleStatus(taskId), 1000)
-      } else if (status.status === 'completed') {
-        // Puzzle generation completed
-        setLoading(false)
-        setProgress(100)
-
-        const newPuzzles = status.puzzles || []
-
-        // Filter out already solved puzzles
-        const solvedPuzzleIds = getSolvedPuzzleIds()
-        const unsolvedPuzzles = newPuzzles.filter(p => !solvedPuzzleIds.includes(p.puzzle_id))
-
-        if (unsolvedPuzzles.length === 0) {
-          setError(`All ${newPuzzles.length} puzzles have been solved! Try different filters or reset progress.`)
-          setPuzzles([])
-        } else {
-          setPuzzles(unsolvedPuzzles)
-          setCurrentPuzzleIndex(0)
+  const stopGeneration = async () => {
+    if (!taskId) return
+    try {
+      await axios.post(`${API_BASE}/puzzles/stop/${taskId}`)
+    } catch (err) {
+      setError(err.response?.data?.detail || err.message)
+    }
+  }
 
-          if (unsolvedPuzzles.length < newPuzzles.length) {
-            console.log(`Filtered out ${newPuzzles.length - unsolvedPuzzles.length} already-solved puzzles`)
-          }
-        }
-      } else if (status.status === 'failed') {
-        // Failed
-        setLoading(false)
-        setError(status.error || 'Puzzle generation failed')
+  // Puzzles generated earlier are kept with the database
+  const loadSavedPuzzles = async () => {
+    setError(null)
+    try {
+      const params = new URLSearchParams({ db_id: currentDbId, limit: 50 })
+      if (username.trim()) params.append('username', username.trim())
+      selectedDifficulties.forEach(diff => params.append('difficulty', diff))
+      const response = await axios.get(`${API_BASE}/puzzles?${params}`)
+
+      const solvedPuzzleIds = getSolvedPuzzleIds()
+      const unsolvedPuzzles = response.data.puzzles.filter(p => !solvedPuzzleIds.includes(p.puzzle_id))
+      if (unsolvedPuzzles.length === 0) {
+        setError(response.data.total > 0
+          ? 'All saved puzzles have been solved! Generate new ones or reset progress.'
+          : 'No saved puzzles yet. Generate some first.')
       }
+      setPuzzles(unsolvedPuzzles)
+      setCurrentPuzzleIndex(0)
     } catch (err) {
-      setLoading(false)
-      setError(err.message)
+      setError(err.response?.data?.detail || err.message)
     }
   }
 
@@ -127,6 +178,8 @@ function PuzzlesView() {
     setError(null)
     setProgress(0)
     setProgressMessage('Starting puzzle generation...')
+    setPuzzles([])
+    setCurrentPuzzleIndex(0)
 
     try {
       // Start puzzle generation task
@@ -141,10 +194,8 @@ function PuzzlesView() {
         }
       )
 
-      const taskId = response.data.task_id
-
-      // Start polling for status
-      pollPuzzleStatus(taskId)
+      setTaskId(response.data.task_id)
+      streamPuzzles(response.data.task_id)
 
     } catch (err) {
       setLoading(false)
@@ -392,6 +443,14 @@ function PuzzlesView() {
         >
           {loading ? 'Generating Puzzles...' : 'Generate Puzzles'}
         </button>
+
+        <button
+          onClick={loadSavedPuzzles}
+          disabled={loading}
+          style={styles.generateButton}
+        >
+          Load Saved Puzzles
+        </button>
       </div>
 
       {/* Progress indicator */}
@@ -401,6 +460,11 @@ function PuzzlesView() {
             <div style={{...styles.progressFill, width: `${progress}%`}} />
           </div>
           <p style={styles.progressText}>{progressMessage}</p>
+          {taskId && (
+            <button onClick={stopGeneration} style={styles.stopButton}>
+              Stop - I have enough puzzles
+            </button>
+          )}
         </div>
       )}
 
@@ -558,10 +622,10 @@ function PuzzlesView() {
                 <h4>Position Details</h4>
                 <p><strong>FEN:</strong></p>
                 <p style={styles.fenText}>{currentPuzzle.fen}</p>
-                {currentPuzzle.pgn && (
+                {gamePgn && (
                   <>
                     <p style={{marginTop: '15px'}}><strong>Full Game PGN:</strong></p>
-                    <p style={styles.pgnText}>{currentPuzzle.pgn}</p>
+                    <p style={styles.pgnText}>{gamePgn}</p>
                   </>
                 )}
               </div>
@@ -663,6 +727,17 @@ const styles = {
     fontWeight: 'bold',
     color: '#666'
   },
+  stopButton: {
+    display: 'block',
+    margin: '10px auto 0',
+    padding: '8px 16px',
+    background: '#ff9800',
+    color: 'white',
+    border: 'none',
+    borderRadius: '4px',
+    cursor: 'pointer',
+    fontSize: '14px'
+  },
   error: {
     padding: '15px',
     background: '#f8d7da',